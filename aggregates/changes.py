@@ -0,0 +1,78 @@
+"""
+Central hook for aggregate writes.
+
+``Aggregate.save()``/``delete()`` report their scope through the signal
+handlers in ``aggregates.signals``; code that writes with ``bulk_create``,
+``bulk_update`` or ``QuerySet.update`` must call ``record_aggregate_changes``
+itself with the rows it wrote. Each change bumps the ``AggregateScopeVersion``
+counter of the aggregate's (project, organization, indicator, month) scope and
+recomputes that scope's ``AggregateFact`` cells.
+"""
+from datetime import date
+
+from django.db.models import F, Q
+
+from .facts import refresh_facts
+from .models import AggregateScopeVersion
+
+BULK_BATCH_SIZE = 500
+SCOPES_PER_UPDATE = 100
+
+
+def month_start(day) -> date:
+    """First day of ``day``'s month; accepts ISO strings as assigned on unsaved instances."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.replace(day=1)
+
+
+def aggregate_scope_key(aggregate) -> tuple:
+    return (aggregate.project_id, aggregate.organization_id, aggregate.indicator_id, month_start(aggregate.period_start))
+
+
+def bump_scope_versions(keys, create_missing=True) -> None:
+    """
+    Increment the version of every ``(project_id, organization_id, indicator_id, period_month)`` in ``keys``.
+
+    Deletes pass ``create_missing=False``: a scope row exists for every aggregate ever written,
+    and inserting one while a cascade is deleting its project or organization would violate the FK.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    if create_missing:
+        AggregateScopeVersion.objects.bulk_create(
+            [
+                AggregateScopeVersion(
+                    project_id=project_id,
+                    organization_id=organization_id,
+                    indicator_id=indicator_id,
+                    period_month=period_month,
+                )
+                for project_id, organization_id, indicator_id, period_month in keys
+            ],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    for offset in range(0, len(keys), SCOPES_PER_UPDATE):
+        condition = Q()
+        for project_id, organization_id, indicator_id, period_month in keys[offset:offset + SCOPES_PER_UPDATE]:
+            condition |= Q(
+                project_id=project_id,
+                organization_id=organization_id,
+                indicator_id=indicator_id,
+                period_month=period_month,
+            )
+        AggregateScopeVersion.objects.filter(condition).update(version=F('version') + 1)
+
+
+def record_aggregate_changes(aggregates, previous_keys=(), deleted=False) -> None:
+    """
+    Record that ``aggregates`` were created, updated or (with ``deleted=True``) deleted.
+
+    ``previous_keys`` are scope keys the rows had before the write, for updates
+    that moved an aggregate to another project, organization, indicator or period.
+    """
+    keys = [*(aggregate_scope_key(aggregate) for aggregate in aggregates), *previous_keys]
+    bump_scope_versions(keys, create_missing=not deleted)
+    refresh_facts(keys)
@@ -0,0 +1,362 @@
+"""
+Batch derivation of aggregates from interaction responses.
+
+A ``DerivationRule`` counts the distinct respondents (or interactions) whose
+response to a source indicator matches a condition. ``derive_aggregates``
+evaluates many rules for a period at once: counts for every
+(rule, organization, project) are computed with grouped queries, one
+conditional ``COUNT(DISTINCT ...)`` column per rule, and the resulting
+aggregates are written with bulk inserts/updates.
+
+Changes to responses and interactions are recorded as ``DirtyDerivation``
+rows (see ``aggregates.signals``); ``process_dirty_derivations`` recomputes
+only the derived aggregates those rows can affect.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from respondents.models import Response as InteractionResponse
+
+from .changes import record_aggregate_changes
+from .models import Aggregate, AggregateChangeLog, DerivationRule, DirtyDerivation
+
+RULES_PER_QUERY = 50
+BULK_BATCH_SIZE = 500
+GENERATED_COMMENT = 'Aggregate generated from interactions and submitted for coordinator review.'
+
+
+def rule_condition(operator: str, match_value) -> Q:
+    """Filter on ``Response.value`` for a rule operator."""
+    if operator == 'equals':
+        return Q(value=match_value)
+    if operator == 'not_equals':
+        return ~Q(value=match_value)
+    if operator == 'contains':
+        return Q(value__contains=match_value)
+    return Q()
+
+
+def count_distinct_field(count_distinct: str) -> str:
+    return 'interaction_id' if count_distinct == 'interaction' else 'interaction__respondent_id'
+
+
+def generated_notes() -> str:
+    return f"Auto-generated from interactions on {timezone.now().date().isoformat()}"
+
+
+def fiscal_quarter_bounds(day: date) -> tuple[date, date]:
+    """Start and end of the fiscal quarter (Q1 = Apr-Jun) containing ``day``."""
+    start_month = (day.month - 1) // 3 * 3 + 1
+    start = date(day.year, start_month, 1)
+    if start_month == 10:
+        return start, date(day.year, 12, 31)
+    return start, date(day.year, start_month + 3, 1) - timedelta(days=1)
+
+
+@dataclass
+class DerivationResult:
+    # {(output_indicator_id, organization_id, project_id): computed count}
+    counts: dict = field(default_factory=dict)
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Existing aggregates with a computed count that were entered or imported by hand.
+    skipped: int = 0
+
+
+def compute_rule_counts(rules, period_start, period_end, organization_ids=None, project_ids=None) -> dict:
+    """
+    Return ``{(output_indicator_id, organization_id, project_id): count}`` for ``rules`` in the period.
+
+    Combinations without a single matching response are omitted.
+    """
+    rules = list(rules)
+    counts = {}
+    base = InteractionResponse.objects.filter(
+        interaction__date__gte=period_start,
+        interaction__date__lte=period_end,
+        interaction__project_id__isnull=False,
+        interaction__respondent__organization_id__isnull=False,
+    )
+    if organization_ids is not None:
+        base = base.filter(interaction__respondent__organization_id__in=organization_ids)
+    if project_ids is not None:
+        base = base.filter(interaction__project_id__in=project_ids)
+
+    for offset in range(0, len(rules), RULES_PER_QUERY):
+        chunk = rules[offset:offset + RULES_PER_QUERY]
+        annotations = {
+            f'rule_{rule.id}': Count(
+                count_distinct_field(rule.count_distinct),
+                distinct=True,
+                filter=Q(indicator_id=rule.source_indicator_id) & rule_condition(rule.operator, rule.match_value),
+            )
+            for rule in chunk
+        }
+        rows = (
+            base.filter(indicator_id__in={rule.source_indicator_id for rule in chunk})
+            .values('interaction__respondent__organization_id', 'interaction__project_id')
+            .annotate(**annotations)
+            .order_by()
+        )
+        for row in rows:
+            organization_id = row['interaction__respondent__organization_id']
+            project_id = row['interaction__project_id']
+            for rule in chunk:
+                computed = row[f'rule_{rule.id}']
+                if computed:
+                    counts[(rule.output_indicator_id, organization_id, project_id)] = computed
+    return counts
+
+
+def derive_aggregates(
+    period_start,
+    period_end,
+    rules=None,
+    organization_ids=None,
+    project_ids=None,
+    keys=None,
+    user=None,
+    dry_run=False,
+    create_missing=True,
+) -> DerivationResult:
+    """
+    Compute every active rule (or ``rules``) for the period and upsert the derived aggregates.
+
+    Only aggregates derivation created (``is_derived``) are written: an existing manual or
+    imported aggregate for a computed key is skipped. Derived aggregates whose count dropped
+    to zero are updated to 0; rows whose value is unchanged are left alone so reviewed/approved
+    data is not resubmitted needlessly. With ``create_missing=False`` only aggregates that
+    already exist for the period are refreshed. ``keys`` limits the run to those
+    ``(output_indicator_id, organization_id, project_id)`` combinations.
+    """
+    if rules is None:
+        rules = DerivationRule.objects.filter(is_active=True)
+    rules = list(rules)
+    result = DerivationResult(counts=compute_rule_counts(rules, period_start, period_end, organization_ids, project_ids))
+    if keys is not None:
+        keys = set(keys)
+        result.counts = {key: computed for key, computed in result.counts.items() if key in keys}
+
+    existing_queryset = Aggregate.objects.filter(
+        indicator_id__in=[rule.output_indicator_id for rule in rules],
+        period_start=period_start,
+        period_end=period_end,
+    )
+    if organization_ids is not None:
+        existing_queryset = existing_queryset.filter(organization_id__in=organization_ids)
+    if project_ids is not None:
+        existing_queryset = existing_queryset.filter(project_id__in=project_ids)
+    existing = {
+        (aggregate.indicator_id, aggregate.organization_id, aggregate.project_id): aggregate
+        for aggregate in existing_queryset
+        if keys is None or (aggregate.indicator_id, aggregate.organization_id, aggregate.project_id) in keys
+    }
+    if not create_missing:
+        result.counts = {key: computed for key, computed in result.counts.items() if key in existing}
+    for key, aggregate in existing.items():
+        if aggregate.is_derived:
+            result.counts.setdefault(key, 0)
+    if dry_run:
+        return result
+
+    changed_by = user if getattr(user, 'is_authenticated', False) else None
+    now = timezone.now()
+    notes = generated_notes()
+    to_create = []
+    to_update = []
+    history = []
+    for (indicator_id, organization_id, project_id), computed in result.counts.items():
+        aggregate = existing.get((indicator_id, organization_id, project_id))
+        if aggregate is not None and not aggregate.is_derived:
+            result.skipped += 1
+            continue
+        if aggregate is not None and aggregate.value == computed:
+            result.unchanged += 1
+            continue
+        if aggregate is None:
+            aggregate = Aggregate(
+                indicator_id=indicator_id,
+                organization_id=organization_id,
+                project_id=project_id,
+                period_start=period_start,
+                period_end=period_end,
+                is_derived=True,
+                created_by=changed_by,
+            )
+            changes = {'value': {'label': 'Captured values', 'from': None, 'to': computed}}
+            to_create.append(aggregate)
+        else:
+            changes = {'value': {'label': 'Captured values', 'from': aggregate.value, 'to': computed}}
+            if aggregate.status != Aggregate.STATUS_PENDING:
+                changes['status'] = {'label': 'Status', 'from': aggregate.status, 'to': Aggregate.STATUS_PENDING}
+            to_update.append(aggregate)
+        aggregate.value = computed
+        aggregate.notes = notes
+        aggregate.status = Aggregate.STATUS_PENDING
+        aggregate.reviewed_at = None
+        aggregate.reviewed_by = None
+        aggregate.updated_at = now
+        aggregate.refresh_value_totals()
+        history.append((aggregate, changes))
+
+    with transaction.atomic():
+        Aggregate.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        Aggregate.objects.bulk_update(
+            to_update,
+            ['value', *Aggregate.VALUE_TOTAL_FIELDS, 'notes', 'status', 'reviewed_at', 'reviewed_by', 'updated_at'],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        record_aggregate_changes([*to_create, *to_update])
+        AggregateChangeLog.objects.bulk_create(
+            [
+                AggregateChangeLog(
+                    aggregate=aggregate,
+                    action=AggregateChangeLog.ACTION_SUBMITTED,
+                    changed_by=changed_by,
+                    comment=GENERATED_COMMENT,
+                    changes=changes,
+                )
+                for aggregate, changes in history
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+    result.created = len(to_create)
+    result.updated = len(to_update)
+    return result
+
+
+def mark_dirty(keys) -> None:
+    """
+    Record ``(source_indicator_id, organization_id, project_id, date)`` keys for the incremental worker.
+
+    Re-marking a key a worker has already claimed clears the claim, so a change that
+    lands while the worker is computing is picked up again on the next pass.
+    """
+    now = timezone.now()
+    rows = [
+        DirtyDerivation(
+            source_indicator_id=source_indicator_id,
+            organization_id=organization_id,
+            project_id=project_id,
+            date=day,
+            marked_at=now,
+        )
+        for source_indicator_id, organization_id, project_id, day in set(keys)
+        if organization_id is not None and project_id is not None and day is not None
+    ]
+    if not rows:
+        return
+    DirtyDerivation.objects.bulk_create(
+        rows,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['source_indicator', 'organization', 'project', 'date'],
+        update_fields=['marked_at', 'claim_token', 'claimed_at'],
+    )
+
+
+@dataclass
+class IncrementalDerivationResult:
+    keys: int = 0
+    periods: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+def _claim_dirty_derivations(batch_size: int, stale_after: float) -> str | None:
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    claimable = Q(claim_token='') | Q(claimed_at__lt=now - timedelta(seconds=stale_after))
+    candidate_ids = list(
+        DirtyDerivation.objects.filter(claimable).order_by('marked_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return None
+    # Conditional UPDATE: a row claimed by a concurrent worker in the meantime no longer matches.
+    claimed = DirtyDerivation.objects.filter(claimable, id__in=candidate_ids).update(
+        claim_token=token,
+        claimed_at=now,
+    )
+    return token if claimed else None
+
+
+def process_dirty_derivations(batch_size: int = 500, stale_after: float = 600.0) -> IncrementalDerivationResult | None:
+    """
+    Claim up to ``batch_size`` dirty keys and recompute the derived aggregates they affect.
+
+    For every active rule whose source indicator changed, the aggregate for the fiscal
+    quarter containing the changed date is recomputed (and created if it does not exist
+    yet), together with any existing derived aggregate of another period covering that
+    date. Only the dirty (organization, project) combinations are recomputed, not every
+    organization against every project seen in the batch. Returns ``None`` when nothing
+    was waiting.
+    """
+    token = _claim_dirty_derivations(batch_size, stale_after)
+    if token is None:
+        return None
+    claimed = DirtyDerivation.objects.filter(claim_token=token)
+    keys = list(claimed.values_list('source_indicator_id', 'organization_id', 'project_id', 'date'))
+    result = IncrementalDerivationResult(keys=len(keys))
+
+    rules_by_source = {}
+    rules_by_output = {}
+    for rule in DerivationRule.objects.filter(is_active=True, source_indicator_id__in={key[0] for key in keys}):
+        rules_by_source.setdefault(rule.source_indicator_id, []).append(rule)
+        rules_by_output[rule.output_indicator_id] = rule
+
+    # period -> {'create': keys, 'refresh': keys}, keys being the dirty (output_indicator_id,
+    # organization_id, project_id) combinations; only 'create' keys may insert a missing aggregate.
+    work = {}
+
+    def add_work(period, rule, organization_id, project_id, create):
+        entry = work.setdefault(period, {'create': set(), 'refresh': set()})
+        entry['create' if create else 'refresh'].add((rule.output_indicator_id, organization_id, project_id))
+
+    affected = [key for key in keys if key[0] in rules_by_source]
+    if affected:
+        existing_periods = {}
+        for row in Aggregate.objects.filter(
+            is_derived=True,
+            indicator_id__in=[rule.output_indicator_id for rules in rules_by_source.values() for rule in rules],
+            organization_id__in={key[1] for key in affected},
+            project_id__in={key[2] for key in affected},
+            period_start__lte=max(key[3] for key in affected),
+            period_end__gte=min(key[3] for key in affected),
+        ).values_list('indicator_id', 'organization_id', 'project_id', 'period_start', 'period_end'):
+            existing_periods.setdefault(row[:3], set()).add(row[3:])
+
+        for source_indicator_id, organization_id, project_id, day in affected:
+            quarter = fiscal_quarter_bounds(day)
+            for rule in rules_by_source[source_indicator_id]:
+                add_work(quarter, rule, organization_id, project_id, True)
+                for period in existing_periods.get((rule.output_indicator_id, organization_id, project_id), ()):
+                    if period != quarter and period[0] <= day <= period[1]:
+                        add_work(period, rule, organization_id, project_id, False)
+
+    for (period_start, period_end), entry in sorted(work.items()):
+        for period_keys, create in ((entry['create'], True), (entry['refresh'] - entry['create'], False)):
+            if not period_keys:
+                continue
+            derived = derive_aggregates(
+                period_start,
+                period_end,
+                rules=[rules_by_output[indicator_id] for indicator_id in {key[0] for key in period_keys}],
+                organization_ids={key[1] for key in period_keys},
+                project_ids={key[2] for key in period_keys},
+                keys=period_keys,
+                create_missing=create,
+            )
+            result.created += derived.created
+            result.updated += derived.updated
+            result.unchanged += derived.unchanged
+    result.periods = len(work)
+
+    claimed.delete()
+    return result
@@ -0,0 +1,147 @@
+"""
+The ``AggregateFact`` cube: pre-summed aggregate totals for analytics.
+
+``refresh_facts`` recomputes the cells of a set of (project, organization,
+indicator, month) scope keys from ``Aggregate``; ``aggregates.changes`` calls it
+for every recorded aggregate write, so a cell is updated whenever an aggregate
+in it is created, edited, moved, deleted or changes status. ``rebuild_facts``
+recomputes the whole cube (see ``rebuild_aggregate_facts``).
+
+Analytics read the cube through ``aggregate_facts`` and ``fact_totals``. Cells
+are month-grained, so ``aggregate_facts`` returns ``None`` for period bounds that
+are not on a month boundary and callers fall back to querying ``Aggregate``.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Aggregate, AggregateFact
+
+BULK_BATCH_SIZE = 500
+SCOPES_PER_REFRESH = 100
+FACT_KEY_FIELDS = ['indicator', 'organization', 'project', 'period_month', 'period_end_month', 'status']
+FACT_VALUE_FIELDS = ['fiscal_year', 'fiscal_quarter', 'entry_count', 'value_total', 'value_male', 'value_female']
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def fiscal_period(month: date) -> tuple[int, int]:
+    """Fiscal year (named after the April it starts in) and quarter (Q1 = Apr-Jun) of ``month``."""
+    fiscal_year = month.year if month.month >= 4 else month.year - 1
+    return fiscal_year, (month.month - 4) % 12 // 3 + 1
+
+
+def _fact_rows(aggregates):
+    return (
+        aggregates.order_by()
+        .annotate(period_month=TruncMonth('period_start'), period_end_month=TruncMonth('period_end'))
+        .values('indicator_id', 'organization_id', 'project_id', 'period_month', 'period_end_month', 'status')
+        .annotate(
+            entries=Count('id'),
+            total=Sum('value_total'),
+            male=Sum('value_male'),
+            female=Sum('value_female'),
+        )
+    )
+
+
+def _build_fact(row: dict) -> AggregateFact:
+    fiscal_year, fiscal_quarter = fiscal_period(row['period_month'])
+    return AggregateFact(
+        indicator_id=row['indicator_id'],
+        organization_id=row['organization_id'],
+        project_id=row['project_id'],
+        fiscal_year=fiscal_year,
+        fiscal_quarter=fiscal_quarter,
+        period_month=row['period_month'],
+        period_end_month=row['period_end_month'],
+        status=row['status'],
+        entry_count=row['entries'],
+        value_total=row['total'],
+        value_male=row['male'],
+        value_female=row['female'],
+    )
+
+
+def refresh_facts(keys) -> None:
+    """
+    Recompute every cell of the ``(project_id, organization_id, indicator_id, period_month)`` scopes in ``keys``.
+
+    All statuses and period ends of a scope are rebuilt together, so callers do not
+    need to know which cell an aggregate was in before a status or period change.
+    """
+    keys = sorted(set(keys))
+    for offset in range(0, len(keys), SCOPES_PER_REFRESH):
+        fact_condition = Q()
+        aggregate_condition = Q()
+        for project_id, organization_id, indicator_id, period_month in keys[offset:offset + SCOPES_PER_REFRESH]:
+            scope = Q(project_id=project_id, organization_id=organization_id, indicator_id=indicator_id)
+            fact_condition |= scope & Q(period_month=period_month)
+            aggregate_condition |= scope & Q(period_start__gte=period_month, period_start__lt=next_month(period_month))
+        # No savepoint: inside a caller's transaction the refresh commits or rolls back with the write.
+        with transaction.atomic(savepoint=False):
+            facts = [_build_fact(row) for row in _fact_rows(Aggregate.objects.filter(aggregate_condition))]
+            AggregateFact.objects.filter(fact_condition).delete()
+            AggregateFact.objects.bulk_create(
+                facts,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=FACT_KEY_FIELDS,
+                update_fields=FACT_VALUE_FIELDS,
+            )
+
+
+def rebuild_facts(batch_size: int = BULK_BATCH_SIZE) -> int:
+    """Replace the whole cube with cells recomputed from every aggregate; returns the number of cells."""
+    created = 0
+    with transaction.atomic():
+        AggregateFact.objects.all().delete()
+        batch = []
+        for row in _fact_rows(Aggregate.objects.all()).iterator(chunk_size=batch_size):
+            batch.append(_build_fact(row))
+            if len(batch) >= batch_size:
+                created += len(AggregateFact.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(AggregateFact.objects.bulk_create(batch))
+    return created
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def aggregate_facts(period_from=None, period_to=None, **filters):
+    """
+    Cells of the aggregates with ``period_start >= period_from`` and ``period_end <= period_to``, narrowed by ``filters``.
+
+    Returns ``None`` when ``period_from`` is not the first or ``period_to`` not the last
+    day of a month (or either is not a date): month-grained cells cannot answer such a
+    filter exactly, so the caller has to query ``Aggregate``.
+    """
+    facts = AggregateFact.objects.filter(**filters)
+    if period_from:
+        start = _as_date(period_from)
+        if start is None or start.day != 1:
+            return None
+        facts = facts.filter(period_month__gte=start)
+    if period_to:
+        end = _as_date(period_to)
+        if end is None or (end + timedelta(days=1)).day != 1:
+            return None
+        facts = facts.filter(period_end_month__lte=end)
+    return facts
+
+
+def fact_totals(facts, *dimensions):
+    """Sum ``facts`` per ``dimensions``: one values row per group with ``total`` (of ``value_total``) and ``entries``."""
+    return facts.order_by().values(*dimensions).annotate(total=Sum('value_total'), entries=Sum('entry_count'))
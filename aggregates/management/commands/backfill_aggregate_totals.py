@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from aggregates.changes import bump_scope_versions, month_start
+from aggregates.facts import refresh_facts
+from aggregates.models import Aggregate
+from aggregates.totals import backfill_value_totals
+
+
+class Command(BaseCommand):
+    help = "Backfill the numeric value_total/value_male/value_female columns on aggregates from their JSON value."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows updated per batch")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every row instead of only rows with a missing value_total",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        queryset = Aggregate.objects.order_by("pk")
+        if not options["all"]:
+            queryset = queryset.filter(value_total__isnull=True)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch_ids = list(queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            last_pk = batch_ids[-1]
+            with transaction.atomic():
+                updated += self._update_batch(batch_ids)
+                keys = [
+                    (project_id, organization_id, indicator_id, month_start(period_start))
+                    for project_id, organization_id, indicator_id, period_start in Aggregate.objects.filter(
+                        pk__in=batch_ids
+                    ).values_list("project_id", "organization_id", "indicator_id", "period_start")
+                ]
+                bump_scope_versions(keys)
+                refresh_facts(keys)
+            self.stdout.write(f"Backfilled {updated} aggregates (last id {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(f"Aggregate totals backfill complete: {updated} rows updated."))
+
+    def _update_batch(self, batch_ids: list[int]) -> int:
+        return backfill_value_totals(
+            Aggregate.objects.filter(pk__in=batch_ids), connection.vendor, batch_size=len(batch_ids)
+        )
@@ -0,0 +1,207 @@
+import itertools
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from aggregates.models import Aggregate
+from indicators.models import Indicator
+from organizations.models import Organization
+from projects.models import Project
+from respondents.models import Interaction, Respondent
+from respondents.models import Response as InteractionResponse
+
+QUARTER_STARTS = [(4, 1), (7, 1), (10, 1), (1, 1)]
+QUARTER_ENDS = [(6, 30), (9, 30), (12, 31), (3, 31)]
+OPEN_STATUSES = [Aggregate.STATUS_PENDING, Aggregate.STATUS_REVIEWED, Aggregate.STATUS_FLAGGED]
+
+
+def _quarters(years):
+    for year in years:
+        for (start_month, start_day), (end_month, end_day) in zip(QUARTER_STARTS, QUARTER_ENDS):
+            start_year = year + 1 if start_month < 4 else year
+            yield date(start_year, start_month, start_day), date(start_year, end_month, end_day)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset inside a transaction, then compare query plans and timings of the hot "
+        "aggregate/response queries with and without the analytics indexes. Nothing is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--aggregates", type=int, default=20000, help="Aggregate rows to seed")
+        parser.add_argument("--interactions", type=int, default=5000, help="Interactions to seed (4 responses each)")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the fastest is reported")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixtures = self._seed(options["aggregates"], options["interactions"])
+            queries = self._queries(fixtures)
+            self._analyze()
+            with_indexes = {name: self._measure(queryset, options["repeat"]) for name, queryset in queries}
+            dropped = self._drop_indexes()
+            self._analyze()
+            without_indexes = {name: self._measure(queryset, options["repeat"]) for name, queryset in queries}
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Dropped for comparison: {', '.join(dropped)}")
+        for name, _queryset in queries:
+            plan, seconds = with_indexes[name]
+            baseline_plan, baseline_seconds = without_indexes[name]
+            self.stdout.write(f"\n== {name}")
+            self.stdout.write(f"with indexes:    {seconds * 1000:.2f} ms")
+            self.stdout.write(self._indent(plan))
+            self.stdout.write(f"without indexes: {baseline_seconds * 1000:.2f} ms")
+            self.stdout.write(self._indent(baseline_plan))
+        self.stdout.write(self.style.SUCCESS("\nBenchmark finished; seeded rows were rolled back."))
+
+    def _seed(self, aggregate_count, interaction_count):
+        organizations = Organization.objects.bulk_create(
+            [Organization(name=f"Bench Org {index}", code=f"BENCH-ORG-{index}", type="ngo") for index in range(50)]
+        )
+        projects = Project.objects.bulk_create(
+            [
+                Project(name=f"Bench Project {index}", code=f"BENCH-PROJ-{index}", start_date=date(2023, 4, 1), end_date=date(2026, 3, 31))
+                for index in range(4)
+            ]
+        )
+        indicators = Indicator.objects.bulk_create(
+            [Indicator(name=f"Bench Indicator {index}", code=f"BENCH-IND-{index}") for index in range(40)]
+        )
+        statuses = [Aggregate.STATUS_APPROVED] * 8 + OPEN_STATUSES
+        combinations = itertools.product(_quarters([2023, 2024, 2025]), indicators, projects, organizations)
+        Aggregate.objects.bulk_create(
+            [
+                Aggregate(
+                    indicator=indicator,
+                    project=project,
+                    organization=organization,
+                    period_start=period_start,
+                    period_end=period_end,
+                    value=index % 97,
+                    value_total=index % 97,
+                    status=statuses[index % len(statuses)],
+                )
+                for index, ((period_start, period_end), indicator, project, organization) in enumerate(
+                    itertools.islice(combinations, aggregate_count)
+                )
+            ],
+            batch_size=1000,
+        )
+
+        respondents = Respondent.objects.bulk_create(
+            [
+                Respondent(
+                    unique_id=f"BENCH-RESP-{index}",
+                    first_name="Bench",
+                    last_name=str(index),
+                    organization=organizations[index % len(organizations)],
+                )
+                for index in range(max(interaction_count // 5, 1))
+            ],
+            batch_size=1000,
+        )
+        interactions = Interaction.objects.bulk_create(
+            [
+                Interaction(
+                    respondent=respondents[index % len(respondents)],
+                    project=projects[index % len(projects)],
+                    date=date.fromordinal(date(2023, 4, 1).toordinal() + index % 1000),
+                )
+                for index in range(interaction_count)
+            ],
+            batch_size=1000,
+        )
+        InteractionResponse.objects.bulk_create(
+            [
+                InteractionResponse(
+                    interaction=interaction,
+                    indicator=indicators[(index + offset) % len(indicators)],
+                    value="yes" if (index + offset) % 3 else "no",
+                )
+                for index, interaction in enumerate(interactions)
+                for offset in range(4)
+            ],
+            batch_size=1000,
+        )
+        return {"organizations": organizations, "projects": projects, "indicators": indicators}
+
+    def _queries(self, fixtures):
+        indicator = fixtures["indicators"][0]
+        project = fixtures["projects"][0]
+        organization = fixtures["organizations"][0]
+        organization_ids = [item.id for item in fixtures["organizations"][:10]]
+        return [
+            (
+                "indicator trend (indicator_id, period_start range)",
+                Aggregate.objects.filter(indicator=indicator, period_start__gte=date(2024, 4, 1))
+                .values("period_start")
+                .annotate(total=Sum("value_total"))
+                .order_by("period_start"),
+            ),
+            (
+                "project + organization + exact period",
+                Aggregate.objects.filter(
+                    project=project,
+                    organization=organization,
+                    period_start=date(2024, 4, 1),
+                    period_end=date(2024, 6, 30),
+                ).order_by(),
+            ),
+            (
+                "organization IN (...) with period overlap",
+                Aggregate.objects.filter(
+                    organization_id__in=organization_ids,
+                    period_start__lte=date(2024, 12, 31),
+                    period_end__gte=date(2024, 10, 1),
+                )
+                .order_by()
+                .values_list("indicator_id", "value_total"),
+            ),
+            (
+                "open review queue (not approved, organization IN (...))",
+                Aggregate.objects.filter(organization_id__in=organization_ids)
+                .exclude(status=Aggregate.STATUS_APPROVED)
+                .order_by("-period_start"),
+            ),
+            (
+                "responses for an indicator by interaction date",
+                InteractionResponse.objects.filter(
+                    indicator=indicator,
+                    interaction__date__gte=date(2024, 4, 1),
+                    interaction__date__lte=date(2024, 6, 30),
+                )
+                .values("interaction__project_id")
+                .annotate(total=Sum("interaction_id"))
+                .order_by(),
+            ),
+        ]
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _drop_indexes(self):
+        dropped = []
+        with connection.cursor() as cursor:
+            for model in (Aggregate, Interaction, InteractionResponse):
+                for index in model._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+                    dropped.append(index.name)
+        return dropped
+
+    def _measure(self, queryset, repeat):
+        plan = queryset.explain()
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            list(queryset.all())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return plan, best
+
+    def _indent(self, text):
+        return "\n".join(f"    {line}" for line in text.splitlines())
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aggregates.derivation import derive_aggregates
+from aggregates.models import DerivationRule
+
+
+class Command(BaseCommand):
+    help = "Recompute aggregates derived from interaction responses for every active derivation rule in a period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period-start", required=True, help="Period start date, for example 2025-04-01")
+        parser.add_argument("--period-end", required=True, help="Period end date, for example 2025-06-30")
+        parser.add_argument("--organization-id", type=int, action="append", help="Limit to this organization (repeatable)")
+        parser.add_argument("--project-id", type=int, action="append", help="Limit to this project (repeatable)")
+        parser.add_argument("--rule-id", type=int, action="append", help="Only evaluate this derivation rule (repeatable)")
+        parser.add_argument("--dry-run", action="store_true", help="Compute counts without writing aggregates")
+
+    def handle(self, *args, **options):
+        try:
+            period_start = date.fromisoformat(options["period_start"])
+            period_end = date.fromisoformat(options["period_end"])
+        except ValueError as exc:
+            raise CommandError(f"Invalid period date: {exc}") from exc
+        if period_end < period_start:
+            raise CommandError("--period-end must be on or after --period-start.")
+
+        rules = DerivationRule.objects.filter(is_active=True)
+        if options["rule_id"]:
+            rules = rules.filter(id__in=options["rule_id"])
+
+        result = derive_aggregates(
+            period_start,
+            period_end,
+            rules=rules,
+            organization_ids=options["organization_id"],
+            project_ids=options["project_id"],
+            dry_run=options["dry_run"],
+        )
+
+        if options["dry_run"]:
+            for (indicator_id, organization_id, project_id), computed in sorted(result.counts.items()):
+                self.stdout.write(
+                    f"indicator {indicator_id} / organization {organization_id} / project {project_id}: {computed}"
+                )
+            self.stdout.write(self.style.WARNING(f"Dry run only: {len(result.counts)} derived aggregates computed."))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Derived aggregates: {result.created} created, {result.updated} updated, {result.unchanged} unchanged, "
+                f"{result.skipped} skipped (entered by hand)."
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from aggregates.changes import aggregate_scope_key, bump_scope_versions
+from aggregates.facts import rebuild_facts
+from aggregates.models import Aggregate
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the AggregateFact cube from every aggregate and bump every aggregate scope version, "
+        "e.g. after loaddata or other writes that bypassed aggregates.changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Fact rows inserted per batch")
+
+    def handle(self, *args, **options):
+        created = rebuild_facts(batch_size=max(1, options["batch_size"]))
+        # Generated reports compare scope versions, so they regenerate on their next read.
+        bump_scope_versions(
+            aggregate_scope_key(aggregate)
+            for aggregate in Aggregate.objects.only("project_id", "organization_id", "indicator_id", "period_start")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Aggregate facts rebuilt: {created} cells."))
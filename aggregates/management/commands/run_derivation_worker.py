@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from aggregates.derivation import process_dirty_derivations
+
+
+class Command(BaseCommand):
+    help = "Recompute derived aggregates affected by response and interaction changes since the last pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain every dirty key, then exit instead of polling")
+        parser.add_argument("--poll-interval", type=float, default=30.0, help="Seconds to wait when nothing is dirty")
+        parser.add_argument("--batch-size", type=int, default=500, help="Dirty keys claimed per pass")
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=600.0,
+            help="Seconds after which keys claimed by a worker that did not finish are claimed again",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            close_old_connections()
+            result = process_dirty_derivations(batch_size=options["batch_size"], stale_after=options["stale_after"])
+            if result is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(
+                f"Recomputed {result.periods} period(s) for {result.keys} dirty key(s): "
+                f"{result.created} created, {result.updated} updated, {result.unchanged} unchanged."
+            )
+            processed += result.keys
+
+        self.stdout.write(self.style.SUCCESS(f"Derivation worker stopped after {processed} dirty key(s)."))
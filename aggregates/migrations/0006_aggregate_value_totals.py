@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:11
+
+from django.db import migrations, models
+
+from aggregates.totals import backfill_value_totals
+
+
+def fill_value_totals(apps, schema_editor):
+    Aggregate = apps.get_model('aggregates', 'Aggregate')
+    backfill_value_totals(Aggregate.objects.all(), schema_editor.connection.vendor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregates', '0005_aggregatechangelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregate',
+            name='value_female',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aggregate',
+            name='value_male',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aggregate',
+            name='value_total',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(fill_value_totals, migrations.RunPython.noop),
+    ]
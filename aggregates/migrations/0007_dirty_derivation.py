@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0004_organization_closure'),
+        ('indicators', '0004_add_indicator_aggregate_disaggregation_config'),
+        ('projects', '0003_projectindicatororganizationtarget'),
+        ('aggregates', '0006_aggregate_value_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyDerivation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('marked_at', models.DateTimeField()),
+                ('claim_token', models.CharField(blank=True, db_index=True, default='', max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_derivations', to='organizations.organization')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_derivations', to='projects.project')),
+                ('source_indicator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_derivations', to='indicators.indicator')),
+            ],
+            options={
+                'ordering': ['marked_at', 'id'],
+                'unique_together': {('source_indicator', 'organization', 'project', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregates', '0007_dirty_derivation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aggregate',
+            index=models.Index(fields=['indicator', 'period_start'], name='agg_indicator_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aggregate',
+            index=models.Index(fields=['project', 'organization', 'period_start', 'period_end'], name='agg_project_org_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aggregate',
+            index=models.Index(fields=['organization', 'period_start', 'period_end'], name='agg_org_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aggregate',
+            index=models.Index(condition=models.Q(('status', 'approved'), _negated=True), fields=['status', 'organization', 'period_start'], name='agg_open_status_org_idx'),
+        ),
+    ]
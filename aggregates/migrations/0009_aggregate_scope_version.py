@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_scope_versions(apps, schema_editor):
+    Aggregate = apps.get_model('aggregates', 'Aggregate')
+    AggregateScopeVersion = apps.get_model('aggregates', 'AggregateScopeVersion')
+    keys = {
+        (project_id, organization_id, indicator_id, period_start.replace(day=1))
+        for project_id, organization_id, indicator_id, period_start in Aggregate.objects.values_list(
+            'project_id', 'organization_id', 'indicator_id', 'period_start'
+        ).distinct().iterator()
+    }
+    AggregateScopeVersion.objects.bulk_create(
+        [
+            AggregateScopeVersion(
+                project_id=project_id,
+                organization_id=organization_id,
+                indicator_id=indicator_id,
+                period_month=period_month,
+                version=1,
+            )
+            for project_id, organization_id, indicator_id, period_month in keys
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_projectindicatororganizationtarget'),
+        ('indicators', '0004_add_indicator_aggregate_disaggregation_config'),
+        ('organizations', '0004_organization_closure'),
+        ('aggregates', '0008_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregateScopeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_month', models.DateField()),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('indicator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_scope_versions', to='indicators.indicator')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_scope_versions', to='organizations.organization')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_scope_versions', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('project', 'organization', 'indicator', 'period_month')},
+            },
+        ),
+        migrations.RunPython(create_scope_versions, migrations.RunPython.noop),
+    ]
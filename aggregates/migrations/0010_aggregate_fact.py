@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:00
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+from aggregates.totals import backfill_value_totals
+
+
+def create_facts(apps, schema_editor):
+    Aggregate = apps.get_model('aggregates', 'Aggregate')
+    AggregateFact = apps.get_model('aggregates', 'AggregateFact')
+    # Databases that applied 0006 before it filled the totals still have NULLs; the sums below need them.
+    backfill_value_totals(Aggregate.objects.filter(value_total__isnull=True), schema_editor.connection.vendor)
+    rows = (
+        Aggregate.objects.order_by()
+        .annotate(period_month=TruncMonth('period_start'), period_end_month=TruncMonth('period_end'))
+        .values('indicator_id', 'organization_id', 'project_id', 'period_month', 'period_end_month', 'status')
+        .annotate(entries=Count('id'), total=Sum('value_total'), male=Sum('value_male'), female=Sum('value_female'))
+    )
+    AggregateFact.objects.bulk_create(
+        [
+            AggregateFact(
+                indicator_id=row['indicator_id'],
+                organization_id=row['organization_id'],
+                project_id=row['project_id'],
+                fiscal_year=row['period_month'].year if row['period_month'].month >= 4 else row['period_month'].year - 1,
+                fiscal_quarter=(row['period_month'].month - 4) % 12 // 3 + 1,
+                period_month=row['period_month'],
+                period_end_month=row['period_end_month'],
+                status=row['status'],
+                entry_count=row['entries'],
+                value_total=row['total'],
+                value_male=row['male'],
+                value_female=row['female'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0004_organization_closure'),
+        ('projects', '0003_projectindicatororganizationtarget'),
+        ('indicators', '0004_add_indicator_aggregate_disaggregation_config'),
+        ('aggregates', '0009_aggregate_scope_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregateFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.PositiveSmallIntegerField()),
+                ('fiscal_quarter', models.PositiveSmallIntegerField()),
+                ('period_month', models.DateField()),
+                ('period_end_month', models.DateField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending Coordinator Review'), ('reviewed', 'Reviewed - Awaiting Approval'), ('flagged', 'Flagged for Correction'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('value_total', models.FloatField(blank=True, null=True)),
+                ('value_male', models.FloatField(blank=True, null=True)),
+                ('value_female', models.FloatField(blank=True, null=True)),
+                ('indicator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_facts', to='indicators.indicator')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_facts', to='organizations.organization')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_facts', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'period_month'], name='aggfact_org_month_idx'), models.Index(fields=['project', 'indicator', 'period_month'], name='aggfact_proj_ind_month_idx'), models.Index(fields=['fiscal_year', 'fiscal_quarter'], name='aggfact_fiscal_idx')],
+                'unique_together': {('indicator', 'organization', 'project', 'period_month', 'period_end_month', 'status')},
+            },
+        ),
+        migrations.RunPython(create_facts, migrations.RunPython.noop),
+    ]
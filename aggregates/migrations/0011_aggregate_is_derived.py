@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+def mark_derived(apps, schema_editor):
+    # Derivation has always written ``generated_notes()`` to the aggregates it creates or updates.
+    Aggregate = apps.get_model('aggregates', 'Aggregate')
+    Aggregate.objects.filter(notes__startswith='Auto-generated from interactions on ').update(is_derived=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregates', '0010_aggregate_fact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregate',
+            name='is_derived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_derived, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .totals import VALUE_TOTAL_FIELDS, extract_value_totals
+
 
 class Aggregate(models.Model):
     """Aggregate data entry without respondent linking."""
@@ -40,8 +42,14 @@ class Aggregate(models.Model):
     
     # Store value as JSON to handle different types
     value = models.JSONField()
+    # Numeric components of ``value`` kept in sync on save so analytics can aggregate in SQL.
+    value_total = models.FloatField(null=True, blank=True, db_index=True)
+    value_male = models.FloatField(null=True, blank=True)
+    value_female = models.FloatField(null=True, blank=True)
 
     notes = models.TextField(blank=True)
+    # Written by ``aggregates.derivation``; derivation never touches aggregates entered or imported by hand.
+    is_derived = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     reviewed_at = models.DateTimeField(null=True, blank=True)
     reviewed_by = models.ForeignKey(
@@ -64,18 +72,129 @@ class Aggregate(models.Model):
     class Meta:
         ordering = ['-period_start']
         unique_together = ['indicator', 'project', 'organization', 'period_start', 'period_end']
+        indexes = [
+            # Indicator trends and exports: one indicator over a period range.
+            models.Index(fields=['indicator', 'period_start'], name='agg_indicator_period_idx'),
+            # Import/derivation upserts and coordinator performance: project + organization + exact period.
+            models.Index(
+                fields=['project', 'organization', 'period_start', 'period_end'],
+                name='agg_project_org_period_idx',
+            ),
+            # Scoped listings and analytics: organization_id IN (...) with a period overlap.
+            models.Index(fields=['organization', 'period_start', 'period_end'], name='agg_org_period_idx'),
+            # Review queues only ever look at rows that still need attention; approved rows are the bulk.
+            models.Index(
+                fields=['status', 'organization', 'period_start'],
+                condition=~models.Q(status='approved'),
+                name='agg_open_status_org_idx',
+            ),
+        ]
+
+    VALUE_TOTAL_FIELDS = VALUE_TOTAL_FIELDS
+
+    def refresh_value_totals(self):
+        self.value_total, self.value_male, self.value_female = extract_value_totals(self.value)
 
     def save(self, *args, **kwargs):
         if not self.status:
             self.status = self.STATUS_PENDING
         if self.notes is None:
             self.notes = ''
+        # The numeric columns are filled by the ``pre_save`` handler in ``aggregates.signals``,
+        # which also runs for raw saves (``loaddata``) that bypass this method.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'value' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.VALUE_TOTAL_FIELDS}
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.indicator.code} - {self.organization.name} ({self.period_start})"
 
 
+class AggregateScopeVersion(models.Model):
+    """
+    Change counter for the aggregates of one (project, organization, indicator, month of period_start).
+
+    Bumped by ``aggregates.changes`` on every aggregate write; cached reports compare the
+    counters of the scopes they read to decide whether their stored results are still current.
+    """
+
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        related_name='aggregate_scope_versions',
+    )
+    organization = models.ForeignKey(
+        'organizations.Organization',
+        on_delete=models.CASCADE,
+        related_name='aggregate_scope_versions',
+    )
+    indicator = models.ForeignKey(
+        'indicators.Indicator',
+        on_delete=models.CASCADE,
+        related_name='aggregate_scope_versions',
+    )
+    period_month = models.DateField()
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['project', 'organization', 'indicator', 'period_month']
+
+    def __str__(self):
+        return f"{self.project_id}/{self.organization_id}/{self.indicator_id} {self.period_month:%Y-%m} v{self.version}"
+
+
+class AggregateFact(models.Model):
+    """
+    Summed aggregate totals per indicator, organization, project, month and status.
+
+    A cell holds every aggregate whose ``period_start`` falls in ``period_month`` and whose
+    ``period_end`` falls in ``period_end_month``; the fiscal year (named after the April it
+    starts in) and quarter (Q1 = Apr-Jun) of ``period_month`` are stored for rollups. Cells
+    are recomputed by ``aggregates.changes`` on every aggregate write and can be rebuilt with
+    ``rebuild_aggregate_facts``; ``aggregates.facts`` holds the query helpers.
+    """
+
+    indicator = models.ForeignKey(
+        'indicators.Indicator',
+        on_delete=models.CASCADE,
+        related_name='aggregate_facts',
+    )
+    organization = models.ForeignKey(
+        'organizations.Organization',
+        on_delete=models.CASCADE,
+        related_name='aggregate_facts',
+    )
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        related_name='aggregate_facts',
+    )
+    fiscal_year = models.PositiveSmallIntegerField()
+    fiscal_quarter = models.PositiveSmallIntegerField()
+    period_month = models.DateField()
+    period_end_month = models.DateField()
+    status = models.CharField(max_length=20, choices=Aggregate.STATUS_CHOICES)
+    entry_count = models.PositiveIntegerField(default=0)
+    value_total = models.FloatField(null=True, blank=True)
+    value_male = models.FloatField(null=True, blank=True)
+    value_female = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['indicator', 'organization', 'project', 'period_month', 'period_end_month', 'status']
+        indexes = [
+            models.Index(fields=['organization', 'period_month'], name='aggfact_org_month_idx'),
+            models.Index(fields=['project', 'indicator', 'period_month'], name='aggfact_proj_ind_month_idx'),
+            models.Index(fields=['fiscal_year', 'fiscal_quarter'], name='aggfact_fiscal_idx'),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.indicator_id}/{self.organization_id}/{self.project_id} "
+            f"{self.period_month:%Y-%m} {self.status}: {self.value_total}"
+        )
+
+
 class AggregateChangeLog(models.Model):
     """Structured audit trail for aggregate workflow actions and corrections."""
 
@@ -161,3 +280,39 @@ class DerivationRule(models.Model):
 
     def __str__(self):
         return f"{self.output_indicator.code} derived from {self.source_indicator.code}"
+
+
+class DirtyDerivation(models.Model):
+    """
+    A (source indicator, organization, project, date) whose responses changed since derived aggregates were computed.
+
+    Rows are upserted by the respondents signal handlers and consumed by
+    ``process_dirty_derivations``; a worker owns a row while ``claim_token`` is set.
+    """
+
+    source_indicator = models.ForeignKey(
+        'indicators.Indicator',
+        on_delete=models.CASCADE,
+        related_name='dirty_derivations',
+    )
+    organization = models.ForeignKey(
+        'organizations.Organization',
+        on_delete=models.CASCADE,
+        related_name='dirty_derivations',
+    )
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        related_name='dirty_derivations',
+    )
+    date = models.DateField()
+    marked_at = models.DateTimeField()
+    claim_token = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['source_indicator', 'organization', 'project', 'date']
+        ordering = ['marked_at', 'id']
+
+    def __str__(self):
+        return f"{self.source_indicator_id} / {self.organization_id} / {self.project_id} @ {self.date}"
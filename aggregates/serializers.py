@@ -47,12 +47,12 @@ class AggregateListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'indicator', 'indicator_name', 'indicator_code',
             'project', 'project_name', 'organization', 'organization_name',
-            'period_start', 'period_end', 'value', 'notes',
+            'period_start', 'period_end', 'value', 'notes', 'is_derived',
             'status', 'reviewed_at', 'reviewed_by', 'reviewed_by_name',
             'created_at', 'updated_at', 'created_by', 'created_by_name',
         ]
         read_only_fields = [
-            'id', 'status', 'reviewed_at', 'reviewed_by',
+            'id', 'is_derived', 'status', 'reviewed_at', 'reviewed_by',
             'created_at', 'updated_at', 'created_by'
         ]
 
@@ -66,6 +66,21 @@ class AggregateSerializer(AggregateListSerializer):
         fields = AggregateListSerializer.Meta.fields + ['history_entries']
 
 
+class AggregateBulkItemSerializer(serializers.Serializer):
+    indicator = serializers.IntegerField()
+    value = serializers.JSONField()
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True, default='')
+
+
+class AggregateBulkCreateSerializer(serializers.Serializer):
+    project = serializers.IntegerField()
+    organization = serializers.IntegerField()
+    period_start = serializers.DateField()
+    period_end = serializers.DateField()
+    upsert = serializers.BooleanField(default=False, required=False)
+    data = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+
 class AggregateReviewSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
@@ -131,3 +146,17 @@ class GenerateFromInteractionsSerializer(serializers.Serializer):
 
     save_rule = serializers.BooleanField(default=True, required=False)
     save_aggregate = serializers.BooleanField(default=True, required=False)
+
+
+class DeriveAggregatesSerializer(serializers.Serializer):
+    period_start = serializers.DateField()
+    period_end = serializers.DateField()
+    organization = serializers.IntegerField(required=False)
+    project = serializers.IntegerField(required=False)
+    rules = serializers.ListField(child=serializers.IntegerField(), required=False)
+    dry_run = serializers.BooleanField(default=False, required=False)
+
+    def validate(self, attrs):
+        if attrs['period_end'] < attrs['period_start']:
+            raise serializers.ValidationError({'period_end': 'period_end must be on or after period_start.'})
+        return attrs
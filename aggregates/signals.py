@@ -0,0 +1,90 @@
+"""
+Change tracking for aggregates and incremental aggregate derivation.
+
+Every ``Aggregate`` save, including raw fixture loads, first refreshes the
+numeric ``value_total``/``value_male``/``value_female`` columns from ``value``.
+
+Saving or deleting an ``Aggregate`` bumps its scope version and refreshes its
+fact cells (see ``aggregates.changes``), including the scope it had before if a
+save moved it; the previous scope is read in ``pre_save`` only for updates that
+can change it. Raw saves (``loaddata``) are not recorded row by row; run
+``rebuild_aggregate_facts`` after a load.
+
+Saving or deleting a ``Response`` marks its (indicator, organization, project,
+date) dirty; an ``Interaction`` whose date, project or respondent changes marks
+every one of its responses dirty under both the old and the new key. Writes that
+bypass model signals (``QuerySet.update``, ``bulk_create``) are not tracked;
+run ``derive_aggregates`` for the period after such bulk changes.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from respondents.models import Interaction
+from respondents.models import Response as InteractionResponse
+
+from .changes import month_start, record_aggregate_changes
+from .derivation import mark_dirty
+from .models import Aggregate
+
+INTERACTION_KEY_FIELDS = ('respondent__organization_id', 'project_id', 'date')
+AGGREGATE_SCOPE_FIELDS = ('project', 'organization', 'indicator', 'period_start')
+
+
+@receiver(pre_save, sender=Aggregate, dispatch_uid='aggregates_refresh_value_totals')
+def refresh_aggregate_value_totals(sender, instance, **kwargs):
+    instance.refresh_value_totals()
+
+
+@receiver(pre_save, sender=Aggregate, dispatch_uid='aggregates_remember_scope')
+def remember_aggregate_scope(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_scope_key = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {name.removesuffix('_id') for name in update_fields} & set(AGGREGATE_SCOPE_FIELDS):
+        return
+    stored = Aggregate.objects.filter(pk=instance.pk).values_list(*AGGREGATE_SCOPE_FIELDS).first()
+    if stored is not None:
+        project_id, organization_id, indicator_id, period_start = stored
+        instance._stored_scope_key = (project_id, organization_id, indicator_id, month_start(period_start))
+
+
+@receiver(post_save, sender=Aggregate, dispatch_uid='aggregates_record_saved')
+def record_aggregate_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.__dict__.pop('_stored_scope_key', None)
+    record_aggregate_changes([instance], previous_keys=[previous] if previous else [])
+
+
+@receiver(post_delete, sender=Aggregate, dispatch_uid='aggregates_record_deleted')
+def record_aggregate_deleted(sender, instance, **kwargs):
+    record_aggregate_changes([instance], deleted=True)
+
+
+def _interaction_key(interaction_id):
+    return Interaction.objects.filter(pk=interaction_id).values_list(*INTERACTION_KEY_FIELDS).first()
+
+
+@receiver(post_save, sender=InteractionResponse, dispatch_uid='aggregates_mark_response_saved')
+@receiver(post_delete, sender=InteractionResponse, dispatch_uid='aggregates_mark_response_deleted')
+def mark_response_dirty(sender, instance, **kwargs):
+    key = _interaction_key(instance.interaction_id)
+    if key is not None:
+        mark_dirty([(instance.indicator_id, *key)])
+
+
+@receiver(pre_save, sender=Interaction, dispatch_uid='aggregates_remember_interaction_key')
+def remember_interaction_key(sender, instance, **kwargs):
+    instance._derivation_key = _interaction_key(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Interaction, dispatch_uid='aggregates_mark_interaction_saved')
+def mark_interaction_dirty(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_derivation_key', None)
+    if created or previous is None:
+        return
+    current = _interaction_key(instance.pk)
+    if current == previous:
+        return
+    indicator_ids = list(instance.responses.values_list('indicator_id', flat=True))
+    mark_dirty([(indicator_id, *key) for indicator_id in indicator_ids for key in (previous, current)])
@@ -1,13 +1,25 @@
+import json
 from datetime import date
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from aggregates.models import Aggregate, AggregateChangeLog
+from aggregates.derivation import mark_dirty, process_dirty_derivations
+from aggregates.models import Aggregate, AggregateChangeLog, AggregateFact, DerivationRule, DirtyDerivation
+from aggregates.views import AggregateViewSet
+from flags.models import Flag
 from indicators.models import Indicator
+from messaging.models import Notification
 from organizations.models import Organization
 from projects.models import Project
+from respondents.models import Interaction, Respondent, Response as InteractionResponse
 
 User = get_user_model()
 
@@ -87,3 +99,545 @@ class AggregateApiTests(APITestCase):
         self.assertIn('history_entries', body)
         self.assertEqual(len(body['history_entries']), 1)
         self.assertEqual(body['history_entries'][0]['changed_by_name'], self.officer.username)
+
+    def test_summary_totals_each_value_shape_per_indicator(self):
+        Aggregate.objects.create(
+            indicator=self.indicator,
+            project=self.project,
+            organization=self.organization,
+            period_start=date(2025, 4, 1),
+            period_end=date(2025, 6, 30),
+            value={'male': 3, 'female': 4},
+            created_by=self.officer,
+        )
+        Aggregate.objects.create(
+            indicator=self.indicator,
+            project=self.project,
+            organization=self.organization,
+            period_start=date(2025, 7, 1),
+            period_end=date(2025, 9, 30),
+            value=5,
+            created_by=self.officer,
+        )
+
+        response = self.client.get('/api/aggregates/summary/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    'indicator_id': self.indicator.id,
+                    'indicator_name': self.indicator.name,
+                    'total_value': 24.0,
+                    'period_count': 3,
+                    'trend': 'stable',
+                }
+            ],
+        )
+
+    def _fact_cells(self):
+        return set(
+            AggregateFact.objects.values_list(
+                'period_month', 'period_end_month', 'fiscal_year', 'fiscal_quarter', 'status', 'entry_count', 'value_total'
+            )
+        )
+
+    def test_fact_cells_follow_aggregate_writes_and_rebuild(self):
+        self.assertEqual(
+            self._fact_cells(),
+            {(date(2025, 1, 1), date(2025, 3, 1), 2024, 4, Aggregate.STATUS_PENDING, 1, 12.0)},
+        )
+        second = Aggregate.objects.create(
+            indicator=self.indicator,
+            project=self.project,
+            organization=self.organization,
+            period_start=date(2025, 1, 15),
+            period_end=date(2025, 3, 31),
+            value={'male': 1, 'female': 2},
+            created_by=self.officer,
+        )
+        self.assertEqual(
+            self._fact_cells(),
+            {(date(2025, 1, 1), date(2025, 3, 1), 2024, 4, Aggregate.STATUS_PENDING, 2, 15.0)},
+        )
+
+        second.status = Aggregate.STATUS_APPROVED
+        second.save(update_fields=['status'])
+        self.assertEqual(
+            self._fact_cells(),
+            {
+                (date(2025, 1, 1), date(2025, 3, 1), 2024, 4, Aggregate.STATUS_PENDING, 1, 12.0),
+                (date(2025, 1, 1), date(2025, 3, 1), 2024, 4, Aggregate.STATUS_APPROVED, 1, 3.0),
+            },
+        )
+
+        second = Aggregate.objects.get(pk=second.pk)
+        second.period_start = date(2025, 4, 1)
+        second.period_end = date(2025, 6, 30)
+        second.save()
+        self.assertEqual(
+            self._fact_cells(),
+            {
+                (date(2025, 1, 1), date(2025, 3, 1), 2024, 4, Aggregate.STATUS_PENDING, 1, 12.0),
+                (date(2025, 4, 1), date(2025, 6, 1), 2025, 1, Aggregate.STATUS_APPROVED, 1, 3.0),
+            },
+        )
+
+        self.aggregate.delete()
+        expected = {(date(2025, 4, 1), date(2025, 6, 1), 2025, 1, Aggregate.STATUS_APPROVED, 1, 3.0)}
+        self.assertEqual(self._fact_cells(), expected)
+
+        AggregateFact.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_aggregate_facts', stdout=out)
+        self.assertIn('1 cells', out.getvalue())
+        self.assertEqual(self._fact_cells(), expected)
+
+    def test_summary_reads_facts_unless_filters_need_aggregate_rows(self):
+        Aggregate.objects.create(
+            indicator=self.indicator,
+            project=self.project,
+            organization=self.organization,
+            period_start=date(2025, 4, 1),
+            period_end=date(2025, 6, 30),
+            value=5,
+            status=Aggregate.STATUS_APPROVED,
+            created_by=self.officer,
+        )
+        aggregate_table = connection.ops.quote_name(Aggregate._meta.db_table)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/aggregates/summary/', {'date_from': '2025-04-01', 'status': 'approved'})
+        self.assertFalse(any(aggregate_table in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['total_value'], row['period_count']) for row in response.json()], [(5.0, 1)])
+
+        for params in ({'date_from': '2025-01-02'}, {'period_end': '2025-06-30'}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/aggregates/summary/', params)
+            self.assertTrue(any(aggregate_table in query['sql'] for query in queries.captured_queries))
+            self.assertEqual([(row['total_value'], row['period_count']) for row in response.json()], [(5.0, 1)])
+
+        response = self.client.get('/api/aggregates/summary/', {'status': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_value_totals_follow_value_updates_and_backfill(self):
+        self.aggregate.value = {'male': 2, 'female': '5'}
+        self.aggregate.save(update_fields=['value'])
+        self.aggregate.refresh_from_db()
+        self.assertEqual(
+            (self.aggregate.value_total, self.aggregate.value_male, self.aggregate.value_female),
+            (7.0, 2.0, 5.0),
+        )
+
+        Aggregate.objects.filter(pk=self.aggregate.pk).update(value_total=None, value_male=None, value_female=None)
+        call_command('backfill_aggregate_totals', batch_size=1, stdout=StringIO())
+        self.aggregate.refresh_from_db()
+        self.assertEqual(self.aggregate.value_total, 7.0)
+        self.assertEqual(self.aggregate.value_female, 5.0)
+
+    def test_raw_fixture_loads_fill_value_totals(self):
+        fixture = json.loads(serializers.serialize('json', [self.aggregate]))
+        fixture[0]['pk'] = None
+        fixture[0]['fields'].update(
+            period_start='2025-04-01',
+            period_end='2025-06-30',
+            value={'male': 2, 'female': '5'},
+            value_total=None,
+            value_male=None,
+            value_female=None,
+        )
+
+        for loaded in serializers.deserialize('json', json.dumps(fixture)):
+            loaded.save()
+
+        raw = Aggregate.objects.get(period_start=date(2025, 4, 1))
+        self.assertEqual((raw.value_total, raw.value_male, raw.value_female), (7.0, 2.0, 5.0))
+
+    def test_raw_saves_leave_facts_to_the_rebuild_command(self):
+        fixture = json.loads(serializers.serialize('json', [self.aggregate]))
+        fixture[0]['pk'] = None
+        fixture[0]['fields'].update(period_start='2025-04-01', period_end='2025-06-30', value={'total': 6})
+
+        with CaptureQueriesContext(connection) as queries:
+            for loaded in serializers.deserialize('json', json.dumps(fixture)):
+                loaded.save()
+        self.assertEqual(len(queries), 1)
+        self.assertFalse(AggregateFact.objects.filter(period_month=date(2025, 4, 1)).exists())
+
+        call_command('rebuild_aggregate_facts', stdout=StringIO())
+        self.assertEqual(AggregateFact.objects.get(period_month=date(2025, 4, 1)).value_total, 6.0)
+
+    def test_reads_do_not_snapshot_and_saves_only_read_the_stored_scope_when_it_can_change(self):
+        with CaptureQueriesContext(connection) as queries:
+            aggregate = Aggregate.objects.get(pk=self.aggregate.pk)
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as notes_queries:
+            aggregate.notes = 'Checked'
+            aggregate.save(update_fields=['notes'])
+        with CaptureQueriesContext(connection) as full_queries:
+            aggregate.save()
+        self.assertEqual(len(full_queries), len(notes_queries) + 1)
+
+    def test_csv_export_streams_rows(self):
+        response = self.client.get('/api/aggregates/export/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['indicator_id', 'indicator_name', 'indicator_code'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Aggregate indicator,AGG_001', lines[1])
+        self.assertIn(',12,', lines[1])
+
+    def _bulk_create(self, items, **extra):
+        payload = {
+            'project': self.project.id,
+            'organization': self.organization.id,
+            'period_start': '2025-01-01',
+            'period_end': '2025-03-31',
+            'data': items,
+            **extra,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/aggregates/bulk_create/', payload, format='json')
+        return response, len(queries)
+
+    def test_bulk_create_uses_a_fixed_number_of_queries(self):
+        indicators = [
+            Indicator.objects.create(name=f'Bulk indicator {index}', code=f'BULK_{index:03d}')
+            for index in range(12)
+        ]
+        self.client.force_authenticate(user=self.officer)
+
+        response, few_queries = self._bulk_create(
+            [{'indicator': indicator.id, 'value': {'total': 1}} for indicator in indicators[:2]]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+
+        response, many_queries = self._bulk_create(
+            [{'indicator': indicator.id, 'value': {'male': 2, 'female': 3}} for indicator in indicators[2:]]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        body = response.json()
+        self.assertEqual(body['created'], 10)
+        self.assertEqual(body['results'][0]['indicator'], indicators[2].id)
+        self.assertEqual(body['results'][0]['history_entries'][0]['action'], AggregateChangeLog.ACTION_SUBMITTED)
+        self.assertEqual(few_queries, many_queries)
+
+        created = Aggregate.objects.get(indicator=indicators[5])
+        self.assertEqual(created.value_total, 5.0)
+        self.assertEqual(created.created_by, self.officer)
+        self.assertEqual(AggregateChangeLog.objects.filter(aggregate__indicator__in=indicators).count(), 12)
+
+    def test_bulk_create_reports_item_errors_and_upserts_on_request(self):
+        other = Indicator.objects.create(name='Other indicator', code='AGG_002')
+        items = [
+            {'indicator': other.id, 'value': {'total': 4}},
+            {'indicator': self.indicator.id, 'value': {'total': 30}, 'notes': 'Corrected'},
+            {'indicator': 999999, 'value': {'total': 1}},
+            {'indicator': other.id},
+        ]
+
+        response, _ = self._bulk_create(items)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [(error['index'], list(error['errors'])) for error in response.json()['errors']],
+            [(1, ['indicator']), (2, ['indicator']), (3, ['value'])],
+        )
+        self.assertFalse(Aggregate.objects.filter(indicator=other).exists())
+
+        response, _ = self._bulk_create(items[:2], upsert=True)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.json()['created'], response.json()['updated']), (1, 1))
+        self.aggregate.refresh_from_db()
+        self.assertEqual(self.aggregate.value_total, 30.0)
+        self.assertEqual(self.aggregate.notes, 'Corrected')
+        latest = self.aggregate.history_entries.first()
+        self.assertEqual(latest.changes['value']['to'], {'total': 30})
+        self.assertEqual(latest.comment, 'Aggregate updated and resubmitted for coordinator review.')
+
+
+    def test_bulk_upsert_of_a_flagged_aggregate_submits_corrections(self):
+        Aggregate.objects.filter(pk=self.aggregate.pk).update(status=Aggregate.STATUS_FLAGGED, reviewed_by=self.admin)
+        flag = Flag.objects.create(
+            flag_type='data_quality',
+            title='Aggregate requires correction: AGG_001',
+            description='Requires correction.',
+            content_type='aggregate',
+            object_id=self.aggregate.id,
+            organization=self.organization,
+            created_by=self.admin,
+        )
+        self.client.force_authenticate(user=self.officer)
+
+        response, _ = self._bulk_create([{'indicator': self.indicator.id, 'value': {'total': 14}}], upsert=True)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['results'][0]['history_entries'][0]['action'], AggregateChangeLog.ACTION_CORRECTED)
+        flag.refresh_from_db()
+        self.assertEqual(flag.status, 'in_progress')
+        self.assertEqual(Notification.objects.get(user=self.admin).title, 'Aggregate corrections submitted')
+
+    def test_bulk_create_conflicting_with_a_concurrent_insert_is_a_validation_error(self):
+        other = Indicator.objects.create(name='Other indicator', code='AGG_002')
+        apply_bulk_items = AggregateViewSet._apply_bulk_items
+
+        def insert_first(view, user, payload, items, existing):
+            # Another request saves the same aggregate between the lookup and the insert.
+            Aggregate.objects.create(
+                indicator=other,
+                project=self.project,
+                organization=self.organization,
+                period_start=date(2025, 1, 1),
+                period_end=date(2025, 3, 31),
+                value={'total': 1},
+            )
+            return apply_bulk_items(view, user, payload, items, existing)
+
+        with mock.patch.object(AggregateViewSet, '_apply_bulk_items', autospec=True, side_effect=insert_first):
+            response, _ = self._bulk_create([{'indicator': other.id, 'value': {'total': 4}}], upsert=True)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('saved concurrently', response.json()['error'])
+        self.assertFalse(Aggregate.objects.filter(indicator=other).exists())
+
+class AggregateIndexBenchmarkTests(APITestCase):
+    def test_benchmark_plans_use_analytics_indexes_and_roll_back(self):
+        out = StringIO()
+        call_command('benchmark_aggregate_indexes', aggregates=400, interactions=100, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        with_plans = output.split('without indexes')[0]
+        self.assertIn('agg_indicator_period_idx', with_plans)
+        self.assertIn('agg_project_org_period_idx', output)
+        self.assertIn('response_indicator_inter_idx', output)
+        self.assertFalse(Aggregate.objects.exists())
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Aggregate._meta.db_table)
+        self.assertIn('agg_open_status_org_idx', constraints)
+
+
+class AggregateDerivationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='derivation-admin',
+            email='derivation-admin@example.com',
+            password='StrongPassword123!',
+            role='admin',
+            is_staff=True,
+        )
+        cls.project = Project.objects.create(
+            name='Derivation Project',
+            code='DER-PROJ',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+        )
+        cls.organizations = [
+            Organization.objects.create(name=f'Derivation Org {index}', code=f'DER-ORG-{index}', type='ngo')
+            for index in range(2)
+        ]
+        cls.screened = Indicator.objects.create(name='Screened', code='DER_SRC_1')
+        cls.screened_yes = Indicator.objects.create(name='Screened (yes)', code='DER_OUT_1')
+        cls.screened_visits = Indicator.objects.create(name='Screening visits', code='DER_OUT_2')
+        cls.screened_no = Indicator.objects.create(name='Not screened', code='DER_OUT_3')
+        DerivationRule.objects.create(output_indicator=cls.screened_yes, source_indicator=cls.screened, match_value='yes')
+        DerivationRule.objects.create(
+            output_indicator=cls.screened_visits,
+            source_indicator=cls.screened,
+            match_value='yes',
+            count_distinct='interaction',
+        )
+        DerivationRule.objects.create(
+            output_indicator=cls.screened_no,
+            source_indicator=cls.screened,
+            operator='not_equals',
+            match_value='yes',
+        )
+        answers = {cls.organizations[0]: ['yes', 'yes', 'no'], cls.organizations[1]: ['yes']}
+        for organization, values in answers.items():
+            respondent = Respondent.objects.create(
+                unique_id=f'DER-{organization.code}',
+                first_name='Derived',
+                last_name=organization.code,
+                organization=organization,
+            )
+            for day, value in enumerate(values, start=1):
+                interaction = Interaction.objects.create(respondent=respondent, project=cls.project, date=date(2025, 4, day))
+                InteractionResponse.objects.create(interaction=interaction, indicator=cls.screened, value=value)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin)
+
+    def _derive(self, **extra):
+        payload = {'period_start': '2025-04-01', 'period_end': '2025-06-30', **extra}
+        return self.client.post('/api/aggregates/derive/', payload, format='json')
+
+    def test_derive_counts_every_rule_and_organization_in_grouped_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._derive()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['created'], 5)
+        values = {
+            (indicator_code, organization_id): value
+            for indicator_code, organization_id, value in Aggregate.objects.values_list(
+                'indicator__code', 'organization_id', 'value'
+            )
+        }
+        first, second = (organization.id for organization in self.organizations)
+        self.assertEqual(
+            values,
+            {('DER_OUT_1', first): 1, ('DER_OUT_2', first): 2, ('DER_OUT_3', first): 1, ('DER_OUT_1', second): 1, ('DER_OUT_2', second): 1},
+        )
+        # Includes the fixed three-query AggregateFact refresh for the written scopes.
+        self.assertLessEqual(len(queries), 13)
+        self.assertEqual(AggregateChangeLog.objects.count(), 5)
+
+        response = self._derive()
+        self.assertEqual((response.json()['created'], response.json()['unchanged']), (0, 5))
+
+    def test_derive_command_updates_changed_counts(self):
+        call_command('derive_aggregates', period_start='2025-04-01', period_end='2025-06-30', stdout=StringIO())
+        InteractionResponse.objects.filter(value='no').update(value='yes')
+
+        out = StringIO()
+        call_command('derive_aggregates', period_start='2025-04-01', period_end='2025-06-30', stdout=out)
+
+        self.assertIn('0 created, 2 updated, 3 unchanged', out.getvalue())
+        no_count = Aggregate.objects.get(indicator=self.screened_no)
+        self.assertEqual(no_count.value, 0)
+        self.assertEqual(no_count.value_total, 0.0)
+        self.assertEqual(Aggregate.objects.get(indicator=self.screened_visits, organization=self.organizations[0]).value, 3)
+
+    def test_derive_leaves_manual_aggregates_alone(self):
+        first, second = self.organizations
+        manual = {
+            # No matching responses: must not be zeroed.
+            (self.screened_no, second): Aggregate.objects.create(
+                indicator=self.screened_no,
+                organization=second,
+                project=self.project,
+                period_start=date(2025, 4, 1),
+                period_end=date(2025, 6, 30),
+                value=7,
+                status=Aggregate.STATUS_APPROVED,
+            ),
+            # A computed count exists: must not be overwritten either.
+            (self.screened_yes, first): Aggregate.objects.create(
+                indicator=self.screened_yes,
+                organization=first,
+                project=self.project,
+                period_start=date(2025, 4, 1),
+                period_end=date(2025, 6, 30),
+                value=5,
+                status=Aggregate.STATUS_APPROVED,
+            ),
+        }
+
+        response = self._derive()
+
+        self.assertEqual((response.json()['created'], response.json()['skipped']), (4, 1))
+        for aggregate in manual.values():
+            aggregate.refresh_from_db()
+            self.assertEqual(aggregate.status, Aggregate.STATUS_APPROVED)
+            self.assertFalse(aggregate.is_derived)
+        self.assertEqual([aggregate.value for aggregate in manual.values()], [7, 5])
+        self.assertEqual(Aggregate.objects.filter(is_derived=True).count(), 4)
+
+        process_dirty_derivations()
+        self.assertEqual(Aggregate.objects.get(pk=manual[self.screened_no, second].pk).value, 7)
+
+    def test_worker_recomputes_only_dirty_keys(self):
+        self.assertEqual(DirtyDerivation.objects.count(), 4)
+        first = self.organizations[0]
+        monthly = Aggregate.objects.create(
+            indicator=self.screened_yes,
+            organization=first,
+            project=self.project,
+            period_start=date(2025, 4, 1),
+            period_end=date(2025, 4, 30),
+            value=99,
+            is_derived=True,
+        )
+
+        out = StringIO()
+        call_command('run_derivation_worker', once=True, stdout=out)
+
+        self.assertIn('5 created, 1 updated', out.getvalue())
+        self.assertFalse(DirtyDerivation.objects.exists())
+        monthly.refresh_from_db()
+        self.assertEqual(monthly.value, 1)
+        self.assertEqual(Aggregate.objects.filter(period_end=date(2025, 4, 30)).count(), 1)
+
+        response = InteractionResponse.objects.get(value='no')
+        response.value = 'yes'
+        response.save()
+        self.assertEqual(DirtyDerivation.objects.count(), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = process_dirty_derivations()
+
+        self.assertEqual((result.keys, result.periods), (1, 2))
+        self.assertEqual((result.created, result.updated), (0, 2))
+        # Includes the fixed three-query AggregateFact refresh for the written scopes.
+        self.assertLessEqual(len(queries), 23)
+        self.assertEqual(Aggregate.objects.get(indicator=self.screened_no).value, 0)
+        self.assertEqual(
+            Aggregate.objects.get(indicator=self.screened_visits, organization=first).value,
+            3,
+        )
+        self.assertIsNone(process_dirty_derivations())
+
+    def test_worker_only_recomputes_the_dirty_organization_project_pairs(self):
+        process_dirty_derivations()
+        first, second = self.organizations
+        other_project = Project.objects.create(
+            name='Other Derivation Project',
+            code='DER-PROJ-2',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+        )
+        # Loaded without signals, so (first, other_project) is never marked dirty.
+        interaction = Interaction.objects.bulk_create([
+            Interaction(respondent=Respondent.objects.get(organization=first), project=other_project, date=date(2025, 4, 8)),
+        ])[0]
+        InteractionResponse.objects.bulk_create([
+            InteractionResponse(interaction=interaction, indicator=self.screened, value='yes'),
+        ])
+        mark_dirty([
+            (self.screened.id, first.id, self.project.id, date(2025, 4, 1)),
+            (self.screened.id, second.id, other_project.id, date(2025, 4, 2)),
+        ])
+
+        process_dirty_derivations()
+
+        self.assertFalse(Aggregate.objects.filter(organization=first, project=other_project).exists())
+
+    def test_moving_or_deleting_an_interaction_marks_old_and_new_keys(self):
+        process_dirty_derivations()
+        second = self.organizations[1]
+        interaction = Interaction.objects.get(respondent__organization=second)
+        interaction.date = date(2025, 7, 5)
+        interaction.save()
+
+        self.assertEqual(
+            set(DirtyDerivation.objects.values_list('date', flat=True)),
+            {date(2025, 4, 1), date(2025, 7, 5)},
+        )
+        process_dirty_derivations()
+        q1 = Aggregate.objects.get(indicator=self.screened_yes, organization=second, period_start=date(2025, 4, 1))
+        q2 = Aggregate.objects.get(indicator=self.screened_yes, organization=second, period_start=date(2025, 7, 1))
+        self.assertEqual((q1.value, q2.value), (0, 1))
+        self.assertEqual(q2.period_end, date(2025, 9, 30))
+
+        interaction.delete()
+        process_dirty_derivations()
+        q2.refresh_from_db()
+        self.assertEqual(q2.value, 0)
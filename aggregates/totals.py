@@ -0,0 +1,130 @@
+from django.db.models import FloatField, Func
+
+
+def _to_float(value) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_total(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        if value.get('total') is not None:
+            return float(value.get('total') or 0)
+        male = float(value.get('male') or 0)
+        female = float(value.get('female') or 0)
+        return male + female
+    return 0.0
+
+
+def extract_value_totals(value) -> tuple[float, float | None, float | None]:
+    """Return ``(total, male, female)`` for an aggregate ``value`` payload."""
+    try:
+        total = extract_total(value)
+    except (TypeError, ValueError):
+        total = 0.0
+    if not isinstance(value, dict):
+        return total, None, None
+    return total, _to_float(value.get('male')), _to_float(value.get('female'))
+
+
+NUMERIC_PATTERN = r'^\s*-?[0-9]+(\.[0-9]+)?\s*$'
+
+
+def _jsonb_number_sql(fragment: str) -> str:
+    return (
+        f"(CASE WHEN jsonb_typeof({fragment}) = 'number' THEN ({fragment} #>> '{{}}')::double precision "
+        f"WHEN jsonb_typeof({fragment}) = 'string' AND ({fragment} #>> '{{}}') ~ '{NUMERIC_PATTERN}' "
+        f"THEN ({fragment} #>> '{{}}')::double precision ELSE NULL END)"
+    )
+
+
+class JSONNumber(Func):
+    """
+    Numeric value of ``value -> key``, or NULL when it is not a number.
+
+    Only compiled for PostgreSQL (jsonb); callers check ``connection.vendor`` and use
+    ``extract_value_totals`` in Python elsewhere.
+    """
+
+    output_field = FloatField()
+    ALLOWED_KEYS = ('total', 'male', 'female')
+
+    def __init__(self, expression, key, **extra):
+        if key not in self.ALLOWED_KEYS:
+            raise ValueError(f'Unsupported JSON key: {key}')
+        self.key = key
+        super().__init__(expression, **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        value_sql, params = compiler.compile(self.source_expressions[0])
+        value_sql = f'({value_sql})'
+        sql = (
+            f"(CASE WHEN jsonb_typeof({value_sql}) = 'object' "
+            f"THEN {_jsonb_number_sql(f'({value_sql} -> {self.key!r})')} ELSE NULL END)"
+        )
+        return sql, list(params) * sql.count(value_sql)
+
+
+class JSONTotal(Func):
+    """
+    Database-side equivalent of ``extract_total`` for jsonb ``value`` columns.
+
+    Numbers are used as-is, objects resolve to ``total`` or ``male + female``,
+    and anything that is not numeric counts as zero. Like ``JSONNumber``, it is
+    only compiled for PostgreSQL.
+    """
+
+    output_field = FloatField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        value_sql, params = compiler.compile(self.source_expressions[0])
+        value_sql = f'({value_sql})'
+        total = f"({value_sql} -> 'total')"
+        male = f"({value_sql} -> 'male')"
+        female = f"({value_sql} -> 'female')"
+        sql = (
+            f"(CASE jsonb_typeof({value_sql}) "
+            f"WHEN 'number' THEN ({value_sql} #>> '{{}}')::double precision "
+            f"WHEN 'object' THEN (CASE WHEN {total} IS NOT NULL AND jsonb_typeof({total}) <> 'null' "
+            f"THEN COALESCE({_jsonb_number_sql(total)}, 0) "
+            f"ELSE COALESCE({_jsonb_number_sql(male)}, 0) + COALESCE({_jsonb_number_sql(female)}, 0) END) "
+            f"ELSE 0 END)"
+        )
+        # The value expression is repeated in the CASE branches, so repeat its params too.
+        return sql, list(params) * sql.count(value_sql)
+
+
+VALUE_TOTAL_FIELDS = ('value_total', 'value_male', 'value_female')
+
+
+def backfill_value_totals(aggregates, vendor: str, batch_size: int = 2000) -> int:
+    """
+    Fill the numeric total columns of the ``aggregates`` queryset from ``value``; returns the rows written.
+
+    Works on historical models too, so data migrations share it with
+    ``backfill_aggregate_totals``: PostgreSQL computes the columns in one UPDATE,
+    other databases use ``extract_value_totals`` and ``bulk_update`` per batch.
+    """
+    if vendor == 'postgresql':
+        return aggregates.update(
+            value_total=JSONTotal('value'),
+            value_male=JSONNumber('value', 'male'),
+            value_female=JSONNumber('value', 'female'),
+        )
+
+    aggregates = aggregates.order_by('pk')
+    updated = 0
+    last_pk = 0
+    while batch := list(aggregates.filter(pk__gt=last_pk).only('pk', 'value')[:batch_size]):
+        last_pk = batch[-1].pk
+        for aggregate in batch:
+            aggregate.value_total, aggregate.value_male, aggregate.value_female = extract_value_totals(aggregate.value)
+        aggregates.model.objects.bulk_update(batch, VALUE_TOTAL_FIELDS)
+        updated += len(batch)
+    return updated
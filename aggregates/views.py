@@ -3,32 +3,90 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework.filters import OrderingFilter
-from django.db import transaction
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
 from django.utils import timezone
-from django.http import HttpResponse
-import csv
 import json
-from io import BytesIO
 
+from .changes import record_aggregate_changes
+from .derivation import GENERATED_COMMENT, count_distinct_field, derive_aggregates, generated_notes, rule_condition
+from .facts import aggregate_facts, fact_totals
 from .models import Aggregate, AggregateChangeLog, DerivationRule
 from .serializers import (
+    AggregateBulkCreateSerializer,
+    AggregateBulkItemSerializer,
     AggregateFlagSerializer,
     AggregateListSerializer,
     AggregateSerializer,
     AggregateReviewSerializer,
+    DeriveAggregatesSerializer,
     DerivationRuleSerializer,
     GenerateFromInteractionsSerializer,
 )
+from core.exports import streaming_csv_response, xlsx_sheet_response
 from core.permissions import is_platform_admin
 from flags.models import Flag, FlagComment
 from indicators.models import Indicator
 from messaging.models import Notification
+from organizations.models import Organization
+from organizations.scope import get_user_scope
 from projects.models import Project
 from respondents.models import Response as InteractionResponse
 
 
+EXPORT_COLUMNS = (
+    'indicator_id', 'indicator_name', 'indicator_code', 'project_id', 'project_name',
+    'organization_id', 'organization_name', 'period_start', 'period_end', 'male', 'female',
+    'total', 'value_json', 'status', 'reviewed_at', 'reviewed_by', 'notes',
+)
+EXPORT_CHUNK_SIZE = 2000
+# ``filterset_fields`` that are also dimensions of the ``AggregateFact`` cube.
+SUMMARY_FACT_FILTERS = ('indicator', 'project', 'organization', 'status')
+BULK_BATCH_SIZE = 500
+
+
+def _iter_export_rows(queryset):
+    """Yield export rows in ``EXPORT_COLUMNS`` order, reading the queryset in chunks."""
+    values = queryset.values(
+        'indicator_id', 'indicator__name', 'indicator__code', 'project_id', 'project__name',
+        'organization_id', 'organization__name', 'period_start', 'period_end', 'value',
+        'status', 'reviewed_at', 'reviewed_by__username', 'notes',
+    )
+    for agg in values.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        value = agg['value']
+        male = None
+        female = None
+        total = None
+        if isinstance(value, dict):
+            male = value.get('male')
+            female = value.get('female')
+            total = value.get('total')
+        elif isinstance(value, (int, float)):
+            total = value
+
+        yield [
+            agg['indicator_id'] or '',
+            agg['indicator__name'] or '',
+            agg['indicator__code'] or '',
+            agg['project_id'] or '',
+            agg['project__name'] or '',
+            agg['organization_id'] or '',
+            agg['organization__name'] or '',
+            agg['period_start'].isoformat(),
+            agg['period_end'].isoformat(),
+            male if male is not None else '',
+            female if female is not None else '',
+            total if total is not None else '',
+            json.dumps(value, ensure_ascii=False) if value is not None else '',
+            agg['status'],
+            agg['reviewed_at'].isoformat() if agg['reviewed_at'] else '',
+            agg['reviewed_by__username'] or '',
+            agg['notes'] or '',
+        ]
+
+
 class AggregateViewSet(viewsets.ModelViewSet):
     """ViewSet for managing aggregate data."""
     
@@ -99,8 +157,8 @@ class AggregateViewSet(viewsets.ModelViewSet):
                 }
         return changes
 
-    def _record_history(self, aggregate, action, user=None, comment='', changes=None):
-        AggregateChangeLog.objects.create(
+    def _history_entry(self, aggregate, action, user=None, comment='', changes=None):
+        return AggregateChangeLog(
             aggregate=aggregate,
             action=action,
             changed_by=user if getattr(user, 'is_authenticated', False) else None,
@@ -108,6 +166,9 @@ class AggregateViewSet(viewsets.ModelViewSet):
             changes=changes or {},
         )
 
+    def _record_history(self, aggregate, action, user=None, comment='', changes=None):
+        self._history_entry(aggregate, action, user=user, comment=comment, changes=changes).save()
+
     def _notify_user(self, user, title, content, link=''):
         if not user:
             return
@@ -202,9 +263,7 @@ class AggregateViewSet(viewsets.ModelViewSet):
     def _get_manager_scope_ids(self, user):
         if not getattr(user, 'organization_id', None):
             return []
-        organization = user.organization
-        descendants = organization.get_descendants() if organization else []
-        return [organization.id, *[item.id for item in descendants if item.id != organization.id]]
+        return list(get_user_scope(user).descendant_ids)
 
     def _can_write_organization(self, user, organization_id):
         if is_platform_admin(user):
@@ -223,8 +282,18 @@ class AggregateViewSet(viewsets.ModelViewSet):
         entry = f"{label}: {detail}" if detail else label
         aggregate.notes = "\n".join(filter(None, [aggregate.notes.strip(), entry])).strip()
     
-    def get_queryset(self):
+    def _scope_queryset(self, queryset):
+        """Limit an ``Aggregate`` or ``AggregateFact`` queryset to the organizations the user may see."""
         user = self.request.user
+        if is_platform_admin(user):
+            return queryset
+        elif getattr(user, 'role', None) == 'manager' and user.organization:
+            return queryset.filter(organization_id__in=self._get_manager_scope_ids(user))
+        elif user.organization:
+            return queryset.filter(organization=user.organization)
+        return queryset.none()
+
+    def get_queryset(self):
         base_queryset = Aggregate.objects.select_related(
             'indicator',
             'project',
@@ -234,13 +303,7 @@ class AggregateViewSet(viewsets.ModelViewSet):
         )
         if self.action == 'retrieve':
             base_queryset = base_queryset.prefetch_related('history_entries__changed_by')
-        if is_platform_admin(user):
-            return base_queryset
-        elif getattr(user, 'role', None) == 'manager' and user.organization:
-            return base_queryset.filter(organization_id__in=self._get_manager_scope_ids(user))
-        elif user.organization:
-            return base_queryset.filter(organization=user.organization)
-        return base_queryset.none()
+        return self._scope_queryset(base_queryset)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -289,23 +352,27 @@ class AggregateViewSet(viewsets.ModelViewSet):
             changes=changes,
         )
         if prior_status == Aggregate.STATUS_FLAGGED:
-            active_flag = self._set_active_flag_status(
-                aggregate,
-                'in_progress',
-                resolution_notes='Corrections submitted and awaiting coordinator review.',
+            self._submit_corrections(aggregate, prior_reviewer)
+
+    def _submit_corrections(self, aggregate, prior_reviewer):
+        """Move the active flag of a corrected (previously flagged) aggregate to in progress and tell the coordinator."""
+        active_flag = self._set_active_flag_status(
+            aggregate,
+            'in_progress',
+            resolution_notes='Corrections submitted and awaiting coordinator review.',
+        )
+        coordinator = prior_reviewer or getattr(active_flag, 'created_by', None)
+        if coordinator and coordinator != self.request.user:
+            self._notify_user(
+                coordinator,
+                'Aggregate corrections submitted',
+                (
+                    f"{aggregate.created_by.username if aggregate.created_by else 'A user'} "
+                    f"updated {aggregate.indicator.code} for {aggregate.organization.name}. "
+                    'Please review the corrections.'
+                ),
+                link=f"/aggregates?reviewAggregateId={aggregate.id}",
             )
-            coordinator = prior_reviewer or getattr(active_flag, 'created_by', None)
-            if coordinator and coordinator != self.request.user:
-                self._notify_user(
-                    coordinator,
-                    'Aggregate corrections submitted',
-                    (
-                        f"{aggregate.created_by.username if aggregate.created_by else 'A user'} "
-                        f"updated {aggregate.indicator.code} for {aggregate.organization.name}. "
-                        'Please review the corrections.'
-                    ),
-                    link=f"/aggregates?reviewAggregateId={aggregate.id}",
-                )
 
     def create(self, request, *args, **kwargs):
         try:
@@ -392,17 +459,8 @@ class AggregateViewSet(viewsets.ModelViewSet):
         if project_id:
             response_qs = response_qs.filter(interaction__project_id=project_id)
 
-        if operator == 'equals':
-            response_qs = response_qs.filter(value=match_value)
-        elif operator == 'not_equals':
-            response_qs = response_qs.exclude(value=match_value)
-        elif operator == 'contains':
-            response_qs = response_qs.filter(value__contains=match_value)
-
-        if count_distinct == 'interaction':
-            computed = response_qs.values('interaction_id').distinct().count()
-        else:
-            computed = response_qs.values('interaction__respondent_id').distinct().count()
+        response_qs = response_qs.filter(rule_condition(operator, match_value))
+        computed = response_qs.values(count_distinct_field(count_distinct)).distinct().count()
 
         aggregate_data = None
         if save_aggregate:
@@ -414,7 +472,8 @@ class AggregateViewSet(viewsets.ModelViewSet):
                 period_end=period_end,
                 defaults={
                     'value': computed,
-                    'notes': f"Auto-generated from interactions on {timezone.now().date().isoformat()}",
+                    'is_derived': True,
+                    'notes': generated_notes(),
                     'status': Aggregate.STATUS_PENDING,
                     'reviewed_at': None,
                     'reviewed_by': None,
@@ -427,7 +486,7 @@ class AggregateViewSet(viewsets.ModelViewSet):
                 aggregate,
                 AggregateChangeLog.ACTION_SUBMITTED,
                 user=user,
-                comment='Aggregate generated from interactions and submitted for coordinator review.',
+                comment=GENERATED_COMMENT,
                 changes=self._build_change_set({}, self._snapshot_aggregate(aggregate)) if created else {},
             )
             aggregate_data = AggregateListSerializer(aggregate).data
@@ -446,17 +505,54 @@ class AggregateViewSet(viewsets.ModelViewSet):
             }
         )
 
-    def _extract_total(self, value):
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, dict):
-            if value.get('total') is not None:
-                return float(value.get('total') or 0)
-            male = float(value.get('male') or 0)
-            female = float(value.get('female') or 0)
-            return male + female
-        return 0.0
-    
+    @action(detail=False, methods=['post'])
+    def derive(self, request):
+        """
+        Recompute derived aggregates for every active derivation rule (or ``rules``) in a period.
+
+        Platform admins may derive across all organizations; other users only for their own.
+        """
+        serializer = DeriveAggregatesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        organization_id = payload.get('organization')
+        if not is_platform_admin(request.user):
+            organization_id = organization_id or getattr(request.user, 'organization_id', None)
+            if not organization_id or not self._can_write_organization(request.user, organization_id):
+                return Response({'detail': 'Not allowed for this organization.'}, status=status.HTTP_403_FORBIDDEN)
+
+        rules = DerivationRule.objects.filter(is_active=True)
+        if payload.get('rules'):
+            rules = rules.filter(id__in=payload['rules'])
+        result = derive_aggregates(
+            payload['period_start'],
+            payload['period_end'],
+            rules=rules,
+            organization_ids=[organization_id] if organization_id else None,
+            project_ids=[payload['project']] if payload.get('project') else None,
+            user=request.user,
+            dry_run=payload['dry_run'],
+        )
+        return Response(
+            {
+                'created': result.created,
+                'updated': result.updated,
+                'unchanged': result.unchanged,
+                'skipped': result.skipped,
+                'dry_run': payload['dry_run'],
+                'results': [
+                    {
+                        'indicator': indicator_id,
+                        'organization': row_organization_id,
+                        'project': project_id,
+                        'computed': computed,
+                    }
+                    for (indicator_id, row_organization_id, project_id), computed in sorted(result.counts.items())
+                ],
+            }
+        )
+
     @action(detail=False, methods=['get'])
     def by_indicator(self, request):
         """Get aggregates grouped by indicator."""
@@ -469,7 +565,13 @@ class AggregateViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        """Bulk create aggregates."""
+        """
+        Bulk create aggregates for one project, organization and period.
+
+        All items are validated up front and either every item is saved or none is; the
+        response lists per-item errors by index. With ``upsert`` set, items whose
+        aggregate already exists are resubmitted instead of rejected.
+        """
         project_id = request.data.get('project')
         organization_id = request.data.get('organization')
         period_start = request.data.get('period_start')
@@ -486,38 +588,165 @@ class AggregateViewSet(viewsets.ModelViewSet):
         if not self._can_write_organization(request.user, organization_id):
             return Response({'detail': 'Not allowed for this organization.'}, status=status.HTTP_403_FORBIDDEN)
 
-        created = []
+        serializer = AggregateBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        if not Project.objects.filter(pk=payload['project']).exists():
+            return Response({'project': ['Project not found.']}, status=status.HTTP_400_BAD_REQUEST)
+        if not Organization.objects.filter(pk=payload['organization']).exists():
+            return Response({'organization': ['Organization not found.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        items, errors = self._validate_bulk_items(payload)
         try:
             with transaction.atomic():
-                for item in data:
-                    serializer = AggregateSerializer(data={
-                        'indicator': item.get('indicator'),
-                        'project': project_id,
-                        'organization': organization_id,
-                        'period_start': period_start,
-                        'period_end': period_end,
-                        'value': item.get('value'),
-                        'notes': item.get('notes') or '',
-                    })
-                    serializer.is_valid(raise_exception=True)
-                    aggregate = serializer.save(
-                        created_by=request.user,
-                        status=Aggregate.STATUS_PENDING,
-                        reviewed_at=None,
-                        reviewed_by=None,
+                existing = {
+                    aggregate.indicator_id: aggregate
+                    for aggregate in Aggregate.objects.select_for_update().filter(
+                        project_id=payload['project'],
+                        organization_id=payload['organization'],
+                        period_start=payload['period_start'],
+                        period_end=payload['period_end'],
+                        indicator_id__in=[item['indicator'] for item in items.values()],
                     )
-                    self._record_history(
-                        aggregate,
-                        AggregateChangeLog.ACTION_SUBMITTED,
-                        user=request.user,
-                        comment='Aggregate submitted for coordinator review.',
-                        changes=self._build_change_set({}, self._snapshot_aggregate(aggregate)),
+                }
+                if not payload['upsert']:
+                    for index, item in items.items():
+                        if item['indicator'] in existing:
+                            errors.append({
+                                'index': index,
+                                'indicator': item['indicator'],
+                                'errors': {'indicator': ['An aggregate already exists for this indicator and period.']},
+                            })
+                if errors:
+                    return Response(
+                        {'error': 'Some items are invalid; nothing was saved.', 'errors': sorted(errors, key=lambda error: error['index'])},
+                        status=status.HTTP_400_BAD_REQUEST,
                     )
-                    created.append(serializer.data)
-        except Exception as exc:
-            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+                created, updated = self._apply_bulk_items(request.user, payload, items, existing)
+        except IntegrityError:
+            # A concurrent request created one of these aggregates after the lookup above.
+            return Response(
+                {'error': 'An aggregate for one of these indicators and this period was saved concurrently; nothing was saved.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        saved_ids = [aggregate.id for aggregate in [*created, *updated]]
+        saved = {
+            aggregate.id: aggregate
+            for aggregate in Aggregate.objects.filter(id__in=saved_ids)
+            .select_related('indicator', 'project', 'organization', 'created_by', 'reviewed_by')
+            .prefetch_related('history_entries__changed_by')
+        }
+        results = AggregateSerializer([saved[aggregate_id] for aggregate_id in saved_ids], many=True).data
+        return Response(
+            {'created': len(created), 'updated': len(updated), 'results': results},
+            status=status.HTTP_201_CREATED,
+        )
 
-        return Response({'created': len(created), 'results': created}, status=status.HTTP_201_CREATED)
+    def _validate_bulk_items(self, payload):
+        """Validate bulk items against one indicator prefetch; returns ``({index: item}, [item errors])``."""
+        items = {}
+        errors = []
+        seen_indicators = set()
+        for index, raw_item in enumerate(payload['data']):
+            item_serializer = AggregateBulkItemSerializer(data=raw_item)
+            if not item_serializer.is_valid():
+                errors.append({'index': index, 'indicator': raw_item.get('indicator'), 'errors': item_serializer.errors})
+                continue
+            item = item_serializer.validated_data
+            if item['indicator'] in seen_indicators:
+                errors.append({
+                    'index': index,
+                    'indicator': item['indicator'],
+                    'errors': {'indicator': ['Indicator is listed more than once.']},
+                })
+                continue
+            seen_indicators.add(item['indicator'])
+            items[index] = item
+
+        known_indicators = set(
+            Indicator.objects.filter(id__in=seen_indicators).values_list('id', flat=True)
+        )
+        for index, item in list(items.items()):
+            if item['indicator'] not in known_indicators:
+                errors.append({
+                    'index': index,
+                    'indicator': item['indicator'],
+                    'errors': {'indicator': [f'Invalid pk "{item["indicator"]}" - object does not exist.']},
+                })
+                del items[index]
+        return items, errors
+
+    def _apply_bulk_items(self, user, payload, items, existing):
+        """
+        Insert new aggregates and resubmit existing ones with batched writes and one change-log insert.
+
+        Runs inside the caller's transaction; corrected flagged aggregates go through
+        ``_submit_corrections`` like a single update.
+        """
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        history = []
+        corrected = []
+        for item in items.values():
+            aggregate = existing.get(item['indicator'])
+            if aggregate is None:
+                aggregate = Aggregate(
+                    indicator_id=item['indicator'],
+                    project_id=payload['project'],
+                    organization_id=payload['organization'],
+                    period_start=payload['period_start'],
+                    period_end=payload['period_end'],
+                    created_by=user,
+                )
+                before = {}
+                to_create.append(aggregate)
+            else:
+                before = self._snapshot_aggregate(aggregate)
+                to_update.append(aggregate)
+            prior_status = aggregate.status
+            if prior_status == Aggregate.STATUS_FLAGGED:
+                corrected.append((aggregate, aggregate.reviewed_by))
+            aggregate.value = item['value']
+            aggregate.notes = item.get('notes') or ''
+            aggregate.status = Aggregate.STATUS_PENDING
+            aggregate.reviewed_at = None
+            aggregate.reviewed_by = None
+            aggregate.updated_at = now
+            aggregate.refresh_value_totals()
+            if before:
+                action = (
+                    AggregateChangeLog.ACTION_CORRECTED
+                    if prior_status == Aggregate.STATUS_FLAGGED
+                    else AggregateChangeLog.ACTION_SUBMITTED
+                )
+                comment = 'Aggregate updated and resubmitted for coordinator review.'
+            else:
+                action = AggregateChangeLog.ACTION_SUBMITTED
+                comment = 'Aggregate submitted for coordinator review.'
+            history.append((aggregate, action, comment, before))
+
+        Aggregate.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        Aggregate.objects.bulk_update(
+            to_update,
+            ['value', *Aggregate.VALUE_TOTAL_FIELDS, 'notes', 'status', 'reviewed_at', 'reviewed_by', 'updated_at'],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        record_aggregate_changes([*to_create, *to_update])
+        entries = [
+            self._history_entry(
+                aggregate,
+                action,
+                user=user,
+                comment=comment,
+                changes=self._build_change_set(before, self._snapshot_aggregate(aggregate)),
+            )
+            for aggregate, action, comment, before in history
+        ]
+        AggregateChangeLog.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+        for aggregate, prior_reviewer in corrected:
+            self._submit_corrections(aggregate, prior_reviewer)
+        return to_create, to_update
 
     @action(detail=True, methods=['post'])
     def review(self, request, pk=None):
@@ -687,37 +916,56 @@ class AggregateViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get aggregate summary by indicator."""
-        queryset = self.filter_queryset(self.get_queryset())
+        """
+        Get aggregate summary by indicator.
+
+        Read from the ``AggregateFact`` cube unless a filter it does not hold is used
+        (an exact period or reviewer, or dates that are not on a month boundary).
+        """
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
-        if date_from:
-            queryset = queryset.filter(period_start__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(period_end__lte=date_to)
-        totals = {}
-        counts = {}
-        for agg in queryset:
-            totals[agg.indicator_id] = totals.get(agg.indicator_id, 0.0) + self._extract_total(agg.value)
-            counts[agg.indicator_id] = counts.get(agg.indicator_id, 0) + 1
-
-        indicators = Indicator.objects.filter(id__in=totals.keys())
-        results = []
-        for indicator in indicators:
-            results.append({
-                'indicator_id': indicator.id,
-                'indicator_name': indicator.name,
-                'total_value': totals.get(indicator.id, 0.0),
-                'period_count': counts.get(indicator.id, 0),
+        filterset = DjangoFilterBackend().get_filterset(request, self.get_queryset(), self)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        filters = {
+            name: value for name, value in filterset.form.cleaned_data.items() if value not in (None, '')
+        }
+        facts = None
+        if set(filters) <= set(SUMMARY_FACT_FILTERS):
+            facts = aggregate_facts(date_from, date_to, **filters)
+        if facts is not None:
+            rows = (
+                fact_totals(self._scope_queryset(facts), 'indicator_id', 'indicator__name', 'indicator__category')
+                .annotate(total_value=F('total'), period_count=F('entries'))
+            )
+        else:
+            queryset = filterset.qs
+            if date_from:
+                queryset = queryset.filter(period_start__gte=date_from)
+            if date_to:
+                queryset = queryset.filter(period_end__lte=date_to)
+            rows = (
+                queryset.order_by()
+                .values('indicator_id', 'indicator__name', 'indicator__category')
+                .annotate(total_value=Sum('value_total'), period_count=Count('id'))
+            )
+        results = [
+            {
+                'indicator_id': row['indicator_id'],
+                'indicator_name': row['indicator__name'],
+                'total_value': float(row['total_value'] or 0),
+                'period_count': row['period_count'],
                 'trend': 'stable',
-            })
+            }
+            for row in rows.order_by('indicator__category', 'indicator__name')
+        ]
         return Response(results)
 
     @action(detail=False, methods=['get'])
     def export(self, request):
         """Export aggregates to CSV or Excel."""
         fmt = request.query_params.get('format', 'csv')
-        queryset = self.filter_queryset(self.get_queryset()).select_related('indicator', 'project', 'organization')
+        queryset = self.filter_queryset(self.get_queryset())
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         if date_from:
@@ -725,70 +973,15 @@ class AggregateViewSet(viewsets.ModelViewSet):
         if date_to:
             queryset = queryset.filter(period_end__lte=date_to)
 
-        rows = []
-        for agg in queryset:
-            value = agg.value
-            male = None
-            female = None
-            total = None
-            if isinstance(value, dict):
-                male = value.get('male')
-                female = value.get('female')
-                total = value.get('total')
-            elif isinstance(value, (int, float)):
-                total = value
-
-            rows.append({
-                'indicator_id': agg.indicator_id or '',
-                'indicator_name': agg.indicator.name if agg.indicator_id else '',
-                'indicator_code': agg.indicator.code if agg.indicator_id else '',
-                'project_id': agg.project_id or '',
-                'project_name': agg.project.name if agg.project_id else '',
-                'organization_id': agg.organization_id or '',
-                'organization_name': agg.organization.name if agg.organization_id else '',
-                'period_start': agg.period_start.isoformat(),
-                'period_end': agg.period_end.isoformat(),
-                'male': male if male is not None else '',
-                'female': female if female is not None else '',
-                'total': total if total is not None else '',
-                'value_json': json.dumps(value, ensure_ascii=False) if value is not None else '',
-                'status': agg.status,
-                'reviewed_at': agg.reviewed_at.isoformat() if agg.reviewed_at else '',
-                'reviewed_by': agg.reviewed_by.username if agg.reviewed_by_id else '',
-                'notes': agg.notes or '',
-            })
+        rows = _iter_export_rows(queryset)
 
         if fmt == 'excel':
             try:
-                import openpyxl
-            except Exception as exc:
+                return xlsx_sheet_response('aggregates.xlsx', 'aggregates', EXPORT_COLUMNS, rows)
+            except ImportError as exc:
                 return Response({'error': f'Excel export not available: {exc}'}, status=500)
 
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = 'aggregates'
-            if rows:
-                ws.append(list(rows[0].keys()))
-                for row in rows:
-                    ws.append(list(row.values()))
-            output = BytesIO()
-            wb.save(output)
-            output.seek(0)
-            response = HttpResponse(
-                output.read(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            )
-            response['Content-Disposition'] = 'attachment; filename="aggregates.xlsx"'
-            return response
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="aggregates.csv"'
-        writer = csv.writer(response)
-        if rows:
-            writer.writerow(rows[0].keys())
-            for row in rows:
-                writer.writerow(row.values())
-        return response
+        return streaming_csv_response('aggregates.csv', EXPORT_COLUMNS, rows)
 
 
 class DerivationRuleViewSet(viewsets.ModelViewSet):
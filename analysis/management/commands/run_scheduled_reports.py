@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from analysis.scheduled_reports import claim_due_runs, execute_run, fail_abandoned_runs
+
+
+def _init_worker():
+    # Needed when processes are spawned rather than forked; a no-op once apps are loaded.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Generate due scheduled reports in a bounded pool of worker processes and store their output files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run every due schedule, then exit instead of polling")
+        parser.add_argument("--poll-interval", type=float, default=60.0, help="Seconds to wait when nothing is due")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Worker processes generating reports in parallel (1 = generate in this process)",
+        )
+        parser.add_argument("--batch-size", type=int, default=0, help="Schedules claimed per poll (default: 2 x workers)")
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=3600.0,
+            help="Seconds after which a run still marked running is considered abandoned and failed",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = options["batch_size"] or workers * 2
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                fail_abandoned_runs(options["stale_after"])
+                runs = claim_due_runs(limit=batch_size)
+                if not runs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                if pool is None:
+                    results = (execute_run(run.pk) for run in runs)
+                else:
+                    # Forked workers must not inherit this process's open database connections.
+                    connections.close_all()
+                    results = (future.result() for future in as_completed([pool.submit(execute_run, run.pk) for run in runs]))
+                for result in results:
+                    self._report(result)
+                    processed += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Scheduled report worker stopped after {processed} run(s)."))
+
+    def _report(self, result):
+        message = (
+            f"Scheduled report {result['schedule_id']} run {result['run_id']}: {result['status']}, "
+            f"{result['row_count'] or 0} row(s) in {result['duration_seconds']:.2f}s"
+        )
+        if result["error"]:
+            self.stdout.write(self.style.ERROR(f"{message} ({result['error']})"))
+        else:
+            self.stdout.write(message)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0003_coordinatortarget_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='data_watermark',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='dependency_scope',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
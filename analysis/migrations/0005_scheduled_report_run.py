@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0004_report_dependencies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledReportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('scheduled_for', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('row_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_file', models.FileField(blank=True, upload_to='scheduled_reports/%Y/%m/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scheduledreport',
+            index=models.Index(fields=['is_active', 'next_run'], name='analysis_sc_is_acti_6dd576_idx'),
+        ),
+        migrations.AddField(
+            model_name='scheduledreportrun',
+            name='schedule',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='analysis.scheduledreport'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:55
+
+import json
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CHUNK_ROWS = 500
+
+
+def _cached_rows(cached_data):
+    """(columns, rows) for the list of row dicts stored in Report.cached_data."""
+    if isinstance(cached_data, list) and cached_data and isinstance(cached_data[0], dict):
+        headers = list(cached_data[0].keys())
+        return headers, [[row.get(key) for key in headers] for row in cached_data]
+    return [], []
+
+
+def move_cached_data(apps, schema_editor):
+    Report = apps.get_model('analysis', 'Report')
+    ReportResultChunk = apps.get_model('analysis', 'ReportResultChunk')
+    for report in Report.objects.iterator():
+        headers, rows = _cached_rows(report.cached_data)
+        if not headers:
+            continue
+        ReportResultChunk.objects.bulk_create(
+            [
+                ReportResultChunk(
+                    report=report,
+                    position=position,
+                    row_start=row_start,
+                    row_count=len(rows[row_start:row_start + CHUNK_ROWS]),
+                    data=zlib.compress(json.dumps(rows[row_start:row_start + CHUNK_ROWS], default=str).encode('utf-8')),
+                )
+                for position, row_start in enumerate(range(0, len(rows), CHUNK_ROWS))
+            ]
+        )
+        report.result_columns = headers
+        report.result_row_count = len(rows)
+        report.save(update_fields=['result_columns', 'result_row_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0005_scheduled_report_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='result_columns',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='result_row_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ReportResultChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('row_start', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_chunks', to='analysis.report')),
+            ],
+            options={
+                'ordering': ['report', 'position'],
+                'unique_together': {('report', 'position')},
+            },
+        ),
+        migrations.RunPython(move_cached_data, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='report',
+            name='cached_data',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0006_report_result_chunks'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='scheduledreport',
+            new_name='sched_report_due_idx',
+            old_name='analysis_sc_is_acti_6dd576_idx',
+        ),
+    ]
@@ -18,9 +18,13 @@ class Report(models.Model):
     # Query/filter parameters
     parameters = models.JSONField(default=dict)
     
-    # Cached data
-    cached_data = models.JSONField(default=dict, blank=True)
+    # Generated results: column names here, rows in ReportResultChunk.
+    result_columns = models.JSONField(default=list, blank=True)
+    result_row_count = models.PositiveIntegerField(default=0)
     last_generated = models.DateTimeField(null=True, blank=True)
+    # Aggregate filters the results were computed from, and the scope versions seen at the time.
+    dependency_scope = models.JSONField(default=dict, blank=True)
+    data_watermark = models.CharField(max_length=64, blank=True)
     
     organization = models.ForeignKey(
         'organizations.Organization',
@@ -48,6 +52,33 @@ class Report(models.Model):
         return self.name
 
 
+class ReportResultChunk(models.Model):
+    """
+    A slice of a report's generated rows.
+
+    ``data`` is zlib-compressed JSON: a list of rows, each a list of values in
+    ``Report.result_columns`` order. Pages are served by decoding only the chunks
+    they overlap.
+    """
+
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name='result_chunks'
+    )
+    position = models.PositiveIntegerField()
+    row_start = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['report', 'position']
+        unique_together = ['report', 'position']
+
+    def __str__(self):
+        return f"{self.report_id} rows {self.row_start}-{self.row_start + self.row_count - 1}"
+
+
 class SavedQuery(models.Model):
     """Saved queries for quick access."""
     
@@ -101,11 +132,47 @@ class ScheduledReport(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['is_active', 'next_run'], name='sched_report_due_idx')]
 
     def __str__(self):
         return self.report_name
 
 
+class ScheduledReportRun(models.Model):
+    """One execution of a scheduled report by ``run_scheduled_reports``."""
+
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    schedule = models.ForeignKey(
+        ScheduledReport,
+        on_delete=models.CASCADE,
+        related_name='runs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    scheduled_for = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    row_count = models.PositiveIntegerField(null=True, blank=True)
+    output_file = models.FileField(upload_to='scheduled_reports/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.schedule_id} @ {self.scheduled_for} ({self.status})"
+
+
 class CoordinatorTarget(models.Model):
     """Quarterly coordinator portfolio targets per project and indicator."""
 
@@ -0,0 +1,359 @@
+"""
+Report generation for ``Report``.
+
+Indicator and project reports are one grouped query each over the
+``AggregateFact`` cube (over ``Aggregate`` when the report's dates are not
+month-aligned); custom reports are one row per aggregate. ``build_report_data``
+returns every report type as a table: column names and rows of values.
+
+Generated rows are stored outside the ``Report`` row, as zlib-compressed
+``ReportResultChunk``s of ``RESULT_CHUNK_ROWS`` rows; ``load_report_rows``
+decodes only the chunks a page overlaps and ``iter_report_values`` streams
+them one chunk at a time for downloads.
+
+Each generated report stores the scope it read and a watermark over the
+``AggregateScopeVersion`` counters of that scope; ``refresh_report`` serves the
+stored result until an aggregate inside the scope is written.
+"""
+import csv
+import json
+import zlib
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from aggregates.changes import month_start
+from aggregates.facts import aggregate_facts, fact_totals
+from aggregates.models import Aggregate, AggregateFact, AggregateScopeVersion
+from core.exports import write_only_workbook
+
+from .models import ReportResultChunk
+
+RESULT_CHUNK_ROWS = 500
+CUSTOM_COLUMNS = [
+    'indicator_id',
+    'indicator_code',
+    'indicator_name',
+    'project_id',
+    'project_name',
+    'organization_id',
+    'organization_name',
+    'period_start',
+    'period_end',
+    'value',
+]
+
+
+def report_scope(report_type: str, parameters: dict, user) -> dict:
+    """
+    The aggregate filters a report reads, resolved for ``user``.
+
+    The scope is stored on the report so that it can be checked for changes and
+    regenerated later without the requesting user.
+    """
+    params = parameters or {}
+    scope = {
+        'report_type': report_type,
+        'project_id': params.get('project_id') or params.get('project'),
+        'organization_id': params.get('organization_id') or params.get('organization'),
+        'indicator_ids': params.get('indicator_ids') or params.get('indicators') or [],
+        'date_from': params.get('date_from'),
+        'date_to': params.get('date_to'),
+        'visible_organization_id': None,
+        'empty': False,
+    }
+    if user.role != 'admin':
+        if user.organization_id:
+            scope['visible_organization_id'] = user.organization_id
+        else:
+            scope['empty'] = True
+    return scope
+
+
+def report_aggregates(scope: dict):
+    """Aggregates selected by a report scope."""
+    if scope.get('empty'):
+        return Aggregate.objects.none()
+    aggregates = Aggregate.objects.all()
+    if scope.get('project_id'):
+        aggregates = aggregates.filter(project_id=scope['project_id'])
+    if scope.get('organization_id'):
+        aggregates = aggregates.filter(organization_id=scope['organization_id'])
+    if scope.get('indicator_ids'):
+        aggregates = aggregates.filter(indicator_id__in=scope['indicator_ids'])
+    if scope.get('date_from'):
+        aggregates = aggregates.filter(period_start__gte=scope['date_from'])
+    if scope.get('date_to'):
+        aggregates = aggregates.filter(period_end__lte=scope['date_to'])
+    if scope.get('visible_organization_id'):
+        aggregates = aggregates.filter(organization_id=scope['visible_organization_id'])
+    return aggregates
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def scope_watermark(scope: dict) -> str:
+    """
+    Fingerprint of the ``AggregateScopeVersion`` counters a report scope can read.
+
+    Versions only grow and a new scope starts at 1, so the count and sum change
+    whenever any aggregate the report depends on is written. Filters are applied
+    at month granularity, so the set checked is a superset of what the report reads.
+    """
+    if scope.get('empty'):
+        return 'empty'
+    versions = AggregateScopeVersion.objects.all()
+    if scope.get('project_id'):
+        versions = versions.filter(project_id=scope['project_id'])
+    for organization_key in ('organization_id', 'visible_organization_id'):
+        if scope.get(organization_key):
+            versions = versions.filter(organization_id=scope[organization_key])
+    if scope.get('indicator_ids'):
+        versions = versions.filter(indicator_id__in=scope['indicator_ids'])
+    date_from = _parse_date(scope['date_from']) if scope.get('date_from') else None
+    if date_from:
+        versions = versions.filter(period_month__gte=month_start(date_from))
+    date_to = _parse_date(scope['date_to']) if scope.get('date_to') else None
+    if date_to:
+        versions = versions.filter(period_month__lte=date_to)
+    stats = versions.aggregate(scopes=Count('id'), total=Sum('version'))
+    return f"{stats['scopes']}:{stats['total'] or 0}"
+
+
+def report_facts(scope: dict):
+    """``AggregateFact`` cells selected by a report scope, or ``None`` if its dates are not month-aligned."""
+    if scope.get('empty'):
+        return AggregateFact.objects.none()
+    filters = {}
+    if scope.get('project_id'):
+        filters['project_id'] = scope['project_id']
+    if scope.get('organization_id'):
+        filters['organization_id'] = scope['organization_id']
+    if scope.get('indicator_ids'):
+        filters['indicator_id__in'] = scope['indicator_ids']
+    if scope.get('visible_organization_id'):
+        filters['organization'] = scope['visible_organization_id']
+    return aggregate_facts(scope.get('date_from'), scope.get('date_to'), **filters)
+
+
+def _grouped_totals(scope: dict, fields: dict, order_field: str) -> tuple[list[str], list[list]]:
+    facts = report_facts(scope)
+    if facts is not None:
+        rows = fact_totals(facts, *fields).annotate(
+            total_value=Coalesce(Sum('value_total'), Value(0.0), output_field=FloatField()),
+        )
+    else:
+        rows = (
+            report_aggregates(scope)
+            .order_by()
+            .values(*fields)
+            .annotate(
+                total_value=Coalesce(Sum('value_total'), Value(0.0), output_field=FloatField()),
+                entries=Count('id'),
+            )
+        )
+    return [*fields.values(), 'total_value', 'entries'], [
+        [*(row[field] for field in fields), row['total_value'], row['entries']]
+        for row in rows.order_by('-total_value', order_field)
+    ]
+
+
+def _aggregate_rows(aggregates):
+    """One row of ``CUSTOM_COLUMNS`` values per aggregate, names joined in the same query."""
+    for *keys, period_start, period_end, value_total in aggregates.values_list(
+        'indicator_id',
+        'indicator__code',
+        'indicator__name',
+        'project_id',
+        'project__name',
+        'organization_id',
+        'organization__name',
+        'period_start',
+        'period_end',
+        'value_total',
+    ).iterator(chunk_size=RESULT_CHUNK_ROWS):
+        yield [*keys, period_start.isoformat(), period_end.isoformat(), value_total or 0.0]
+
+
+def build_report_data(scope: dict) -> tuple[list[str], object]:
+    """Compute a report for a scope as ``(columns, rows)``, each row a list of values in column order."""
+    report_type = scope.get('report_type')
+    if report_type == 'indicator':
+        return _grouped_totals(
+            scope,
+            {'indicator_id': 'indicator_id', 'indicator__code': 'indicator_code', 'indicator__name': 'indicator_name'},
+            'indicator_id',
+        )
+    if report_type == 'project':
+        return _grouped_totals(
+            scope,
+            {'project_id': 'project_id', 'project__name': 'project_name'},
+            'project_id',
+        )
+    # Default "custom" report is a raw aggregate export based on parameters.
+    return list(CUSTOM_COLUMNS), _aggregate_rows(report_aggregates(scope))
+
+
+def refresh_report(report, scope: dict | None = None, force: bool = False) -> bool:
+    """
+    Regenerate ``report``'s stored rows for ``scope`` (default: the stored one) if anything it reads changed.
+
+    Returns whether the report was regenerated. The watermark is taken before the
+    data is read, so a write that lands during generation makes the next check stale.
+    """
+    if scope is None:
+        scope = report.dependency_scope
+    watermark = scope_watermark(scope)
+    if (
+        not force
+        and report.last_generated
+        and scope == report.dependency_scope
+        and watermark == report.data_watermark
+    ):
+        return False
+    table = build_report_data(scope)
+    with transaction.atomic():
+        store_report_results(report, table)
+        report.dependency_scope = scope
+        report.data_watermark = watermark
+        report.last_generated = timezone.now()
+        report.save(
+            update_fields=[
+                'result_columns',
+                'result_row_count',
+                'dependency_scope',
+                'data_watermark',
+                'last_generated',
+                'updated_at',
+            ]
+        )
+    return True
+
+
+def refresh_stale_report(report) -> bool:
+    """Lazily regenerate a previously generated report when its dependencies changed."""
+    if not report.last_generated or not report.dependency_scope:
+        return False
+    return refresh_report(report)
+
+
+def report_rows(table) -> list[dict]:
+    """Row dicts for a ``build_report_data`` table."""
+    columns, rows = table
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _encode_chunk(rows: list) -> bytes:
+    return zlib.compress(json.dumps(rows, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def _decode_chunk(data) -> list:
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def store_report_results(report, table) -> None:
+    """Replace the stored rows of ``report`` with a ``build_report_data`` table; the caller saves ``result_columns``/``result_row_count``."""
+    headers, values = table
+    values = iter(values)
+    chunks = []
+    row_count = 0
+    while batch := [list(row) for row in islice(values, RESULT_CHUNK_ROWS)]:
+        chunks.append(
+            ReportResultChunk(
+                report=report,
+                position=len(chunks),
+                row_start=row_count,
+                row_count=len(batch),
+                data=_encode_chunk(batch),
+            )
+        )
+        row_count += len(batch)
+    ReportResultChunk.objects.filter(report=report).delete()
+    ReportResultChunk.objects.bulk_create(chunks, batch_size=50)
+    report.result_columns = headers
+    report.result_row_count = row_count
+
+
+def load_report_rows(report, offset: int = 0, limit: int | None = None) -> list[dict]:
+    """Stored rows ``offset:offset + limit`` of ``report`` as dicts, decoding only the chunks they fall in."""
+    stop = report.result_row_count if limit is None else min(offset + limit, report.result_row_count)
+    if offset >= stop:
+        return []
+    chunks = (
+        ReportResultChunk.objects.filter(report=report)
+        .alias(row_end=F('row_start') + F('row_count'))
+        .filter(row_start__lt=stop, row_end__gt=offset)
+        .order_by('position')
+        .values_list('row_start', 'data')
+    )
+    headers = report.result_columns
+    rows = []
+    for row_start, data in chunks:
+        values = _decode_chunk(data)
+        rows.extend(dict(zip(headers, row)) for row in values[max(offset - row_start, 0):stop - row_start])
+    return rows
+
+
+def iter_report_values(report):
+    """Yield every stored row of ``report`` as a list of values, holding one decoded chunk at a time."""
+    chunks = ReportResultChunk.objects.filter(report=report).order_by('position').values_list('data', flat=True)
+    for data in chunks.iterator(chunk_size=10):
+        yield from _decode_chunk(data)
+
+
+class ReportResultRows:
+    """Read-only sequence over a report's stored rows, so Django/DRF paginators can slice it."""
+
+    def __init__(self, report):
+        self.report = report
+
+    def __len__(self):
+        return self.report.result_row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _step = index.indices(len(self))
+            return load_report_rows(self.report, start, max(stop - start, 0))
+        rows = load_report_rows(self.report, index, 1)
+        if not rows:
+            raise IndexError(index)
+        return rows[0]
+
+
+def write_report_csv(rows: list[dict], handle) -> None:
+    writer = csv.writer(handle)
+    if not rows:
+        writer.writerow(['No data'])
+        return
+    headers = list(rows[0].keys())
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([row.get(key) for key in headers])
+
+
+def report_sheet_values(values) -> list:
+    """Spreadsheet cells only hold scalars, so dicts and lists are written as JSON."""
+    return [json.dumps(value) if isinstance(value, (dict, list)) else value for value in values]
+
+
+def report_workbook(rows: list[dict]):
+    """Write-only workbook with a single "Report" sheet. Raises ImportError when openpyxl is missing."""
+    workbook = write_only_workbook()
+    sheet = workbook.create_sheet(title='Report')
+    if not rows:
+        sheet.append(['No data'])
+        return workbook
+    headers = list(rows[0].keys())
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(report_sheet_values(row.get(key) for key in headers))
+    return workbook
@@ -0,0 +1,146 @@
+"""
+Execution of ``ScheduledReport`` definitions.
+
+``claim_due_runs`` locks the due schedules (``SELECT ... FOR UPDATE SKIP LOCKED``
+where the database supports it), records a ``ScheduledReportRun`` for each and
+advances ``next_run`` in the same transaction, so concurrent workers never take
+the same occurrence. ``execute_run`` builds the report with the regular report
+generation code and saves the output file to the default storage; it only takes
+a run id, so ``run_scheduled_reports`` can hand it to worker processes.
+"""
+import calendar
+import io
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.exports import save_workbook_to_tempfile
+
+from .models import ScheduledReport, ScheduledReportRun
+from .reporting import build_report_data, report_rows, report_scope, report_workbook, write_report_csv
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_DAYS = {'daily': 1, 'weekly': 7}
+FREQUENCY_MONTHS = {'monthly': 1, 'quarterly': 3}
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Same day and time ``months`` later, clamped to the last day of shorter months."""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def advance_run(run_at: datetime, frequency: str) -> datetime:
+    """
+    The occurrence after ``run_at``.
+
+    Steps are taken in local wall-clock time, so a daily 06:00 schedule stays at 06:00
+    across DST changes and a monthly one lands on the same day of the next month.
+    """
+    local = timezone.localtime(run_at)
+    naive = local.replace(tzinfo=None)
+    if frequency in FREQUENCY_MONTHS:
+        naive = add_months(naive, FREQUENCY_MONTHS[frequency])
+    else:
+        naive += timedelta(days=FREQUENCY_DAYS.get(frequency, 7))
+    return timezone.make_aware(naive, local.tzinfo)
+
+
+def next_run_after(run_at: datetime, frequency: str, now: datetime | None = None) -> datetime:
+    """First occurrence after ``now``; occurrences missed while no worker was running are skipped."""
+    now = now or timezone.now()
+    next_run = advance_run(run_at, frequency)
+    while next_run <= now:
+        next_run = advance_run(next_run, frequency)
+    return next_run
+
+
+def claim_due_runs(limit: int = 10, now: datetime | None = None) -> list[ScheduledReportRun]:
+    """Create a run for up to ``limit`` due schedules and move each schedule to its next occurrence."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        schedules = list(
+            ScheduledReport.objects.select_for_update(skip_locked=True)
+            .filter(is_active=True, next_run__lte=now)
+            .order_by('next_run', 'id')[:limit]
+        )
+        runs = []
+        for schedule in schedules:
+            runs.append(ScheduledReportRun(schedule=schedule, scheduled_for=schedule.next_run))
+            schedule.next_run = next_run_after(schedule.next_run, schedule.frequency, now)
+            schedule.updated_at = now
+        ScheduledReport.objects.bulk_update(schedules, ['next_run', 'updated_at'])
+        return ScheduledReportRun.objects.bulk_create(runs)
+
+
+def fail_abandoned_runs(stale_after: float) -> int:
+    """Mark runs still ``running`` after ``stale_after`` seconds (their worker died) as failed."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return ScheduledReportRun.objects.filter(
+        status=ScheduledReportRun.STATUS_RUNNING,
+        created_at__lt=cutoff,
+    ).update(
+        status=ScheduledReportRun.STATUS_FAILED,
+        finished_at=timezone.now(),
+        error='The worker stopped before the run finished.',
+    )
+
+
+def _render_output(schedule: ScheduledReport, rows: list[dict], scheduled_for: datetime):
+    base_name = f"{slugify(schedule.report_name) or f'schedule-{schedule.id}'}-{scheduled_for:%Y%m%d-%H%M}"
+    export_format = str((schedule.parameters or {}).get('format') or 'csv').lower()
+    if export_format in ('excel', 'xlsx'):
+        try:
+            workbook = report_workbook(rows)
+        except ImportError:
+            pass
+        else:
+            return f'{base_name}.xlsx', File(save_workbook_to_tempfile(workbook))
+    buffer = io.StringIO()
+    write_report_csv(rows, buffer)
+    return f'{base_name}.csv', ContentFile(buffer.getvalue().encode('utf-8'))
+
+
+def execute_run(run_id: int) -> dict:
+    """Generate one claimed run, store its output file and record duration and row count."""
+    run = ScheduledReportRun.objects.select_related('schedule__created_by').get(pk=run_id)
+    schedule = run.schedule
+    run.started_at = timezone.now()
+    started = time.perf_counter()
+    try:
+        if schedule.created_by is None:
+            raise ValueError('The scheduled report has no owner, so its data scope cannot be resolved.')
+        scope = report_scope(schedule.report_type, schedule.parameters, schedule.created_by)
+        rows = report_rows(build_report_data(scope))
+        name, content = _render_output(schedule, rows, run.scheduled_for)
+        try:
+            run.output_file.save(name, content, save=False)
+        finally:
+            content.close()
+        run.row_count = len(rows)
+        run.status = ScheduledReportRun.STATUS_SUCCEEDED
+    except Exception as exc:
+        logger.exception("Scheduled report %s (run %s) failed", schedule.pk, run.pk)
+        run.status = ScheduledReportRun.STATUS_FAILED
+        run.error = str(exc) or exc.__class__.__name__
+    run.finished_at = timezone.now()
+    run.duration_seconds = time.perf_counter() - started
+    run.save()
+    if run.status == ScheduledReportRun.STATUS_SUCCEEDED:
+        ScheduledReport.objects.filter(pk=schedule.pk).update(last_run=run.started_at)
+    return {
+        'run_id': run.pk,
+        'schedule_id': schedule.pk,
+        'status': run.status,
+        'row_count': run.row_count,
+        'duration_seconds': run.duration_seconds,
+        'error': run.error,
+    }
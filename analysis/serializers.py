@@ -17,10 +17,12 @@ class ReportSerializer(serializers.ModelSerializer):
         model = Report
         fields = [
             'id', 'name', 'description', 'report_type', 'parameters',
-            'cached_data', 'last_generated', 'organization', 'organization_name',
+            'result_columns', 'result_row_count', 'last_generated', 'organization', 'organization_name',
             'is_public', 'created_at', 'updated_at', 'created_by', 'created_by_name'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'created_by', 'last_generated']
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'created_by', 'last_generated', 'result_columns', 'result_row_count'
+        ]
 
 
 class SavedQuerySerializer(serializers.ModelSerializer):
@@ -163,7 +165,7 @@ class DashboardPreferencesSerializer(serializers.Serializer):
         if user and not (user.is_superuser or user.is_staff or user.role == 'admin'):
             if user.organization_id:
                 queryset = queryset.filter(
-                    models.Q(organizations__isnull=True) | models.Q(organizations=user.organization)
+                    models.Q(organizations__isnull=True) | models.Q(organizations__id=user.organization_id)
                 ).distinct()
             else:
                 queryset = Indicator.objects.filter(is_active=True, organizations__isnull=True).distinct()
@@ -1,10 +1,27 @@
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from analysis.models import Report
+from aggregates.models import Aggregate, AggregateFact
+from analysis.models import CoordinatorTarget, Report, ReportResultChunk, ScheduledReport, ScheduledReportRun
+from analysis.reporting import load_report_rows, store_report_results
+from analysis.scheduled_reports import advance_run, next_run_after
 from indicators.models import Indicator
-from organizations.models import Organization
+from organizations.models import Organization, OrganizationClosure
+from projects.models import Project
 
 User = get_user_model()
 
@@ -113,3 +130,402 @@ class DashboardPreferencesApiTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('selected_indicator_ids', response.json())
+
+
+class IndicatorTrendsApiTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Trends Org', code='TRD-ORG', type='ngo')
+        cls.admin = User.objects.create_user(
+            username='trends-admin',
+            email='trends-admin@example.com',
+            password='StrongPassword123!',
+            role='admin',
+            is_staff=True,
+        )
+        cls.project = Project.objects.create(
+            name='Trends Project',
+            code='TRD-PROJ',
+            status='active',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+            created_by=cls.admin,
+        )
+        cls.tested = Indicator.objects.create(name='Tested', code='TRD_TST', category='hiv_prevention', is_active=True)
+        cls.positive = Indicator.objects.create(name='Positive', code='TRD_POS', category='hiv_prevention', is_active=True)
+        for indicator, period_start, period_end, value in [
+            (cls.tested, date(2025, 1, 1), date(2025, 1, 15), {'total': 10}),
+            (cls.tested, date(2025, 1, 16), date(2025, 1, 31), {'male': 2, 'female': 3}),
+            (cls.tested, date(2025, 3, 1), date(2025, 3, 31), 4),
+            (cls.positive, date(2025, 2, 1), date(2025, 2, 28), {'total': 1}),
+            (cls.positive, date(2025, 5, 1), date(2025, 5, 31), {'total': 99}),
+        ]:
+            Aggregate.objects.create(
+                indicator=indicator,
+                project=cls.project,
+                organization=cls.organization,
+                period_start=period_start,
+                period_end=period_end,
+                value=value,
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_trends_bucket_totals_by_indicator_and_month(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/api/analysis/trends/',
+                {
+                    'indicator_ids': f'{self.tested.id},{self.positive.id}',
+                    'date_from': '2025-01-01',
+                    'date_to': '2025-03-31',
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = {entry['indicator_id']: entry for entry in response.json()['series']}
+        self.assertEqual([point['value'] for point in series[self.tested.id]['data']], [15.0, 0.0, 4.0])
+        self.assertEqual([point['value'] for point in series[self.positive.id]['data']], [0.0, 1.0, 0.0])
+        self.assertEqual(series[self.tested.id]['data'][0]['month'], 'Jan 2025')
+
+    def _results(self, report, **params):
+        response = self.client.get(f'/api/analysis/reports/{report.id}/results/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_report_download_serves_write_only_workbook(self):
+        report = Report.objects.create(
+            name='Quarterly totals',
+            parameters={'format': 'xlsx'},
+            created_by=self.admin,
+        )
+        store_report_results(report, (['indicator', 'total_value', 'meta'], [['Tested', 19.0, {'source': 'aggregates'}]]))
+        report.save()
+
+        response = self.client.get(f'/api/analysis/reports/{report.id}/download/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('quarterly-totals.xlsx', response['Content-Disposition'])
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            [list(row) for row in workbook['Report'].values],
+            [['indicator', 'total_value', 'meta'], ['Tested', 19, '{"source": "aggregates"}']],
+        )
+
+    def test_generate_indicator_and_project_reports_group_in_sql(self):
+        report = Report.objects.create(name='By indicator', report_type='indicator', created_by=self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/analysis/reports/{report.id}/generate/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum('GROUP BY' in query['sql'] for query in queries.captured_queries), 1)
+        self.assertEqual(
+            [(row['indicator_code'], row['total_value'], row['entries']) for row in self._results(report)['results']],
+            [('TRD_POS', 100.0, 2), ('TRD_TST', 19.0, 3)],
+        )
+
+        report.report_type = 'project'
+        report.save(update_fields=['report_type'])
+        self.client.post(f'/api/analysis/reports/{report.id}/generate/')
+        self.assertEqual(
+            self._results(report)['results'],
+            [{'project_id': self.project.id, 'project_name': 'Trends Project', 'total_value': 119.0, 'entries': 5}],
+        )
+
+    def test_custom_report_rows_are_chunked_and_paginated(self):
+        report = Report.objects.create(
+            name='Raw rows',
+            report_type='custom',
+            parameters={'indicator_ids': [self.tested.id]},
+            created_by=self.admin,
+        )
+
+        with mock.patch('analysis.reporting.RESULT_CHUNK_ROWS', 2):
+            response = self.client.post(f'/api/analysis/reports/{report.id}/generate/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['result_row_count'], 3)
+        self.assertNotIn('cached_data', response.json())
+        self.assertEqual(ReportResultChunk.objects.filter(report=report).count(), 2)
+        first_page = self._results(report, page_size=2)
+        self.assertEqual((first_page['count'], len(first_page['results'])), (3, 2))
+        self.assertEqual(first_page['columns'][:3], ['indicator_id', 'indicator_code', 'indicator_name'])
+        rows = first_page['results'] + self._results(report, page_size=2, page=2)['results']
+        self.assertEqual([row['period_start'] for row in rows], ['2025-03-01', '2025-01-16', '2025-01-01'])
+        self.assertEqual(
+            rows[0],
+            {
+                'indicator_id': self.tested.id,
+                'indicator_code': 'TRD_TST',
+                'indicator_name': 'Tested',
+                'project_id': self.project.id,
+                'project_name': 'Trends Project',
+                'organization_id': self.organization.id,
+                'organization_name': 'Trends Org',
+                'period_start': '2025-03-01',
+                'period_end': '2025-03-31',
+                'value': 4.0,
+            },
+        )
+        report.refresh_from_db()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual([row['period_start'] for row in load_report_rows(report, 2, 5)], ['2025-01-01'])
+        self.assertEqual(len(queries), 1)
+        listing = self.client.get('/api/analysis/reports/').json()['results']
+        self.assertNotIn('cached_data', listing[0])
+
+        download = self.client.get(f'/api/analysis/reports/{report.id}/download/')
+        self.assertTrue(download.streaming)
+        lines = b''.join(download.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['indicator_id', 'indicator_code', 'indicator_name'])
+        self.assertEqual(len(lines), 4)
+
+    def test_generated_report_is_reused_until_an_aggregate_in_scope_changes(self):
+        report = Report.objects.create(
+            name='Tested only',
+            report_type='indicator',
+            parameters={'indicator_ids': [self.tested.id], 'date_from': '2025-01-01', 'date_to': '2025-03-31'},
+            created_by=self.admin,
+        )
+        self.client.post(f'/api/analysis/reports/{report.id}/generate/')
+        report.refresh_from_db()
+        generated_at = report.last_generated
+
+        self.client.post(f'/api/analysis/reports/{report.id}/generate/')
+        outside = Aggregate.objects.get(indicator=self.positive, period_start=date(2025, 2, 1))
+        outside.value = {'total': 50}
+        outside.save()
+        self.assertEqual(self._results(report)['results'][0]['total_value'], 19.0)
+        report.refresh_from_db()
+        self.assertEqual(report.last_generated, generated_at)
+
+        inside = Aggregate.objects.get(indicator=self.tested, period_start=date(2025, 3, 1))
+        inside.value = 10
+        inside.save()
+        self.assertEqual(self._results(report)['results'][0]['total_value'], 25.0)
+        report.refresh_from_db()
+        self.assertGreater(report.last_generated, generated_at)
+
+        inside.delete()
+        self.assertEqual(self._results(report)['results'][0]['total_value'], 15.0)
+
+    def test_single_indicator_trend_uses_same_buckets(self):
+        response = self.client.get(
+            f'/api/analysis/trends/{self.tested.id}/',
+            {'date_from': '2025-01-01', 'date_to': '2025-03-31'},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([point['value'] for point in response.json()['data']], [15.0, 0.0, 4.0])
+
+
+class CoordinatorTargetPerformanceApiTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.coordinator = Organization.objects.create(name='Coordinator', code='CRD-ORG', type='ngo')
+        cls.child = Organization.objects.create(name='Child', code='CRD-CHILD', type='ngo', parent=cls.coordinator)
+        cls.outsider = Organization.objects.create(name='Outsider', code='CRD-OUT', type='ngo')
+        cls.admin = User.objects.create_user(
+            username='coordinator-admin',
+            email='coordinator-admin@example.com',
+            password='StrongPassword123!',
+            role='admin',
+            is_staff=True,
+        )
+        cls.project = Project.objects.create(
+            name='Coordinator Project',
+            code='CRD-PROJ',
+            status='active',
+            start_date=date(2025, 1, 1),
+            end_date=date(2026, 12, 31),
+            created_by=cls.admin,
+        )
+        cls.indicators = [
+            Indicator.objects.create(name=f'Coordinator {index}', code=f'CRD_{index}', category='hiv_prevention')
+            for index in range(4)
+        ]
+        indicator = cls.indicators[0]
+        for organization, period_start, period_end, value in [
+            (cls.coordinator, date(2025, 4, 1), date(2025, 4, 30), {'total': 30}),
+            (cls.child, date(2025, 5, 1), date(2025, 5, 31), {'male': 5, 'female': 5}),
+            (cls.outsider, date(2025, 5, 1), date(2025, 5, 31), {'total': 500}),
+            (cls.child, date(2025, 7, 1), date(2025, 7, 31), {'total': 7}),
+        ]:
+            Aggregate.objects.create(
+                indicator=indicator,
+                project=cls.project,
+                organization=organization,
+                period_start=period_start,
+                period_end=period_end,
+                value=value,
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin)
+
+    def _create_targets(self, indicators, quarters):
+        for indicator in indicators:
+            for quarter in quarters:
+                CoordinatorTarget.objects.create(
+                    project=self.project,
+                    coordinator=self.coordinator,
+                    indicator=indicator,
+                    year=2025,
+                    quarter=quarter,
+                    target_value=50,
+                )
+
+    def _get_performance(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/analysis/coordinator-targets/performance/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(queries)
+
+    def test_performance_computes_actuals_and_child_contributions(self):
+        self._create_targets(self.indicators[:1], ['Q1', 'Q2'])
+
+        rows, _ = self._get_performance()
+
+        by_quarter = {row['quarter']: row for row in rows}
+        self.assertEqual(by_quarter['Q1']['actual_value'], 40.0)
+        self.assertEqual(by_quarter['Q1']['achievement_percent'], 80.0)
+        self.assertEqual(by_quarter['Q1']['variance'], -10.0)
+        self.assertEqual(by_quarter['Q1']['status'], 'on_track')
+        self.assertEqual(
+            by_quarter['Q1']['child_contributions'],
+            [{'organization_id': self.child.id, 'organization_name': 'Child', 'actual_value': 10.0, 'share_percent': 25.0}],
+        )
+        self.assertEqual(by_quarter['Q2']['actual_value'], 7.0)
+
+    def test_performance_query_count_does_not_grow_with_targets(self):
+        self._create_targets(self.indicators[:1], ['Q1'])
+        _, few_queries = self._get_performance()
+
+        CoordinatorTarget.objects.all().delete()
+        self._create_targets(self.indicators, ['Q1', 'Q2', 'Q3', 'Q4'])
+        rows, many_queries = self._get_performance()
+
+        self.assertEqual(len(rows), 16)
+        self.assertEqual(few_queries, many_queries)
+
+
+class ScheduledReportWorkerTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Schedule Org', code='SCH-ORG', type='ngo')
+        cls.admin = User.objects.create_user(
+            username='schedule-admin',
+            email='schedule-admin@example.com',
+            password='StrongPassword123!',
+            role='admin',
+            is_staff=True,
+        )
+        project = Project.objects.create(
+            name='Schedule Project',
+            code='SCH-PROJ',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+        )
+        indicator = Indicator.objects.create(name='Scheduled', code='SCH_1')
+        for month in (4, 5):
+            Aggregate.objects.create(
+                indicator=indicator,
+                project=project,
+                organization=cls.organization,
+                period_start=date(2025, month, 1),
+                period_end=date(2025, month, 28),
+                value={'total': month},
+            )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_calendar_arithmetic_clamps_month_ends_and_skips_missed_runs(self):
+        january_end = datetime(2025, 1, 31, 6, 0, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(advance_run(january_end, 'monthly'), datetime(2025, 2, 28, 6, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(advance_run(january_end, 'quarterly'), datetime(2025, 4, 30, 6, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(
+            advance_run(datetime(2025, 12, 15, tzinfo=dt_timezone.utc), 'monthly'),
+            datetime(2026, 1, 15, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            next_run_after(january_end, 'weekly', now=datetime(2025, 2, 20, tzinfo=dt_timezone.utc)),
+            datetime(2025, 2, 21, 6, 0, tzinfo=dt_timezone.utc),
+        )
+
+    def test_worker_generates_due_schedules_and_records_runs(self):
+        due = ScheduledReport.objects.create(
+            report_name='Monthly export',
+            report_type='custom',
+            parameters={'date_from': '2025-04-01'},
+            frequency='monthly',
+            next_run=datetime(2025, 1, 31, 6, 0, tzinfo=dt_timezone.utc),
+            created_by=self.admin,
+        )
+        ScheduledReport.objects.create(
+            report_name='Not yet',
+            frequency='daily',
+            next_run=datetime(2999, 1, 1, tzinfo=dt_timezone.utc),
+            created_by=self.admin,
+        )
+        orphan = ScheduledReport.objects.create(
+            report_name='Orphan',
+            frequency='weekly',
+            next_run=datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+        )
+
+        out = StringIO()
+        call_command('run_scheduled_reports', once=True, workers=1, stdout=out)
+
+        self.assertIn('stopped after 2 run(s)', out.getvalue())
+        run = ScheduledReportRun.objects.get(schedule=due)
+        self.assertEqual(run.status, ScheduledReportRun.STATUS_SUCCEEDED)
+        self.assertEqual(run.row_count, 2)
+        self.assertEqual(run.scheduled_for, datetime(2025, 1, 31, 6, 0, tzinfo=dt_timezone.utc))
+        self.assertIsNotNone(run.duration_seconds)
+        with run.output_file.open('rb') as handle:
+            lines = handle.read().decode().splitlines()
+        self.assertTrue(run.output_file.name.endswith('monthly-export-20250131-0600.csv'))
+        self.assertEqual(len(lines), 3)
+
+        due.refresh_from_db()
+        self.assertEqual(due.last_run, run.started_at)
+        self.assertGreater(due.next_run, run.started_at)
+        self.assertEqual((due.next_run.day, due.next_run.hour), (28, 6))
+        self.assertEqual(ScheduledReportRun.objects.get(schedule=orphan).status, ScheduledReportRun.STATUS_FAILED)
+
+        call_command('run_scheduled_reports', once=True, workers=1, stdout=StringIO())
+        self.assertEqual(ScheduledReportRun.objects.count(), 2)
+
+
+class SampleFixtureTests(APITestCase):
+    def test_sample_fixture_loads_into_the_current_schema(self):
+        call_command('loaddata', settings.BASE_DIR / 'data' / 'bonaso_fixture.json', stdout=StringIO())
+
+        report = Report.objects.get(report_type='custom')
+        self.assertEqual(report.result_row_count, 33)
+        first_row = load_report_rows(report, 0, 1)[0]
+        self.assertEqual(first_row['indicator_code'], 'NUMBER_OF_MEDIA_PLATFORMS_USED_PER_QUARTER')
+        self.assertEqual(first_row['period_start'], '2025-10-01')
+        self.assertEqual(
+            sum(row['total_value'] for row in load_report_rows(Report.objects.get(report_type='indicator'))),
+            sum(Aggregate.objects.values_list('value_total', flat=True)),
+        )
+        self.assertFalse(Aggregate.objects.filter(value_total__isnull=True).exists())
+        self.assertEqual(
+            OrganizationClosure.objects.filter(depth=0).count(),
+            Organization.objects.count(),
+        )
+
+        call_command('rebuild_aggregate_facts', stdout=StringIO())
+        self.assertEqual(
+            AggregateFact.objects.aggregate(total=Sum('value_total'))['total'],
+            Aggregate.objects.aggregate(total=Sum('value_total'))['total'],
+        )
@@ -4,20 +4,18 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from django.db import models, transaction
 from django.db.models import Count, Sum, Avg
+from django.db.models.functions import TruncMonth
 from django.utils.text import slugify
 from datetime import date
-from decimal import Decimal
-from django.http import HttpResponse
-import csv
-import json
-from io import BytesIO
 
 from .models import Report, SavedQuery, ScheduledReport, CoordinatorTarget
 from indicators.models import Indicator
-from organizations.models import Organization
+from organizations.models import Organization, OrganizationClosure
+from organizations.scope import get_user_scope
 from .serializers import (
     ReportSerializer,
     SavedQuerySerializer,
@@ -26,7 +24,23 @@ from .serializers import (
     CoordinatorTargetBulkAssignSerializer,
     DashboardPreferencesSerializer,
 )
-from aggregates.models import Aggregate
+from .scheduled_reports import advance_run
+from .reporting import (
+    ReportResultRows,
+    iter_report_values,
+    refresh_report,
+    refresh_stale_report,
+    report_scope,
+    report_sheet_values,
+)
+from aggregates.facts import aggregate_facts, fact_totals
+from aggregates.models import Aggregate, AggregateFact
+from core.exports import streaming_csv_response, xlsx_sheet_response
+
+
+class ReportResultsPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
 
 
 def _month_start(base: date, offset: int) -> date:
@@ -50,18 +64,6 @@ def _month_range(start: date, end: date):
     return months
 
 
-def _extract_total(value) -> float:
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, dict):
-        if value.get('total') is not None:
-            return float(value.get('total') or 0)
-        male = float(value.get('male') or 0)
-        female = float(value.get('female') or 0)
-        return male + female
-    return 0.0
-
-
 def _can_manage_coordinator_targets(user) -> bool:
     return bool(
         user
@@ -90,44 +92,141 @@ def _fiscal_quarter_date_range(year: int, quarter: str):
     return date(year + 1, 1, 1), date(year + 1, 3, 31)
 
 
-def _build_organization_descendant_map():
-    descendants_by_parent: dict[int, list[int]] = {}
-    nodes = list(Organization.objects.values_list('id', 'parent_id'))
-    children_by_parent: dict[int, list[int]] = {}
-    for organization_id, parent_id in nodes:
-        children_by_parent.setdefault(parent_id, []).append(organization_id)
+def _build_coordinator_performance_rows(targets) -> list[dict]:
+    """
+    Compute actuals for a set of coordinator targets with a fixed number of queries.
 
-    memo: dict[int, list[int]] = {}
+    The ``AggregateFact`` cells that can match any target (same project and indicator,
+    inside the coordinator branch, overlapping the widest quarter window) are summed
+    per organization and month in one query and matched to each target's quarter in
+    memory. Quarters start and end on month boundaries, so overlap on the cells'
+    months is the same as overlap on the aggregates' periods.
+    """
+    descendants_by_parent = OrganizationClosure.objects.descendants_by_ancestor(
+        {target.coordinator_id for target in targets}
+    )
 
-    def collect_descendants(organization_id: int) -> list[int]:
-        cached = memo.get(organization_id)
-        if cached is not None:
-            return cached
+    windows = {}
+    scope_by_coordinator: dict[int, set[int]] = {}
+    for target in targets:
+        windows[target.id] = _fiscal_quarter_date_range(target.year, target.quarter)
+        if target.coordinator_id not in scope_by_coordinator:
+            scope_by_coordinator[target.coordinator_id] = {
+                target.coordinator_id,
+                *descendants_by_parent.get(target.coordinator_id, []),
+            }
 
-        descendants: list[int] = []
-        for child_id in children_by_parent.get(organization_id, []):
-            descendants.append(child_id)
-            descendants.extend(collect_descendants(child_id))
-        memo[organization_id] = descendants
-        return descendants
+    all_org_ids = set().union(*scope_by_coordinator.values())
+    aggregate_rows = fact_totals(
+        AggregateFact.objects.filter(
+            project_id__in={target.project_id for target in targets},
+            indicator_id__in={target.indicator_id for target in targets},
+            organization_id__in=all_org_ids,
+            period_month__lte=max(window[1] for window in windows.values()),
+            period_end_month__gte=min(window[0] for window in windows.values()),
+        ),
+        'project_id', 'indicator_id', 'organization_id', 'period_month', 'period_end_month',
+    ).values_list('project_id', 'indicator_id', 'organization_id', 'period_month', 'period_end_month', 'total')
+    aggregates_by_key: dict[tuple[int, int], list[tuple]] = {}
+    for project_id, indicator_id, organization_id, agg_start, agg_end, total in aggregate_rows:
+        aggregates_by_key.setdefault((project_id, indicator_id), []).append(
+            (organization_id, agg_start, agg_end, total or 0.0)
+        )
 
-    for organization_id, _ in nodes:
-        descendants_by_parent[organization_id] = collect_descendants(organization_id)
+    results = []
+    child_ids: set[int] = set()
+    for target in targets:
+        period_start, period_end = windows[target.id]
+        scoped_org_ids = scope_by_coordinator[target.coordinator_id]
+
+        actual_value = 0.0
+        child_totals: dict[int, float] = {}
+        for organization_id, agg_start, agg_end, total in aggregates_by_key.get((target.project_id, target.indicator_id), ()):
+            if organization_id not in scoped_org_ids or agg_start > period_end or agg_end < period_start:
+                continue
+            actual_value += total
+            if organization_id != target.coordinator_id:
+                child_totals[organization_id] = child_totals.get(organization_id, 0.0) + total
+        child_ids.update(child_totals)
+        results.append((target, actual_value, child_totals))
+
+    org_name_by_id = dict(Organization.objects.filter(id__in=child_ids).values_list('id', 'name')) if child_ids else {}
+
+    performance_rows = []
+    for target, actual_value, child_totals in results:
+        target_value = float(target.target_value or 0)
+        achievement_percent = (actual_value / target_value) * 100 if target_value > 0 else None
+
+        child_contributions = [
+            {
+                'organization_id': organization_id,
+                'organization_name': org_name_by_id.get(organization_id, f'Organization {organization_id}'),
+                'actual_value': child_value,
+                'share_percent': (child_value / actual_value * 100) if actual_value > 0 else 0.0,
+            }
+            for organization_id, child_value in sorted(child_totals.items(), key=lambda item: item[1], reverse=True)
+        ]
 
-    return descendants_by_parent
+        performance_rows.append({
+            'target_id': target.id,
+            'project_id': target.project_id,
+            'coordinator_id': target.coordinator_id,
+            'indicator_id': target.indicator_id,
+            'year': target.year,
+            'quarter': target.quarter,
+            'target_value': target_value,
+            'actual_value': actual_value,
+            'achievement_percent': achievement_percent,
+            'variance': actual_value - target_value,
+            'status': _coordinator_target_status(target_value, achievement_percent),
+            'child_contributions': child_contributions,
+        })
+    return performance_rows
 
 
 def _next_run_for_frequency(frequency: str):
-    now = timezone.now()
-    if frequency == 'daily':
-        return now + timezone.timedelta(days=1)
-    if frequency == 'weekly':
-        return now + timezone.timedelta(days=7)
-    if frequency == 'monthly':
-        return now + timezone.timedelta(days=30)
-    if frequency == 'quarterly':
-        return now + timezone.timedelta(days=90)
-    return now + timezone.timedelta(days=7)
+    return advance_run(timezone.now(), frequency)
+
+
+def _monthly_totals_by_indicator(user, indicator_ids: list[int], params, month_starts: list[date]) -> dict[tuple[int, date], float]:
+    """
+    Sum ``value_total`` per (indicator, month of ``period_start``) for the given month buckets.
+
+    Read from the ``AggregateFact`` cube; ``Aggregate`` is only grouped when a
+    ``date_from``/``date_to`` bound is not on a month boundary.
+    """
+    filters = {'indicator_id__in': indicator_ids}
+    if params.get('organization'):
+        filters['organization_id'] = params['organization']
+    if params.get('project'):
+        filters['project_id'] = params['project']
+    if user.role != 'admin':
+        if not user.organization:
+            return {}
+        filters['organization'] = user.organization
+
+    last = month_starts[-1]
+    upper = date(last.year + (last.month // 12), last.month % 12 + 1, 1)
+    facts = aggregate_facts(params.get('date_from'), params.get('date_to'), **filters)
+    if facts is not None:
+        rows = fact_totals(
+            facts.filter(period_month__gte=month_starts[0], period_month__lt=upper), 'indicator_id', 'period_month'
+        ).values_list('indicator_id', 'period_month', 'total')
+    else:
+        aggregates = Aggregate.objects.filter(**filters)
+        if params.get('date_from'):
+            aggregates = aggregates.filter(period_start__gte=params['date_from'])
+        if params.get('date_to'):
+            aggregates = aggregates.filter(period_end__lte=params['date_to'])
+        rows = (
+            aggregates.filter(period_start__gte=month_starts[0], period_start__lt=upper)
+            .order_by()
+            .annotate(month=TruncMonth('period_start'))
+            .values('indicator_id', 'month')
+            .annotate(total=Sum('value_total'))
+            .values_list('indicator_id', 'month', 'total')
+        )
+    return {(indicator_id, month): float(total or 0) for indicator_id, month, total in rows}
 
 
 def _safe_parse_date(value: str):
@@ -142,27 +241,9 @@ def _safe_parse_date(value: str):
 def indicator_trends(request, indicator_id: int):
     months = int(request.query_params.get('months', 12))
     months = max(1, min(months, 36))
-    org_id = request.query_params.get('organization')
-    project_id = request.query_params.get('project')
     date_from = request.query_params.get('date_from')
     date_to = request.query_params.get('date_to')
 
-    user = request.user
-    aggregates = Aggregate.objects.filter(indicator_id=indicator_id)
-    if org_id:
-        aggregates = aggregates.filter(organization_id=org_id)
-    if project_id:
-        aggregates = aggregates.filter(project_id=project_id)
-    if date_from:
-        aggregates = aggregates.filter(period_start__gte=date_from)
-    if date_to:
-        aggregates = aggregates.filter(period_end__lte=date_to)
-    if user.role != 'admin':
-        if user.organization:
-            aggregates = aggregates.filter(organization=user.organization)
-        else:
-            aggregates = Aggregate.objects.none()
-
     if date_from and date_to:
         start = _safe_parse_date(date_from)
         end = _safe_parse_date(date_to)
@@ -174,18 +255,12 @@ def indicator_trends(request, indicator_id: int):
     else:
         base = timezone.now().date().replace(day=1)
         month_starts = [_month_start(base, offset) for offset in reversed(range(months))]
-    totals = {month_start: 0.0 for month_start in month_starts}
-    earliest = month_starts[0]
-
-    for agg in aggregates.filter(period_start__gte=earliest):
-        month_start = agg.period_start.replace(day=1)
-        if month_start in totals:
-            totals[month_start] += _extract_total(agg.value)
+    totals = _monthly_totals_by_indicator(request.user, [indicator_id], request.query_params, month_starts)
 
     data = [
         {
             'month': month_start.strftime('%b %Y'),
-            'value': totals[month_start],
+            'value': totals.get((indicator_id, month_start), 0.0),
             'target': 0,
         }
         for month_start in month_starts
@@ -208,27 +283,9 @@ def indicator_trends_bulk(request):
 
     months = int(request.query_params.get('months', 12))
     months = max(1, min(months, 36))
-    org_id = request.query_params.get('organization')
-    project_id = request.query_params.get('project')
     date_from = request.query_params.get('date_from')
     date_to = request.query_params.get('date_to')
 
-    user = request.user
-    aggregates = Aggregate.objects.filter(indicator_id__in=indicator_ids)
-    if org_id:
-        aggregates = aggregates.filter(organization_id=org_id)
-    if project_id:
-        aggregates = aggregates.filter(project_id=project_id)
-    if date_from:
-        aggregates = aggregates.filter(period_start__gte=date_from)
-    if date_to:
-        aggregates = aggregates.filter(period_end__lte=date_to)
-    if user.role != 'admin':
-        if user.organization:
-            aggregates = aggregates.filter(organization=user.organization)
-        else:
-            aggregates = Aggregate.objects.none()
-
     if date_from and date_to:
         start = _safe_parse_date(date_from)
         end = _safe_parse_date(date_to)
@@ -241,30 +298,15 @@ def indicator_trends_bulk(request):
         base = timezone.now().date().replace(day=1)
         month_starts = [_month_start(base, offset) for offset in reversed(range(months))]
 
-    earliest = month_starts[0]
-    totals_by_indicator = {
-        indicator_id: {month_start: 0.0 for month_start in month_starts}
-        for indicator_id in indicator_ids
-    }
-
-    for agg in aggregates.filter(period_start__gte=earliest):
-        month_start = agg.period_start.replace(day=1)
-        indicator_totals = totals_by_indicator.get(agg.indicator_id)
-        if indicator_totals is not None and month_start in indicator_totals:
-            indicator_totals[month_start] += _extract_total(agg.value)
-
-    indicator_lookup = {
-        indicator.id: indicator.name
-        for indicator in Indicator.objects.filter(id__in=indicator_ids)
-    }
+    totals = _monthly_totals_by_indicator(request.user, indicator_ids, request.query_params, month_starts)
+    indicator_lookup = dict(Indicator.objects.filter(id__in=indicator_ids).values_list('id', 'name'))
 
     series = []
     for indicator_id in indicator_ids:
-        totals = totals_by_indicator.get(indicator_id, {})
         data = [
             {
                 'month': month_start.strftime('%b %Y'),
-                'value': totals.get(month_start, 0.0),
+                'value': totals.get((indicator_id, month_start), 0.0),
                 'target': 0,
             }
             for month_start in month_starts
@@ -304,91 +346,31 @@ class ReportViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    def retrieve(self, request, *args, **kwargs):
+        report = self.get_object()
+        refresh_stale_report(report)
+        return Response(self.get_serializer(report).data)
+
     @action(detail=True, methods=['post'])
     def generate(self, request, pk=None):
-        """Generate/refresh report data."""
+        """Generate/refresh report data; reuses the cached result unless data in its scope changed."""
         report = self.get_object()
-
-        params = report.parameters or {}
-        project_id = params.get('project_id') or params.get('project')
-        organization_id = params.get('organization_id') or params.get('organization')
-        indicator_ids = params.get('indicator_ids') or params.get('indicators') or []
-        date_from = params.get('date_from')
-        date_to = params.get('date_to')
-
-        aggregates = Aggregate.objects.all()
-        if project_id:
-            aggregates = aggregates.filter(project_id=project_id)
-        if organization_id:
-            aggregates = aggregates.filter(organization_id=organization_id)
-        if indicator_ids:
-            aggregates = aggregates.filter(indicator_id__in=indicator_ids)
-        if date_from:
-            aggregates = aggregates.filter(period_start__gte=date_from)
-        if date_to:
-            aggregates = aggregates.filter(period_end__lte=date_to)
-
-        user = request.user
-        if user.role != 'admin':
-            if user.organization_id:
-                aggregates = aggregates.filter(organization_id=user.organization_id)
-            else:
-                aggregates = Aggregate.objects.none()
-
-        cached_rows = []
-        if report.report_type == 'indicator':
-            totals = {}
-            for agg in aggregates.select_related('indicator'):
-                row = totals.setdefault(
-                    agg.indicator_id,
-                    {
-                        'indicator_id': agg.indicator_id,
-                        'indicator_code': agg.indicator.code,
-                        'indicator_name': agg.indicator.name,
-                        'total_value': 0.0,
-                        'entries': 0,
-                    },
-                )
-                row['total_value'] += _extract_total(agg.value)
-                row['entries'] += 1
-            cached_rows = sorted(totals.values(), key=lambda item: item['total_value'], reverse=True)
-        elif report.report_type == 'project':
-            totals = {}
-            for agg in aggregates.select_related('project'):
-                row = totals.setdefault(
-                    agg.project_id,
-                    {
-                        'project_id': agg.project_id,
-                        'project_name': agg.project.name,
-                        'total_value': 0.0,
-                        'entries': 0,
-                    },
-                )
-                row['total_value'] += _extract_total(agg.value)
-                row['entries'] += 1
-            cached_rows = sorted(totals.values(), key=lambda item: item['total_value'], reverse=True)
-        else:
-            # Default "custom" report is a raw aggregate export based on parameters.
-            for agg in aggregates.select_related('indicator', 'project', 'organization'):
-                cached_rows.append({
-                    'indicator_id': agg.indicator_id,
-                    'indicator_code': agg.indicator.code,
-                    'indicator_name': agg.indicator.name,
-                    'project_id': agg.project_id,
-                    'project_name': agg.project.name,
-                    'organization_id': agg.organization_id,
-                    'organization_name': agg.organization.name,
-                    'period_start': agg.period_start.isoformat(),
-                    'period_end': agg.period_end.isoformat(),
-                    'value': _extract_total(agg.value),
-                })
-            cached_rows = cached_rows
-
-        report.cached_data = cached_rows
-        report.last_generated = timezone.now()
-        report.save(update_fields=['cached_data', 'last_generated', 'updated_at'])
+        force = str(request.data.get('force', '')).strip().lower() in {'1', 'true', 'yes', 'on'}
+        refresh_report(report, report_scope(report.report_type, report.parameters, request.user), force=force)
         return Response(ReportSerializer(report).data)
     
+    @action(detail=True, methods=['get'])
+    def results(self, request, pk=None):
+        """Paginated rows of the last generated result (`page`, `page_size`)."""
+        report = self.get_object()
+        refresh_stale_report(report)
+        paginator = ReportResultsPagination()
+        page = paginator.paginate_queryset(ReportResultRows(report), request, view=self)
+        response = paginator.get_paginated_response(page)
+        response.data['columns'] = report.result_columns
+        response.data['last_generated'] = report.last_generated
+        return response
+
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Download report as CSV/XLSX."""
@@ -399,58 +381,23 @@ class ReportViewSet(viewsets.ModelViewSet):
 
         safe_name = slugify(report.name) or f'report-{report.id}'
 
-        cached_data = report.cached_data if isinstance(report.cached_data, list) else []
-        if not cached_data:
-            cached_data = []
+        refresh_stale_report(report)
+        # Rows are decoded chunk by chunk while the file is written, never all at once.
+        header = report.result_columns if report.result_row_count else ['No data']
 
         if export_format in ('excel', 'xlsx'):
             try:
-                from openpyxl import Workbook
+                return xlsx_sheet_response(
+                    f'{safe_name}.xlsx',
+                    'Report',
+                    header,
+                    (report_sheet_values(values) for values in iter_report_values(report)),
+                )
             except ImportError:
                 export_format = 'csv'
-            else:
-                workbook = Workbook()
-                sheet = workbook.active
-                sheet.title = 'Report'
-
-                if cached_data:
-                    headers = list(cached_data[0].keys())
-                    sheet.append(headers)
-                    for row in cached_data:
-                        values = []
-                        for key in headers:
-                            value = row.get(key)
-                            if isinstance(value, (dict, list)):
-                                value = json.dumps(value)
-                            values.append(value)
-                        sheet.append(values)
-                else:
-                    sheet.append(['No data'])
-
-                output = BytesIO()
-                workbook.save(output)
-                output.seek(0)
-                response = HttpResponse(
-                    output.getvalue(),
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                )
-                response['Content-Disposition'] = f'attachment; filename=\"{safe_name}.xlsx\"'
-                return response
 
         # Default: CSV
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename=\"{safe_name}.csv\"'
-
-        writer = csv.writer(response)
-        if cached_data:
-            headers = list(cached_data[0].keys())
-            writer.writerow(headers)
-            for row in cached_data:
-                writer.writerow([row.get(key) for key in headers])
-        else:
-            writer.writerow(['No data'])
-
-        return response
+        return streaming_csv_response(f'{safe_name}.csv', header, iter_report_values(report))
 
 
 class SavedQueryViewSet(viewsets.ModelViewSet):
@@ -514,15 +461,8 @@ class CoordinatorTargetViewSet(viewsets.ModelViewSet):
 
         # Scope non-admin users to their organization branch while keeping read-only access.
         if not (user.is_superuser or user.is_staff or user.role == 'admin'):
-            if user.organization:
-                organization = user.organization
-                descendants = organization.get_descendants()
-                ancestors = organization.get_ancestors()
-                scoped_ids = (
-                    [organization.id]
-                    + [entry.id for entry in descendants]
-                    + [entry.id for entry in ancestors]
-                )
+            if user.organization_id:
+                scoped_ids = get_user_scope(user).branch_ids
                 queryset = queryset.filter(
                     models.Q(coordinator_id__in=scoped_ids)
                     | models.Q(project__organizations__id__in=scoped_ids)
@@ -638,76 +578,7 @@ class CoordinatorTargetViewSet(viewsets.ModelViewSet):
         targets = list(self.filter_queryset(self.get_queryset()).select_related('project', 'coordinator', 'indicator'))
         if not targets:
             return Response([])
-
-        descendants_by_parent = _build_organization_descendant_map()
-        org_name_by_id = dict(Organization.objects.values_list('id', 'name'))
-
-        performance_rows = []
-        for target in targets:
-            period_start, period_end = _fiscal_quarter_date_range(target.year, target.quarter)
-            descendant_ids = descendants_by_parent.get(target.coordinator_id, [])
-            scoped_org_ids = [target.coordinator_id, *descendant_ids]
-
-            aggregate_qs = Aggregate.objects.filter(
-                project_id=target.project_id,
-                indicator_id=target.indicator_id,
-                organization_id__in=scoped_org_ids,
-                period_start__lte=period_end,
-                period_end__gte=period_start,
-            )
-
-            seen_aggregate_ids = set()
-            actual_total = Decimal('0')
-            child_totals: dict[int, Decimal] = {}
-
-            for aggregate in aggregate_qs:
-                if aggregate.id in seen_aggregate_ids:
-                    continue
-                seen_aggregate_ids.add(aggregate.id)
-
-                numeric_value = Decimal(str(_extract_total(aggregate.value)))
-                actual_total += numeric_value
-                if aggregate.organization_id != target.coordinator_id:
-                    child_totals[aggregate.organization_id] = (
-                        child_totals.get(aggregate.organization_id, Decimal('0')) + numeric_value
-                    )
-
-            target_value = Decimal(str(target.target_value or 0))
-            target_value_float = float(target_value)
-            actual_value_float = float(actual_total)
-            achievement_percent = (
-                (actual_value_float / target_value_float) * 100
-                if target_value_float > 0
-                else None
-            )
-            variance = actual_value_float - target_value_float
-
-            child_contributions = []
-            for organization_id, child_value in sorted(child_totals.items(), key=lambda item: item[1], reverse=True):
-                child_value_float = float(child_value)
-                child_contributions.append({
-                    'organization_id': organization_id,
-                    'organization_name': org_name_by_id.get(organization_id, f'Organization {organization_id}'),
-                    'actual_value': child_value_float,
-                    'share_percent': (child_value_float / actual_value_float * 100) if actual_value_float > 0 else 0.0,
-                })
-
-            performance_rows.append({
-                'target_id': target.id,
-                'project_id': target.project_id,
-                'coordinator_id': target.coordinator_id,
-                'indicator_id': target.indicator_id,
-                'year': target.year,
-                'quarter': target.quarter,
-                'target_value': target_value_float,
-                'actual_value': actual_value_float,
-                'achievement_percent': achievement_percent,
-                'variance': variance,
-                'status': _coordinator_target_status(target_value_float, achievement_percent),
-                'child_contributions': child_contributions,
-            })
-
-        return Response(performance_rows)
+        return Response(_build_coordinator_performance_rows(targets))
 
 
 class DashboardView(viewsets.ViewSet):
@@ -13,6 +13,8 @@ if [[ "${LOAD_FIXTURE:-False}" == "True" ]]; then
   if [[ -f "${FIXTURE_PATH}" ]]; then
     echo "Loading fixture ${FIXTURE_PATH}..."
     python manage.py loaddata "${FIXTURE_PATH}"
+    python manage.py rebuild_organization_closure
+    python manage.py rebuild_aggregate_facts
   else
     echo "Fixture not found: ${FIXTURE_PATH}"
   fi
@@ -0,0 +1,75 @@
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+
+class _Echo:
+    """File-like object whose write() hands the written line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(filename, header, rows):
+    """
+    Stream ``header`` followed by ``rows`` as a CSV attachment.
+
+    ``rows`` is consumed lazily, so pass a generator (e.g. over
+    ``queryset.values().iterator()``) to keep memory flat for large exports.
+    """
+    writer = csv.writer(_Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def write_only_workbook():
+    """
+    Return an openpyxl workbook in write-only mode.
+
+    Rows appended to its sheets are flushed to temporary files as they are
+    written, so memory does not grow with the number of rows. Raises
+    ImportError when openpyxl is not installed.
+    """
+    from openpyxl import Workbook
+
+    return Workbook(write_only=True)
+
+
+def save_workbook_to_tempfile(workbook):
+    """Save ``workbook`` to an anonymous temporary file and return it rewound for reading."""
+    handle = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(handle)
+    handle.seek(0)
+    return handle
+
+
+def xlsx_file_response(workbook, filename):
+    """Serve ``workbook`` from a temporary file; the file is removed once the response is closed."""
+    return FileResponse(
+        save_workbook_to_tempfile(workbook),
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def xlsx_sheet_response(filename, title, header, rows):
+    """Write ``header`` and the lazily consumed ``rows`` to a single write-only sheet and serve it."""
+    workbook = write_only_workbook()
+    sheet = workbook.create_sheet(title=title)
+    if header:
+        sheet.append(list(header))
+    for row in rows:
+        sheet.append(row)
+    return xlsx_file_response(workbook, filename)
@@ -149,6 +149,29 @@ else:
         }
     }
 
+# Cache
+# Defaults to per-process memory; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. Redis) so invalidations are seen by every worker process immediately.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'bonaso-default'),
+    }
+}
+# Seconds organization scopes are cached across requests; 0 keeps them per request only.
+# Hierarchy changes invalidate the cache through a version counter stored in it, so the
+# cache must be shared by every worker process or other workers keep serving stale scopes.
+ORGANIZATION_SCOPE_CACHE_TIMEOUT = env_int('ORGANIZATION_SCOPE_CACHE_TIMEOUT', 0)
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+if ORGANIZATION_SCOPE_CACHE_TIMEOUT > 0 and CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHE_BACKENDS:
+    raise RuntimeError(
+        'ORGANIZATION_SCOPE_CACHE_TIMEOUT requires a shared CACHE_BACKEND '
+        '(e.g. django.core.cache.backends.redis.RedisCache or django.core.cache.backends.db.DatabaseCache).'
+    )
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
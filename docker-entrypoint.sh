@@ -23,6 +23,8 @@ if is_truthy "${LOAD_FIXTURE:-False}"; then
   if [ -f "${FIXTURE_PATH}" ]; then
     echo "Loading fixture ${FIXTURE_PATH}..."
     python manage.py loaddata "${FIXTURE_PATH}"
+    python manage.py rebuild_organization_closure
+    python manage.py rebuild_aggregate_facts
   else
     echo "Fixture not found: ${FIXTURE_PATH}"
   fi
@@ -44,6 +46,16 @@ if is_truthy "${GRANT_ADMIN_ROLE_SUPERUSER:-False}"; then
 fi
 
 if [ "$#" -eq 0 ]; then
+  if is_truthy "${RUN_IMPORT_WORKER:-True}"; then
+    # Same container as gunicorn so the worker reads the uploaded workbooks from MEDIA_ROOT.
+    echo "Starting workbook import worker..."
+    (
+      while true; do
+        python manage.py run_import_worker || echo "Import worker exited; restarting in 5s..."
+        sleep 5
+      done
+    ) &
+  fi
   set -- gunicorn core.wsgi:application \
     --bind 0.0.0.0:${PORT:-8000} \
     --workers ${GUNICORN_WORKERS:-3} \
@@ -0,0 +1,36 @@
+"""
+Closure rows computed from ``parent_id`` alone.
+
+Takes plain ids so that migration 0004 (historical models), the
+``OrganizationClosure`` manager and ``rebuild_organization_closure`` share one
+implementation.
+"""
+
+
+def closure_links(parent_by_id: dict, organization_ids=None):
+    """
+    Yield ``(ancestor_id, descendant_id, depth)`` for each of ``organization_ids`` (default: all).
+
+    The walk up ``parent_by_id`` stops at parents that are not in the map (not loaded
+    yet) and at cycles.
+    """
+    for organization_id in parent_by_id if organization_ids is None else organization_ids:
+        current, depth, seen = organization_id, 0, set()
+        while current in parent_by_id and current not in seen:
+            seen.add(current)
+            yield current, organization_id, depth
+            current, depth = parent_by_id[current], depth + 1
+
+
+def subtree_ids(parent_by_id: dict, organization_id) -> set:
+    """``organization_id`` and every organization below it by ``parent_id``."""
+    children: dict = {}
+    for child_id, parent_id in parent_by_id.items():
+        children.setdefault(parent_id, []).append(child_id)
+    subtree, pending = set(), [organization_id]
+    while pending:
+        current = pending.pop()
+        if current not in subtree:
+            subtree.add(current)
+            pending.extend(children.get(current, ()))
+    return subtree
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from organizations.models import OrganizationClosure
+from organizations.scope import invalidate_organization_scopes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the organization closure table from parent_id, e.g. after bulk_create or "
+        "QuerySet.update(parent=...) writes that bypass Organization.save()."
+    )
+
+    def handle(self, *args, **options):
+        links = OrganizationClosure.objects.rebuild()
+        invalidate_organization_scopes()
+        self.stdout.write(self.style.SUCCESS(f"Organization closure rebuilt: {links} links."))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from organizations.closure import closure_links
+
+
+def forwards(apps, schema_editor):
+    Organization = apps.get_model('organizations', 'Organization')
+    OrganizationClosure = apps.get_model('organizations', 'OrganizationClosure')
+
+    parent_by_id = dict(Organization.objects.values_list('id', 'parent_id'))
+    OrganizationClosure.objects.bulk_create(
+        [
+            OrganizationClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for ancestor_id, descendant_id, depth in closure_links(parent_by_id)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0003_alter_organization_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='organizations.organization')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='organizations.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='organizatio_descend_61822a_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
+from .closure import closure_links, subtree_ids
+
 
 class Organization(models.Model):
     TYPE_CHOICES = [
@@ -40,16 +42,149 @@ class Organization(models.Model):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        parent_changed = False
+        if not adding and (update_fields is None or 'parent' in update_fields or 'parent_id' in update_fields):
+            previous_parent_id = (
+                Organization.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            )
+            parent_changed = previous_parent_id != self.parent_id
+            if parent_changed and self.parent_id in self.descendant_ids(include_self=True):
+                raise ValueError('An organization cannot be moved under itself or one of its descendants.')
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                OrganizationClosure.objects.link_new(self)
+            elif parent_changed:
+                OrganizationClosure.objects.move_subtree(self)
+            if adding or parent_changed:
+                from .scope import invalidate_organization_scopes
+
+                invalidate_organization_scopes()
+
+    def delete(self, *args, **kwargs):
+        from .scope import invalidate_organization_scopes
+
+        result = super().delete(*args, **kwargs)
+        invalidate_organization_scopes()
+        return result
+
+    def descendant_ids(self, include_self=False) -> list[int]:
+        return OrganizationClosure.objects.descendant_ids(self.pk, include_self=include_self)
+
+    def ancestor_ids(self, include_self=False) -> list[int]:
+        return OrganizationClosure.objects.ancestor_ids(self.pk, include_self=include_self)
+
     def get_descendants(self):
-        descendants = list(self.children.all())
-        for child in self.children.all():
-            descendants.extend(child.get_descendants())
-        return descendants
+        return list(
+            Organization.objects.filter(ancestor_links__ancestor_id=self.pk, ancestor_links__depth__gt=0)
+            .order_by('ancestor_links__depth', 'name')
+        )
 
     def get_ancestors(self):
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return ancestors
+        return list(
+            Organization.objects.filter(descendant_links__descendant_id=self.pk, descendant_links__depth__gt=0)
+            .order_by('descendant_links__depth')
+        )
+
+
+class OrganizationClosureManager(models.Manager):
+    def descendant_ids(self, organization_id, include_self=False) -> list[int]:
+        queryset = self.filter(ancestor_id=organization_id)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return list(queryset.order_by('depth').values_list('descendant_id', flat=True))
+
+    def ancestor_ids(self, organization_id, include_self=False) -> list[int]:
+        queryset = self.filter(descendant_id=organization_id)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return list(queryset.order_by('depth').values_list('ancestor_id', flat=True))
+
+    def descendants_by_ancestor(self, organization_ids) -> dict[int, list[int]]:
+        """Map each given organization id to its strict descendant ids."""
+        descendants: dict[int, list[int]] = {organization_id: [] for organization_id in organization_ids}
+        pairs = self.filter(ancestor_id__in=descendants, depth__gt=0).values_list('ancestor_id', 'descendant_id')
+        for ancestor_id, descendant_id in pairs:
+            descendants[ancestor_id].append(descendant_id)
+        return descendants
+
+    def link_new(self, organization):
+        rows = [self.model(ancestor_id=organization.pk, descendant_id=organization.pk, depth=0)]
+        if organization.parent_id:
+            rows.extend(
+                self.model(ancestor_id=ancestor_id, descendant_id=organization.pk, depth=depth + 1)
+                for ancestor_id, depth in self.filter(descendant_id=organization.parent_id).values_list('ancestor_id', 'depth')
+            )
+        self.bulk_create(rows)
+
+    def _create_links(self, parent_by_id, organization_ids=None):
+        return self.bulk_create(
+            (
+                self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+                for ancestor_id, descendant_id, depth in closure_links(parent_by_id, organization_ids)
+            ),
+            batch_size=1000,
+        )
+
+    def rebuild(self) -> int:
+        """Replace every link with ones recomputed from ``parent_id``; returns the number of links."""
+        parent_by_id = dict(Organization.objects.values_list('id', 'parent_id'))
+        with transaction.atomic():
+            self.all().delete()
+            return len(self._create_links(parent_by_id))
+
+    def relink_subtree(self, organization):
+        """
+        Recompute the links of ``organization`` and everything below it from ``parent_id``.
+
+        Used for raw saves (``loaddata``), where parents and children arrive in any order:
+        whichever organization of a chain is saved last links the whole chain.
+        """
+        parent_by_id = dict(Organization.objects.values_list('id', 'parent_id'))
+        subtree = subtree_ids(parent_by_id, organization.pk)
+        with transaction.atomic():
+            self.filter(descendant_id__in=subtree).delete()
+            self._create_links(parent_by_id, subtree)
+
+    def move_subtree(self, organization):
+        subtree = list(self.filter(ancestor_id=organization.pk).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        # Drop links from the old ancestors into the subtree, keep links inside it.
+        self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if not organization.parent_id:
+            return
+        parent_links = list(self.filter(descendant_id=organization.parent_id).values_list('ancestor_id', 'depth'))
+        self.bulk_create(
+            self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=parent_depth + depth + 1)
+            for ancestor_id, parent_depth in parent_links
+            for descendant_id, depth in subtree
+        )
+
+
+class OrganizationClosure(models.Model):
+    """Ancestor/descendant pairs of the organization tree, including each node with itself at depth 0."""
+
+    ancestor = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links'
+    )
+    depth = models.PositiveIntegerField()
+
+    objects = OrganizationClosureManager()
+
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+        indexes = [models.Index(fields=['descendant', 'depth'])]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
@@ -0,0 +1,96 @@
+"""
+Organization scope lookups for the requesting user.
+
+A scope is an organization plus its descendants and ancestors. Scopes are
+memoized on the user object for the duration of a request. With
+``ORGANIZATION_SCOPE_CACHE_TIMEOUT`` set (which settings only allow with a shared
+cache backend) they are also cached across requests under a tree version that is
+bumped whenever the hierarchy changes. Entries are keyed by organization id, so a
+user moving to another organization simply resolves a different key.
+"""
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import OrganizationClosure
+
+VERSION_CACHE_KEY = 'organizations:scope-version'
+
+
+@dataclass(frozen=True)
+class OrganizationScope:
+    organization_id: int | None
+    descendant_ids: tuple[int, ...] = ()
+    ancestor_ids: tuple[int, ...] = ()
+
+    @property
+    def branch_ids(self) -> list[int]:
+        """Descendants (including the organization itself) followed by ancestors."""
+        return [*self.descendant_ids, *self.ancestor_ids]
+
+
+EMPTY_SCOPE = OrganizationScope(organization_id=None)
+
+
+def scope_version() -> int:
+    # Seed with a timestamp so an evicted counter never reuses an old version.
+    cache.add(VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+    return cache.get(VERSION_CACHE_KEY) or 0
+
+
+def _bump_scope_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_organization_scopes():
+    """Drop every cached scope now and again once the surrounding transaction commits."""
+    _bump_scope_version()
+    transaction.on_commit(_bump_scope_version)
+
+
+def get_organization_scope(organization_id) -> OrganizationScope:
+    if not organization_id:
+        return EMPTY_SCOPE
+
+    timeout = settings.ORGANIZATION_SCOPE_CACHE_TIMEOUT
+    if timeout > 0:
+        cache_key = f'organizations:scope:{scope_version()}:{organization_id}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return OrganizationScope(organization_id, *cached)
+
+    descendants: list[tuple[int, int]] = []
+    ancestors: list[tuple[int, int]] = []
+    links = OrganizationClosure.objects.filter(
+        Q(ancestor_id=organization_id) | Q(descendant_id=organization_id, depth__gt=0)
+    )
+    for ancestor_id, descendant_id, depth in links.values_list('ancestor_id', 'descendant_id', 'depth'):
+        if ancestor_id == organization_id:
+            descendants.append((depth, descendant_id))
+        else:
+            ancestors.append((depth, ancestor_id))
+    descendant_ids = tuple(entry_id for _, entry_id in sorted(descendants)) or (int(organization_id),)
+    ancestor_ids = tuple(entry_id for _, entry_id in sorted(ancestors))
+
+    if timeout > 0:
+        cache.set(cache_key, (descendant_ids, ancestor_ids), timeout)
+    return OrganizationScope(organization_id, descendant_ids, ancestor_ids)
+
+
+def get_user_scope(user) -> OrganizationScope:
+    """Scope of ``user.organization``, memoized on the user instance for the current request."""
+    organization_id = getattr(user, 'organization_id', None)
+    memo = getattr(user, '_organization_scope', None)
+    if memo is not None and memo.organization_id == organization_id:
+        return memo
+    scope = get_organization_scope(organization_id)
+    if user is not None:
+        user._organization_scope = scope
+    return scope
@@ -38,6 +38,11 @@ class OrganizationSerializer(serializers.ModelSerializer):
 
         validated_data['code'] = code
         return super().create(validated_data)
+
+    def validate_parent(self, parent):
+        if parent and self.instance and parent.pk in self.instance.descendant_ids(include_self=True):
+            raise serializers.ValidationError('An organization cannot be moved under itself or one of its descendants.')
+        return parent
     
     def get_children_count(self, obj):
         return obj.children.count()
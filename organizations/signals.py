@@ -0,0 +1,21 @@
+"""
+Closure maintenance for writes that bypass ``Organization.save()``.
+
+Raw saves (``loaddata``) go straight to ``save_base``, so the closure links that
+``save()`` maintains are recomputed here from ``parent_id``. ``bulk_create`` and
+``QuerySet.update(parent=...)`` send no signals at all; run
+``rebuild_organization_closure`` after such writes.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Organization, OrganizationClosure
+from .scope import invalidate_organization_scopes
+
+
+@receiver(post_save, sender=Organization, dispatch_uid='organizations_link_raw_save')
+def link_raw_saved_organization(sender, instance, raw, **kwargs):
+    if not raw:
+        return
+    OrganizationClosure.objects.relink_subtree(instance)
+    invalidate_organization_scopes()
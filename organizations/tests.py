@@ -0,0 +1,152 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from organizations.models import Organization, OrganizationClosure
+from organizations.scope import get_organization_scope, get_user_scope
+
+User = get_user_model()
+
+
+class OrganizationHierarchyTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Organization.objects.create(name='Root', code='ROOT', type='headquarters')
+        cls.region = Organization.objects.create(name='Region', code='REGION', type='regional', parent=cls.root)
+        cls.district = Organization.objects.create(name='District', code='DISTRICT', parent=cls.region)
+        cls.other_root = Organization.objects.create(name='Other Root', code='OTHER-ROOT', type='headquarters')
+        cls.admin = User.objects.create_user(
+            username='hierarchy-admin',
+            email='hierarchy-admin@example.com',
+            password='StrongPassword123!',
+            role='admin',
+            is_staff=True,
+        )
+
+    def test_descendant_and_ancestor_ids_use_closure_rows(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.root.descendant_ids(), [self.region.id, self.district.id])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.district.ancestor_ids(), [self.region.id, self.root.id])
+        self.assertEqual(self.region.descendant_ids(include_self=True), [self.region.id, self.district.id])
+        self.assertEqual([org.id for org in self.district.get_ancestors()], [self.region.id, self.root.id])
+
+    def test_moving_a_subtree_relinks_all_descendants(self):
+        self.region.parent = self.other_root
+        self.region.save()
+
+        self.assertEqual(self.root.descendant_ids(), [])
+        self.assertEqual(self.other_root.descendant_ids(), [self.region.id, self.district.id])
+        self.assertEqual(self.district.ancestor_ids(), [self.region.id, self.other_root.id])
+        self.assertEqual(
+            OrganizationClosure.objects.get(ancestor=self.other_root, descendant=self.district).depth,
+            2,
+        )
+
+    def test_deleting_an_organization_removes_its_links(self):
+        self.region.delete()
+
+        self.assertEqual(self.root.descendant_ids(), [])
+        self.assertFalse(OrganizationClosure.objects.filter(descendant_id=self.district.id).exists())
+
+    def test_cannot_move_organization_under_its_descendant(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.patch(
+            f'/api/organizations/{self.root.id}/',
+            {'parent': self.district.id},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.json())
+        self.assertEqual(self.district.ancestor_ids(), [self.region.id, self.root.id])
+
+    def test_user_scope_is_only_memoized_per_request_without_a_shared_cache(self):
+        manager = User.objects.create_user(
+            username='hierarchy-request-manager',
+            email='hierarchy-request-manager@example.com',
+            password='StrongPassword123!',
+            role='manager',
+            organization=self.region,
+        )
+        scope = get_user_scope(manager)
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_user_scope(manager), scope)
+        next_request_user = User.objects.get(pk=manager.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_scope(next_request_user), scope)
+
+    @override_settings(ORGANIZATION_SCOPE_CACHE_TIMEOUT=300)
+    def test_user_scope_is_memoized_and_invalidated_by_tree_changes(self):
+        cache.clear()
+        manager = User.objects.create_user(
+            username='hierarchy-manager',
+            email='hierarchy-manager@example.com',
+            password='StrongPassword123!',
+            role='manager',
+            organization=self.region,
+        )
+
+        with self.assertNumQueries(1):
+            scope = get_user_scope(manager)
+        self.assertEqual(scope.descendant_ids, (self.region.id, self.district.id))
+        self.assertEqual(scope.ancestor_ids, (self.root.id,))
+        next_request_user = User.objects.get(pk=manager.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(get_user_scope(manager), scope)
+            self.assertEqual(get_user_scope(next_request_user), scope)
+
+        Organization.objects.create(name='Clinic', code='CLINIC', parent=self.district)
+        self.assertEqual(len(get_user_scope(manager).descendant_ids), 2)
+        fresh_manager = User.objects.get(pk=manager.pk)
+        self.assertEqual(len(get_user_scope(fresh_manager).descendant_ids), 3)
+
+        manager.organization = self.other_root
+        self.assertEqual(get_user_scope(manager).descendant_ids, (self.other_root.id,))
+
+    def test_raw_loaded_organizations_are_linked_in_any_order(self):
+        cache.clear()
+        fixture = [
+            {
+                'model': 'organizations.organization',
+                'pk': pk,
+                'fields': {
+                    'name': code,
+                    'code': code,
+                    'parent': parent,
+                    'created_at': '2025-01-01T00:00:00Z',
+                    'updated_at': '2025-01-01T00:00:00Z',
+                },
+            }
+            for pk, code, parent in ((9003, 'RAW-CLINIC', 9002), (9001, 'RAW-ROOT', None), (9002, 'RAW-DISTRICT', 9001))
+        ]
+
+        for loaded in serializers.deserialize('json', json.dumps(fixture)):
+            loaded.save()
+
+        self.assertEqual(get_organization_scope(9001).descendant_ids, (9001, 9002, 9003))
+        self.assertEqual(get_organization_scope(9003).ancestor_ids, (9002, 9001))
+
+    def test_rebuild_command_relinks_queryset_updates(self):
+        cache.clear()
+        Organization.objects.filter(pk=self.region.pk).update(parent=self.other_root)
+        self.assertEqual(get_organization_scope(self.other_root.id).descendant_ids, (self.other_root.id,))
+
+        out = StringIO()
+        call_command('rebuild_organization_closure', stdout=out)
+
+        self.assertIn('links', out.getvalue())
+        self.assertEqual(
+            get_organization_scope(self.other_root.id).descendant_ids,
+            (self.other_root.id, self.region.id, self.district.id),
+        )
+        self.assertEqual(self.root.descendant_ids(), [])
@@ -6,6 +6,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
 from .models import Organization
+from .scope import get_user_scope
 from .serializers import (
     OrganizationSerializer, OrganizationTreeSerializer, OrganizationSimpleSerializer
 )
@@ -27,16 +28,9 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_superuser or user.is_staff or user.role == 'admin':
             return Organization.objects.all()
-        elif user.organization:
-            # Return user's org and its descendants
-            org = user.organization
-            descendants = org.get_descendants()
-            ancestors = org.get_ancestors()
-            return Organization.objects.filter(
-                id__in=[org.id]
-                + [d.id for d in descendants]
-                + [a.id for a in ancestors]
-            )
+        elif user.organization_id:
+            # Return user's org, its descendants and its ancestors
+            return Organization.objects.filter(id__in=get_user_scope(user).branch_ids)
         return Organization.objects.none()
     
     def perform_create(self, serializer):
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('respondents', '0002_interaction_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['date', 'project'], name='interaction_date_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['indicator', 'interaction'], name='response_indicator_inter_idx'),
+        ),
+    ]
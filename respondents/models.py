@@ -92,6 +92,7 @@ class Interaction(models.Model):
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [models.Index(fields=['date', 'project'], name='interaction_date_project_idx')]
     
     def __str__(self):
         return f"{self.respondent.unique_id} - {self.date}"
@@ -119,6 +120,8 @@ class Response(models.Model):
     
     class Meta:
         unique_together = ['interaction', 'indicator']
+        # Derivations and indicator analytics start from one indicator and join to interaction.date.
+        indexes = [models.Index(fields=['indicator', 'interaction'], name='response_indicator_inter_idx')]
     
     def __str__(self):
         return f"{self.interaction} - {self.indicator.code}"
@@ -47,6 +47,8 @@ class InteractionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
     
     def get_responses_count(self, obj):
+        if 'responses' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.responses.all())
         return obj.responses.count()
 
 
@@ -103,11 +105,17 @@ class RespondentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
     
     def get_interactions_count(self, obj):
+        if hasattr(obj, 'interactions_count'):
+            return obj.interactions_count
         return obj.interactions.count()
     
     def get_last_interaction(self, obj):
-        last = obj.interactions.first()
-        return last.date.isoformat() if last else None
+        if hasattr(obj, 'last_interaction_date'):
+            last_date = obj.last_interaction_date
+        else:
+            last = obj.interactions.first()
+            last_date = last.date if last else None
+        return last_date.isoformat() if last_date else None
 
 
 class RespondentProfileSerializer(RespondentSerializer):
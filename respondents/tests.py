@@ -0,0 +1,112 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from indicators.models import Assessment, Indicator
+from organizations.models import Organization
+from respondents.models import Interaction, Respondent, Response
+
+User = get_user_model()
+
+
+class RespondentApiTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Respondent Org', code='RSP-ORG', type='ngo')
+        cls.officer = User.objects.create_user(
+            username='respondent-officer',
+            email='respondent-officer@example.com',
+            password='StrongPassword123!',
+            role='officer',
+            organization=cls.organization,
+        )
+        cls.assessment = Assessment.objects.create(name='Intake')
+        cls.indicators = [
+            Indicator.objects.create(name=f'Respondent indicator {index}', code=f'RSP_IND_{index}')
+            for index in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.officer)
+
+    def _create_respondents(self, count, start=0, with_responses=False):
+        for index in range(start, start + count):
+            respondent = Respondent.objects.create(
+                unique_id=f'RSP-{index:03d}',
+                first_name='Test',
+                last_name=f'Respondent {index:03d}',
+                organization=self.organization,
+                created_by=self.officer,
+            )
+            for day in (1, 2):
+                interaction = Interaction.objects.create(
+                    respondent=respondent,
+                    assessment=self.assessment,
+                    date=date(2025, 1, day + index % 3),
+                    created_by=self.officer,
+                )
+                if with_responses:
+                    for indicator in self.indicators:
+                        Response.objects.create(interaction=interaction, indicator=indicator, value='yes')
+
+    def _get_query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(queries)
+
+    def test_list_annotates_interaction_summary(self):
+        self._create_respondents(1)
+
+        body, _ = self._get_query_count('/api/record/respondents/')
+
+        row = body['results'][0]
+        self.assertEqual(row['interactions_count'], 2)
+        self.assertEqual(row['last_interaction'], '2025-01-02')
+        self.assertEqual(row['organization_name'], 'Respondent Org')
+        self.assertEqual(row['created_by_name'], 'respondent-officer')
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self._create_respondents(2)
+        _, small_page_queries = self._get_query_count('/api/record/respondents/')
+
+        self._create_respondents(15, start=2)
+        body, full_page_queries = self._get_query_count('/api/record/respondents/')
+
+        self.assertEqual(len(body['results']), 17)
+        self.assertEqual(small_page_queries, full_page_queries)
+
+    def test_interaction_list_query_count_does_not_grow_with_rows(self):
+        self._create_respondents(1, with_responses=True)
+        _, few_queries = self._get_query_count('/api/record/interactions/')
+
+        self._create_respondents(6, start=1, with_responses=True)
+        body, many_queries = self._get_query_count('/api/record/interactions/')
+
+        self.assertEqual(len(body['results']), 14)
+        self.assertEqual(body['results'][0]['responses_count'], 2)
+        self.assertEqual(body['results'][0]['assessment_name'], 'Intake')
+        self.assertEqual(
+            {entry['indicator_code'] for entry in body['results'][0]['responses']},
+            {'RSP_IND_0', 'RSP_IND_1'},
+        )
+        self.assertEqual(few_queries, many_queries)
+
+    def test_profile_query_count_does_not_grow_with_interactions(self):
+        self._create_respondents(1, with_responses=True)
+        respondent = Respondent.objects.get()
+        _, few_queries = self._get_query_count(f'/api/record/respondents/{respondent.id}/profile/')
+
+        for day in range(5, 15):
+            interaction = Interaction.objects.create(respondent=respondent, date=date(2025, 2, day))
+            Response.objects.create(interaction=interaction, indicator=self.indicators[0], value='no')
+        body, many_queries = self._get_query_count(f'/api/record/respondents/{respondent.id}/profile/')
+
+        self.assertEqual(body['interactions_count'], 12)
+        self.assertEqual(len(body['interactions']), 12)
+        self.assertEqual(body['interactions'][0]['responses_count'], 1)
+        self.assertEqual(few_queries, many_queries)
@@ -7,7 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count
+from django.db.models import Count, Max, Prefetch
 from django.http import HttpResponse
 import csv
 
@@ -22,6 +22,17 @@ from .serializers import (
 )
 
 
+def _interaction_list_queryset(queryset=None):
+    """Interactions with everything InteractionSerializer renders loaded up front."""
+    if queryset is None:
+        queryset = Interaction.objects.all()
+    return queryset.select_related(
+        'respondent', 'assessment', 'project', 'event', 'created_by'
+    ).prefetch_related(
+        Prefetch('responses', queryset=Response.objects.select_related('indicator'))
+    )
+
+
 class RespondentViewSet(viewsets.ModelViewSet):
     """ViewSet for managing respondents."""
     
@@ -38,10 +49,21 @@ class RespondentViewSet(viewsets.ModelViewSet):
         """Filter queryset by user role and organization."""
         user = self.request.user
         if is_platform_admin(user):
-            return Respondent.objects.all()
-        elif user.organization:
-            return Respondent.objects.filter(organization=user.organization)
-        return Respondent.objects.none()
+            queryset = Respondent.objects.all()
+        elif user.organization_id:
+            queryset = Respondent.objects.filter(organization_id=user.organization_id)
+        else:
+            return Respondent.objects.none()
+
+        if self.action in ('list', 'retrieve', 'search', 'profile'):
+            # Serialized fields read these instead of querying per respondent.
+            queryset = queryset.select_related('organization', 'created_by').annotate(
+                interactions_count=Count('interactions'),
+                last_interaction_date=Max('interactions__date'),
+            )
+        if self.action == 'profile':
+            queryset = queryset.prefetch_related(Prefetch('interactions', queryset=_interaction_list_queryset()))
+        return queryset
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -128,10 +150,14 @@ class InteractionViewSet(viewsets.ModelViewSet):
         """Filter interactions by user role and organization."""
         user = self.request.user
         if is_platform_admin(user):
-            return Interaction.objects.all()
-        elif user.organization:
-            return Interaction.objects.filter(respondent__organization=user.organization)
-        return Interaction.objects.filter(created_by=user)
+            queryset = Interaction.objects.all()
+        elif user.organization_id:
+            queryset = Interaction.objects.filter(respondent__organization_id=user.organization_id)
+        else:
+            queryset = Interaction.objects.filter(created_by=user)
+        if self.action in ('list', 'retrieve'):
+            queryset = _interaction_list_queryset(queryset)
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
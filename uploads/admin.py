@@ -11,5 +11,5 @@ class UploadAdmin(admin.ModelAdmin):
 
 @admin.register(ImportJob)
 class ImportJobAdmin(admin.ModelAdmin):
-    list_display = ['upload', 'status', 'total_rows', 'successful_rows', 'failed_rows', 'created_at']
+    list_display = ['upload', 'status', 'task', 'total_rows', 'processed_rows', 'successful_rows', 'failed_rows', 'created_at']
     list_filter = ['status']
@@ -0,0 +1,152 @@
+"""
+Database-backed queue for workbook import work.
+
+API requests only mark an ``ImportJob`` as queued; the ``run_import_worker``
+management command claims queued rows, runs the task off the request thread
+and records progress on the row so clients can poll it.
+"""
+import logging
+import threading
+import time
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "processing")
+MAX_ATTEMPTS = 3
+
+
+def enqueue_import_job(job: ImportJob, task: str, user=None, options: dict | None = None) -> bool:
+    """
+    Queue ``task`` for ``job`` unless it is already queued or processing; returns whether it was queued.
+
+    One conditional UPDATE, so of two concurrent requests for the same job only one
+    queues it and the other gets ``False`` (the views answer 409).
+    """
+    fields = {
+        "errors": job.errors,
+        "task": task,
+        "task_options": options or {},
+        "requested_by": user,
+        "status": "queued",
+        "queued_at": timezone.now(),
+        "heartbeat_at": None,
+        "attempts": 0,
+        "total_rows": 0,
+        "processed_rows": 0,
+        "completed_at": None,
+    }
+    queued = ImportJob.objects.filter(pk=job.pk).exclude(status__in=ACTIVE_STATUSES).update(**fields)
+    if not queued:
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+def requeue_stale_jobs(stale_after_seconds: float) -> int:
+    """Hand jobs whose worker stopped sending heartbeats back to the queue, or fail them after MAX_ATTEMPTS."""
+    cutoff = timezone.now() - timezone.timedelta(seconds=stale_after_seconds)
+    stale = ImportJob.objects.filter(status="processing", heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(status="failed", completed_at=timezone.now())
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status="queued")
+    if failed or requeued:
+        logger.warning("Import queue: %s stale job(s) requeued, %s failed", requeued, failed)
+    return requeued
+
+
+def claim_next_import_job() -> ImportJob | None:
+    """
+    Atomically move the oldest queued job to ``processing`` and return it.
+
+    The conditional UPDATE only succeeds for one worker per row, so several
+    workers can poll the same table without a broker or row locks.
+    """
+    candidate_ids = list(
+        ImportJob.objects.filter(status="queued").order_by("queued_at", "id").values_list("id", flat=True)[:10]
+    )
+    for job_id in candidate_ids:
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=job_id, status="queued").update(
+            status="processing",
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ImportJob.objects.select_related("upload", "requested_by").get(pk=job_id)
+    return None
+
+
+class ImportProgress:
+    """Callable passed to the workbook tasks; writes progress counters to the job row, throttled by ``interval`` seconds."""
+
+    def __init__(self, job: ImportJob, interval: float = 2.0):
+        self.job = job
+        self.interval = interval
+        self._last_write = 0.0
+
+    def __call__(self, processed: int, total: int | None = None, force: bool = False) -> None:
+        self.job.processed_rows = processed
+        if total is not None:
+            self.job.total_rows = total
+        now = time.monotonic()
+        if not force and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        ImportJob.objects.filter(pk=self.job.pk).update(
+            processed_rows=self.job.processed_rows,
+            total_rows=self.job.total_rows,
+            heartbeat_at=timezone.now(),
+        )
+
+
+class JobHeartbeat:
+    """
+    Refresh ``heartbeat_at`` every ``interval`` seconds from a background thread while a job runs.
+
+    The thread has its own database connection, so its writes commit even while the
+    task sits in one long transaction (the write phase of ``_confirm_import``), and
+    ``requeue_stale_jobs`` does not hand a running job to a second worker.
+    """
+
+    def __init__(self, job: ImportJob, interval: float = 60.0):
+        self.job_id = job.pk
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"import-job-{job.pk}-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    ImportJob.objects.filter(pk=self.job_id, status="processing").update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.warning("Import job %s: heartbeat write failed", self.job_id, exc_info=True)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_import_job(job: ImportJob, progress_interval: float = 2.0, heartbeat_interval: float = 60.0) -> None:
+    from .report_workbooks import fail_workbook_job, run_workbook_task
+
+    progress = ImportProgress(job, interval=progress_interval)
+    try:
+        with JobHeartbeat(job, interval=heartbeat_interval):
+            run_workbook_task(job, progress)
+    except Exception as exc:
+        logger.exception("Import job %s (%s) failed", job.pk, job.task)
+        fail_workbook_job(job, exc)
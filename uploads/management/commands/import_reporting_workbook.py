@@ -1,4 +1,6 @@
 import re
+from bisect import bisect_left
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
@@ -8,6 +10,7 @@ from django.db import transaction
 from aggregates.models import Aggregate
 from indicators.models import Indicator
 from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
 from organizations.models import Organization
 from projects.models import Project, ProjectIndicator, ProjectIndicatorOrganizationTarget
 
@@ -742,64 +745,119 @@ def find_matrix_sheet_name(sheet_names: list[str]) -> str | None:
 
 
 class OrganizationResolver:
+    """
+    Match worksheet and matrix names to organizations.
+
+    Every name/code/alias key maps to its organizations in a dict, the sorted key list
+    answers "keys starting with this name" with a bisect, and an inverted token index
+    limits the overlap ranking to organizations sharing a token. Results are memoized
+    per requested name because the same names repeat across sheets and matrix rows.
+    """
+
     def __init__(self):
         self.organizations = list(Organization.objects.all())
-        self.index = {}
+        self.organizations_by_id = {organization.id: organization for organization in self.organizations}
+        self.organizations_by_key: dict[str, list[Organization]] = {}
+        self.tokens_by_organization: dict[int, set[str]] = {}
+        self.organization_ids_by_token: dict[str, list[int]] = {}
         for organization in self.organizations:
             keys = {
                 normalize_text(organization.name),
                 normalize_text(organization.code),
             }
             keys.update(organization_variants(organization.name))
-            self.index[organization.id] = {
-                "organization": organization,
-                "keys": keys,
-                "tokens": significant_organization_tokens(organization.name),
-            }
+            for key in keys:
+                if key:
+                    self.organizations_by_key.setdefault(key, []).append(organization)
+            tokens = significant_organization_tokens(organization.name)
+            self.tokens_by_organization[organization.id] = tokens
+            for token in tokens:
+                self.organization_ids_by_token.setdefault(token, []).append(organization.id)
+        self.positions = {organization.id: position for position, organization in enumerate(self.organizations)}
+        self.sorted_keys = sorted(self.organizations_by_key)
+        self._resolved: dict[str, Organization | None] = {}
+
+    def _prefix_matches(self, normalized_name: str) -> set[int]:
+        """Ids of organizations with a key that starts with, or is a prefix of, ``normalized_name``."""
+        if not normalized_name:
+            return {organization.id for organization in self.organizations}
+        matches = set()
+        position = bisect_left(self.sorted_keys, normalized_name)
+        while position < len(self.sorted_keys) and self.sorted_keys[position].startswith(normalized_name):
+            matches.update(organization.id for organization in self.organizations_by_key[self.sorted_keys[position]])
+            if len(matches) > 1:
+                return matches
+            position += 1
+        for end in range(1, len(normalized_name)):
+            matches.update(organization.id for organization in self.organizations_by_key.get(normalized_name[:end], ()))
+        return matches
 
     def resolve(self, name: str) -> Organization | None:
         if not name:
             return None
+        if name not in self._resolved:
+            self._resolved[name] = self._resolve(name)
+        return self._resolved[name]
 
+    def _resolve(self, name: str) -> Organization | None:
         normalized_name = normalize_text(name)
         for variant in organization_variants(name):
-            exact = [
-                item["organization"]
-                for item in self.index.values()
-                if variant in item["keys"]
-            ]
+            exact = self.organizations_by_key.get(variant)
             if exact:
                 return exact[0]
 
-        prefix_matches = []
-        for item in self.index.values():
-            matched_prefix = any(
-                key.startswith(normalized_name) or normalized_name.startswith(key)
-                for key in item["keys"]
-                if key
-            )
-            if matched_prefix:
-                prefix_matches.append(item["organization"])
-
+        prefix_matches = self._prefix_matches(normalized_name)
         if len(prefix_matches) == 1:
-            return prefix_matches[0]
+            return self.organizations_by_id[prefix_matches.pop()]
 
         requested_tokens = significant_organization_tokens(name)
-        ranked = []
-        for item in self.index.values():
-            overlap = len(requested_tokens & item["tokens"])
-            if overlap:
-                ranked.append((overlap, len(item["tokens"]), item["organization"]))
-        ranked.sort(key=lambda item: (-item[0], item[1], item[2].name.lower()))
-        if not ranked:
+        overlaps = {}
+        for token in requested_tokens:
+            for organization_id in self.organization_ids_by_token.get(token, ()):
+                overlaps[organization_id] = overlaps.get(organization_id, 0) + 1
+        if not overlaps:
             return None
 
-        best_overlap, _, best_match = ranked[0]
+        positions = self.positions
+        best_id = min(
+            overlaps,
+            key=lambda organization_id: (
+                -overlaps[organization_id],
+                len(self.tokens_by_organization[organization_id]),
+                self.organizations_by_id[organization_id].name.lower(),
+                positions[organization_id],
+            ),
+        )
         minimum_overlap = max(2, len(requested_tokens) // 2)
-        return best_match if best_overlap >= minimum_overlap else None
+        return self.organizations_by_id[best_id] if overlaps[best_id] >= minimum_overlap else None
+
+
+@dataclass
+class IndicatorCandidate:
+    """An indicator with the matching keys ``IndicatorResolver`` needs, computed once."""
+
+    indicator: Indicator
+    position: int
+    key: str
+    tokens: frozenset[str]
+    significant_tokens: set[str]
+    section_index: str | None
+    is_project: bool
+    is_configured: bool
 
 
 class IndicatorResolver:
+    """
+    Match workbook section titles to indicators.
+
+    Canonical names and token sets are computed once per indicator in ``remember``; exact
+    matches are a dict lookup and fuzzy matching only ranks indicators that share a token
+    with the requested title (found through an inverted token index).
+    """
+
+    # (project indicators only, configured (non AUTO_) indicators only), in preference order.
+    POOLS = ((True, True), (False, True), (True, False), (False, False))
+
     def __init__(self, project: Project | None = None):
         self.project_indicator_ids = set()
         if project:
@@ -807,188 +865,188 @@ class IndicatorResolver:
                 ProjectIndicator.objects.filter(project=project).values_list("indicator_id", flat=True)
             )
 
-        self.indicators = []
-        self.project_indicators = []
-        self.configured_indicators = []
-        self.configured_project_indicators = []
-        self.indicators_by_index: dict[str, list[Indicator]] = {}
-        self.project_indicators_by_index: dict[str, list[Indicator]] = {}
+        self.candidates: dict[int, IndicatorCandidate] = {}
+        self.candidates_by_key: dict[str, list[IndicatorCandidate]] = {}
+        self.candidates_by_token: dict[str, list[IndicatorCandidate]] = {}
+        self.project_candidates_by_index: dict[str, list[IndicatorCandidate]] = {}
         for indicator in Indicator.objects.all():
             self.remember(indicator)
 
-    def _candidate_sort_key(self, indicator: Indicator, requested_key: str, section_index: str | None):
-        candidate_key = canonical_indicator_name(indicator.name)
-        requested_tokens = set(requested_key.split())
-        candidate_tokens = set(candidate_key.split())
-        overlap = len(requested_tokens & candidate_tokens)
-        requested_significant_tokens = significant_indicator_tokens(requested_key)
-        candidate_significant_tokens = significant_indicator_tokens(candidate_key)
-        significant_overlap = len(requested_significant_tokens & candidate_significant_tokens)
-        is_exact = candidate_key == requested_key
+    @staticmethod
+    def _in_pool(candidate: IndicatorCandidate, project_only: bool, configured_only: bool) -> bool:
+        return (candidate.is_project or not project_only) and (candidate.is_configured or not configured_only)
+
+    def _candidate_sort_key(
+        self,
+        candidate: IndicatorCandidate,
+        requested_key: str,
+        requested_tokens: set[str],
+        requested_significant_tokens: set[str],
+        section_index: str | None,
+    ):
+        indicator = candidate.indicator
+        candidate_key = candidate.key
         is_prefix_match = candidate_key.startswith(requested_key) or requested_key.startswith(candidate_key)
-        index_matches = section_index and extract_section_index_from_code(indicator.code) == section_index
+        index_matches = section_index and candidate.section_index == section_index
         return (
             0 if index_matches else 1,
-            0 if is_exact else 1,
+            0 if candidate_key == requested_key else 1,
             0 if is_prefix_match else 1,
-            -significant_overlap,
-            -overlap,
-            0 if indicator.id in self.project_indicator_ids else 1,
-            0 if not is_auto_indicator(indicator) else 1,
+            -len(requested_significant_tokens & candidate.significant_tokens),
+            -len(requested_tokens & candidate.tokens),
+            0 if candidate.is_project else 1,
+            0 if candidate.is_configured else 1,
             0 if indicator.sub_labels else 1,
             abs(len(candidate_key) - len(requested_key)),
             indicator.name.lower(),
         )
 
-    def _best_exact(self, key: str, candidates: list[Indicator], section_index: str | None) -> Indicator | None:
-        exact_matches = [
-            indicator for indicator in candidates if canonical_indicator_name(indicator.name) == key
-        ]
-        if not exact_matches:
-            return None
-        return sorted(
-            exact_matches,
-            key=lambda indicator: self._candidate_sort_key(indicator, key, section_index),
-        )[0]
-
-    def _best_fuzzy(
+    def _best(
         self,
+        candidates: list[IndicatorCandidate],
         key: str,
-        candidates: list[Indicator],
+        requested_tokens: set[str],
+        requested_significant_tokens: set[str],
         section_index: str | None,
-        minimum_overlap: int,
     ) -> Indicator | None:
-        requested_tokens = set(key.split())
-        ranked = []
-        requested_significant_tokens = significant_indicator_tokens(key)
-        for indicator in candidates:
-            candidate_key = canonical_indicator_name(indicator.name)
-            overlap = len(requested_tokens & set(candidate_key.split()))
-            candidate_significant_tokens = significant_indicator_tokens(candidate_key)
-            significant_overlap = len(requested_significant_tokens & candidate_significant_tokens)
-            if overlap < minimum_overlap:
-                continue
-            if requested_significant_tokens and significant_overlap == 0:
-                continue
-            ranked.append(
-                (
-                    *self._candidate_sort_key(indicator, key, section_index),
-                    indicator,
-                )
-            )
-
-        if not ranked:
+        if not candidates:
             return None
+        best = min(
+            candidates,
+            key=lambda candidate: (
+                self._candidate_sort_key(
+                    candidate, key, requested_tokens, requested_significant_tokens, section_index
+                ),
+                candidate.position,
+            ),
+        )
+        return best.indicator
+
+    def _fuzzy_candidates(
+        self,
+        candidates,
+        requested_tokens: set[str],
+        requested_significant_tokens: set[str],
+        minimum_overlap: int,
+    ) -> list[IndicatorCandidate]:
+        return [
+            candidate
+            for candidate in candidates
+            if len(requested_tokens & candidate.tokens) >= minimum_overlap
+            and not (requested_significant_tokens and not requested_significant_tokens & candidate.significant_tokens)
+        ]
 
-        ranked.sort(key=lambda item: item[:-1])
-        return ranked[0][-1]
+    def _token_candidates(self, requested_tokens: set[str]) -> list[IndicatorCandidate]:
+        """Indicators sharing at least one token with the request, in the order they were remembered."""
+        found = {}
+        for token in requested_tokens:
+            for candidate in self.candidates_by_token.get(token, ()):
+                found[candidate.position] = candidate
+        return [found[position] for position in sorted(found)]
 
     def resolve(self, title: str, section_index: str | None = None) -> Indicator | None:
         key = canonical_indicator_name(title)
         normalized_index = normalize_section_index(section_index)
+        requested_tokens = set(key.split())
+        requested_significant_tokens = significant_indicator_tokens(key)
+        rank_args = (key, requested_tokens, requested_significant_tokens, normalized_index)
 
         if normalized_index:
             index_candidates = [
-                indicator
-                for indicator in self.project_indicators_by_index.get(normalized_index, [])
-                if not is_auto_indicator(indicator)
+                candidate
+                for candidate in self.project_candidates_by_index.get(normalized_index, [])
+                if candidate.is_configured
             ]
-            if index_candidates:
-                best_match = self._best_fuzzy(
-                    key,
+            best_match = self._best(
+                self._fuzzy_candidates(
                     index_candidates,
-                    normalized_index,
-                    minimum_overlap=max(2, len(set(key.split())) // 3),
-                )
-                if best_match:
-                    return best_match
+                    requested_tokens,
+                    requested_significant_tokens,
+                    minimum_overlap=max(2, len(requested_tokens) // 3),
+                ),
+                *rank_args,
+            )
+            if best_match:
+                return best_match
+
+        exact_candidates = self.candidates_by_key.get(key, [])
+        for project_only, configured_only in self.POOLS:
+            best_match = self._best(
+                [candidate for candidate in exact_candidates if self._in_pool(candidate, project_only, configured_only)],
+                *rank_args,
+            )
+            if best_match:
+                return best_match
+
+        fuzzy_candidates = self._fuzzy_candidates(
+            self._token_candidates(requested_tokens),
+            requested_tokens,
+            requested_significant_tokens,
+            minimum_overlap=max(3, len(requested_tokens) // 2),
+        )
+        for project_only, configured_only in self.POOLS:
+            best_match = self._best(
+                [candidate for candidate in fuzzy_candidates if self._in_pool(candidate, project_only, configured_only)],
+                *rank_args,
+            )
+            if best_match:
+                return best_match
+        return None
 
-        exact_project_match = self._best_exact(key, self.configured_project_indicators, normalized_index)
-        if exact_project_match:
-            return exact_project_match
+    def remember(self, indicator: Indicator):
+        if indicator.id in self.candidates:
+            return
 
-        exact_global_match = self._best_exact(key, self.configured_indicators, normalized_index)
-        if exact_global_match:
-            return exact_global_match
+        key = canonical_indicator_name(indicator.name)
+        candidate = IndicatorCandidate(
+            indicator=indicator,
+            position=len(self.candidates),
+            key=key,
+            tokens=frozenset(key.split()),
+            significant_tokens=significant_indicator_tokens(key),
+            section_index=extract_section_index_from_code(indicator.code),
+            is_project=indicator.id in self.project_indicator_ids,
+            is_configured=not is_auto_indicator(indicator),
+        )
+        self.candidates[indicator.id] = candidate
+        self.candidates_by_key.setdefault(key, []).append(candidate)
+        for token in candidate.tokens:
+            self.candidates_by_token.setdefault(token, []).append(candidate)
+        if candidate.section_index and candidate.is_project:
+            self.project_candidates_by_index.setdefault(candidate.section_index, []).append(candidate)
+
+
+SNAPSHOT_COLUMNS = ("B", "C", "E", "F", *AGE_COLUMNS, "AA")
+SNAPSHOT_COLUMN_INDEXES = tuple((column, column_index_from_string(column) - 1) for column in SNAPSHOT_COLUMNS)
+SNAPSHOT_MAX_COLUMN = max(index for _, index in SNAPSHOT_COLUMN_INDEXES) + 1
+MATRIX_COLUMN_INDEXES = {
+    column: column_index_from_string(column) - 1 for column in ("A", "I", "J", "K", "L", "N")
+}
 
-        exact_any_project_match = self._best_exact(key, self.project_indicators, normalized_index)
-        if exact_any_project_match:
-            return exact_any_project_match
 
-        exact_any_global_match = self._best_exact(key, self.indicators, normalized_index)
-        if exact_any_global_match:
-            return exact_any_global_match
+def open_workbook(path):
+    """Open a workbook for parsing: read-only (streamed) with cached formula values. Callers must close() it."""
+    return load_workbook(path, read_only=True, data_only=True)
 
-        fuzzy_project_match = self._best_fuzzy(
-            key,
-            self.configured_project_indicators,
-            normalized_index,
-            minimum_overlap=max(3, len(set(key.split())) // 2),
-        )
-        if fuzzy_project_match:
-            return fuzzy_project_match
 
-        fuzzy_global_match = self._best_fuzzy(
-            key,
-            self.configured_indicators,
-            normalized_index,
-            minimum_overlap=max(3, len(set(key.split())) // 2),
-        )
-        if fuzzy_global_match:
-            return fuzzy_global_match
+def cell_value(values: tuple, index: int):
+    return values[index] if index < len(values) else None
 
-        fuzzy_any_project_match = self._best_fuzzy(
-            key,
-            self.project_indicators,
-            normalized_index,
-            minimum_overlap=max(3, len(set(key.split())) // 2),
-        )
-        if fuzzy_any_project_match:
-            return fuzzy_any_project_match
 
-        return self._best_fuzzy(
-            key,
-            self.indicators,
-            normalized_index,
-            minimum_overlap=max(3, len(set(key.split())) // 2),
-        )
-
-    def remember(self, indicator: Indicator):
-        if indicator.id not in {item.id for item in self.indicators}:
-            self.indicators.append(indicator)
-            if not is_auto_indicator(indicator):
-                self.configured_indicators.append(indicator)
-
-        if indicator.id in self.project_indicator_ids and indicator.id not in {
-            item.id for item in self.project_indicators
-        }:
-            self.project_indicators.append(indicator)
-            if not is_auto_indicator(indicator):
-                self.configured_project_indicators.append(indicator)
-
-        section_index = extract_section_index_from_code(indicator.code)
-        if section_index:
-            self.indicators_by_index.setdefault(section_index, []).append(indicator)
-            if indicator.id in self.project_indicator_ids:
-                self.project_indicators_by_index.setdefault(section_index, []).append(indicator)
-
-
-def snapshot_row(ws, row_number: int) -> dict:
-    return {
-        column: ws[f"{column}{row_number}"].value
-        for column in ["B", "C", "E", "F", *AGE_COLUMNS, "AA"]
-    }
+def snapshot_row(values: tuple) -> dict:
+    return {column: cell_value(values, index) for column, index in SNAPSHOT_COLUMN_INDEXES}
 
 
 def parse_matrix_sheet(ws) -> dict[str, dict]:
     assignments = {}
     current_org_name = None
-    for row_number in range(6, ws.max_row + 1):
-        organization_name = str(ws[f"A{row_number}"].value or "").strip()
+    columns = MATRIX_COLUMN_INDEXES
+    for values in ws.iter_rows(min_row=6, max_col=columns["N"] + 1, values_only=True):
+        organization_name = str(cell_value(values, columns["A"]) or "").strip()
         if organization_name:
             current_org_name = organization_name
 
-        indicator_title = str(ws[f"N{row_number}"].value or "").strip()
+        indicator_title = str(cell_value(values, columns["N"]) or "").strip()
         if not current_org_name or not indicator_title:
             continue
 
@@ -1003,10 +1061,10 @@ def parse_matrix_sheet(ws) -> dict[str, dict]:
         entry["assignments"].append(
             {
                 "organization_name": current_org_name,
-                "q1_target": to_decimal(ws[f"I{row_number}"].value) or Decimal("0"),
-                "q2_target": to_decimal(ws[f"J{row_number}"].value) or Decimal("0"),
-                "q3_target": to_decimal(ws[f"K{row_number}"].value) or Decimal("0"),
-                "q4_target": to_decimal(ws[f"L{row_number}"].value) or Decimal("0"),
+                "q1_target": to_decimal(cell_value(values, columns["I"])) or Decimal("0"),
+                "q2_target": to_decimal(cell_value(values, columns["J"])) or Decimal("0"),
+                "q3_target": to_decimal(cell_value(values, columns["K"])) or Decimal("0"),
+                "q4_target": to_decimal(cell_value(values, columns["L"])) or Decimal("0"),
             }
         )
     return assignments
@@ -1015,9 +1073,10 @@ def parse_matrix_sheet(ws) -> dict[str, dict]:
 def parse_sections(ws) -> list[dict]:
     sections = []
     current = None
-    for row_number in range(1, ws.max_row + 1):
-        index_value = str(ws[f"B{row_number}"].value or "").strip()
-        title = str(ws[f"C{row_number}"].value or "").strip()
+    for values in ws.iter_rows(max_col=SNAPSHOT_MAX_COLUMN, values_only=True):
+        row = snapshot_row(values)
+        index_value = str(row["B"] or "").strip()
+        title = str(row["C"] or "").strip()
         is_section_start = bool(title) and bool(SECTION_INDEX_PATTERN.fullmatch(index_value))
 
         if is_section_start:
@@ -1026,12 +1085,12 @@ def parse_sections(ws) -> list[dict]:
             current = {
                 "index": index_value,
                 "title": title,
-                "rows": [snapshot_row(ws, row_number)],
+                "rows": [row],
             }
             continue
 
         if current:
-            current["rows"].append(snapshot_row(ws, row_number))
+            current["rows"].append(row)
 
     if current:
         sections.append(current)
@@ -1198,48 +1257,51 @@ class Command(BaseCommand):
             if not coordinator:
                 raise CommandError(f"Coordinator organization not found: {options['coordinator_id']}")
 
-        workbook = load_workbook(workbook_path, data_only=True)
-        matrix_sheet_name = find_matrix_sheet_name(list(workbook.sheetnames))
-        if not matrix_sheet_name:
-            raise CommandError("Workbook is missing the Indicator matrix sheet.")
-
-        matrix_assignments = parse_matrix_sheet(workbook[matrix_sheet_name])
-        organization_resolver = OrganizationResolver()
-        indicator_resolver = IndicatorResolver(project=project)
-
-        sheet_payloads = []
-        for sheet_name in workbook.sheetnames:
-            if is_skipped_sheet(sheet_name):
-                continue
-
-            organization = organization_resolver.resolve(sheet_name)
-            if not organization:
-                self.stderr.write(f"Skipping sheet '{sheet_name}': organization could not be resolved.")
-                continue
-
-            sections = parse_sections(workbook[sheet_name])
-            parsed_sections = []
-            age_band_by_column = get_age_band_mapping(organization, coordinator)
-            for section in sections:
-                value, disaggregations = extract_section_value(
-                    section,
-                    age_band_by_column=age_band_by_column,
-                )
-                parsed_sections.append(
+        workbook = open_workbook(workbook_path)
+        try:
+            matrix_sheet_name = find_matrix_sheet_name(list(workbook.sheetnames))
+            if not matrix_sheet_name:
+                raise CommandError("Workbook is missing the Indicator matrix sheet.")
+
+            matrix_assignments = parse_matrix_sheet(workbook[matrix_sheet_name])
+            organization_resolver = OrganizationResolver()
+            indicator_resolver = IndicatorResolver(project=project)
+
+            sheet_payloads = []
+            for sheet_name in workbook.sheetnames:
+                if is_skipped_sheet(sheet_name):
+                    continue
+
+                organization = organization_resolver.resolve(sheet_name)
+                if not organization:
+                    self.stderr.write(f"Skipping sheet '{sheet_name}': organization could not be resolved.")
+                    continue
+
+                sections = parse_sections(workbook[sheet_name])
+                parsed_sections = []
+                age_band_by_column = get_age_band_mapping(organization, coordinator)
+                for section in sections:
+                    value, disaggregations = extract_section_value(
+                        section,
+                        age_band_by_column=age_band_by_column,
+                    )
+                    parsed_sections.append(
+                        {
+                            "title": section["title"],
+                            "index": section["index"],
+                            "value": value,
+                            "disaggregations": disaggregations,
+                        }
+                    )
+                sheet_payloads.append(
                     {
-                        "title": section["title"],
-                        "index": section["index"],
-                        "value": value,
-                        "disaggregations": disaggregations,
+                        "sheet_name": sheet_name,
+                        "organization": organization,
+                        "sections": parsed_sections,
                     }
                 )
-            sheet_payloads.append(
-                {
-                    "sheet_name": sheet_name,
-                    "organization": organization,
-                    "sections": parsed_sections,
-                }
-            )
+        finally:
+            workbook.close()
 
         if options["dry_run"]:
             self.stdout.write(self.style.WARNING("Dry run only. No database changes were written."))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from uploads.jobs import claim_next_import_job, requeue_stale_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = "Process queued workbook import jobs (analyze/confirm) from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process every queued job, then exit instead of polling")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs (0 = no limit)")
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=1800.0,
+            help="Seconds without a heartbeat after which a processing job is considered abandoned and requeued",
+        )
+        parser.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress writes")
+        parser.add_argument(
+            "--heartbeat-interval",
+            type=float,
+            default=60.0,
+            help="Seconds between heartbeats of a running job; keep well below --stale-after",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            close_old_connections()
+            requeue_stale_jobs(options["stale_after"])
+            job = claim_next_import_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running {job.task} for import job {job.id}")
+            run_import_job(
+                job,
+                progress_interval=options["progress_interval"],
+                heartbeat_interval=options["heartbeat_interval"],
+            )
+            job.refresh_from_db(fields=["status"])
+            self.stdout.write(f"Import job {job.id} finished with status {job.status}")
+
+            processed += 1
+            if options["max_jobs"] and processed >= options["max_jobs"]:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Import worker stopped after {processed} job(s)."))
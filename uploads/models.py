@@ -21,6 +21,7 @@ class Upload(models.Model):
     file_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='document')
     file_size = models.PositiveIntegerField(default=0)
     mime_type = models.CharField(max_length=100, blank=True)
+    checksum = models.CharField(max_length=64, blank=True, db_index=True)
     
     description = models.TextField(blank=True)
     
@@ -68,13 +69,32 @@ class ImportJob(models.Model):
     
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('queued', 'Queued'),
         ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
     ]
+    TASK_CHOICES = [
+        ('analyze', 'Analyze workbook'),
+        ('confirm', 'Confirm workbook import'),
+    ]
     
     upload = models.ForeignKey(Upload, on_delete=models.CASCADE, related_name='import_jobs')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Background work picked up by the run_import_worker command.
+    task = models.CharField(max_length=20, choices=TASK_CHOICES, blank=True)
+    task_options = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='requested_import_jobs'
+    )
+    queued_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
     
     total_rows = models.PositiveIntegerField(default=0)
     processed_rows = models.PositiveIntegerField(default=0)
@@ -96,11 +116,28 @@ class ImportJob(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'queued_at'])]
     
     def __str__(self):
         return f"Import: {self.upload.name} ({self.status})"
 
 
+class ParsedWorkbook(models.Model):
+    """Parsed form of a reporting workbook, shared by every upload with the same file checksum."""
+
+    checksum = models.CharField(max_length=64)
+    parser_version = models.PositiveSmallIntegerField()
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['checksum', 'parser_version']
+
+    def __str__(self):
+        return f"Parsed workbook {self.checksum[:12]} (v{self.parser_version})"
+
+
 class WorkbookTemplate(models.Model):
     """Stored workbook template metadata for report workbook imports/exports."""
 
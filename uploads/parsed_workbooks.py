@@ -0,0 +1,221 @@
+"""
+Checksum-keyed cache of parsed reporting workbooks.
+
+Opening and scanning a workbook with openpyxl is the expensive part of an
+import, so the sheet contents the importer needs (matrix assignments, section
+rows and metadata cells) are parsed once per distinct file and stored as a
+``ParsedWorkbook`` row. Analyze, confirm and any re-upload of an identical
+file read that row instead of the spreadsheet.
+
+Read-only worksheets do not load merge definitions, so merged cell ranges are
+read straight from the ``<mergeCell>`` elements of each sheet's XML part;
+streaming the parts keeps the cost flat however many cells a sheet holds.
+
+Section values are not stored: ``extract_section_value`` depends on the age
+band layout of the organization each sheet resolves to, and is cheap to run
+over the cached rows.
+"""
+import datetime
+import hashlib
+import posixpath
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from django.db import IntegrityError, transaction
+
+from uploads.management.commands.import_reporting_workbook import (
+    SNAPSHOT_COLUMNS,
+    decimal_to_json_number,
+    find_matrix_sheet_name,
+    is_skipped_sheet,
+    open_workbook,
+    parse_matrix_sheet,
+    parse_sections,
+    to_decimal,
+)
+
+from .models import ParsedWorkbook, Upload
+
+# Bump whenever parse_sections/parse_matrix_sheet or the stored layout changes so stale parses are ignored.
+PARSER_VERSION = 3
+METADATA_COLUMNS = ("A", "B", "C", "D", "E", "F")
+METADATA_ROWS = 8
+METADATA_CELL_LIMIT = 12
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+MERGED_RANGE_LIMIT = 20
+SHEET_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_ID_ATTRIBUTE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def upload_checksum(upload: Upload) -> str:
+    """Return the SHA-256 of the uploaded file, computing and storing it on first use."""
+    if upload.checksum:
+        return upload.checksum
+    digest = hashlib.sha256()
+    with upload.file.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHECKSUM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    upload.checksum = digest.hexdigest()
+    Upload.objects.filter(pk=upload.pk).update(checksum=upload.checksum)
+    return upload.checksum
+
+
+def _json_cell(value):
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+        return str(value)
+    return value
+
+
+def _pack_row(row: dict) -> list:
+    values = [_json_cell(row.get(column)) for column in SNAPSHOT_COLUMNS]
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+def _unpack_row(values: list) -> dict:
+    row = dict.fromkeys(SNAPSHOT_COLUMNS)
+    row.update(zip(SNAPSHOT_COLUMNS, values))
+    return row
+
+
+def _metadata_cells(ws) -> dict:
+    cells = {}
+    for row_number, values in enumerate(
+        ws.iter_rows(max_row=METADATA_ROWS, max_col=len(METADATA_COLUMNS), values_only=True), start=1
+    ):
+        for column, value in zip(METADATA_COLUMNS, values):
+            if value not in (None, "") and len(cells) < METADATA_CELL_LIMIT:
+                cells[f"{column}{row_number}"] = str(value).strip()
+    return cells
+
+
+def _sheet_parts(archive: zipfile.ZipFile) -> dict[str, str]:
+    """Map each sheet name to the archive path of its worksheet XML."""
+    targets = {}
+    with archive.open("xl/_rels/workbook.xml.rels") as handle:
+        for relationship in ElementTree.parse(handle).getroot().iter(f"{PACKAGE_REL_NS}Relationship"):
+            target = relationship.get("Target", "")
+            targets[relationship.get("Id")] = (
+                target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            )
+    with archive.open("xl/workbook.xml") as handle:
+        sheets = ElementTree.parse(handle).getroot().iter(f"{SHEET_MAIN_NS}sheet")
+        return {sheet.get("name"): targets[sheet.get(REL_ID_ATTRIBUTE)] for sheet in sheets if sheet.get(REL_ID_ATTRIBUTE) in targets}
+
+
+def _merged_ranges(path) -> dict[str, list[str]]:
+    """Return up to MERGED_RANGE_LIMIT merged ranges per sheet without loading any cells."""
+    merged = {}
+    with zipfile.ZipFile(path) as archive:
+        for sheet_name, part in _sheet_parts(archive).items():
+            ranges = []
+            with archive.open(part) as handle:
+                for _, element in ElementTree.iterparse(handle):
+                    if element.tag == f"{SHEET_MAIN_NS}mergeCell" and element.get("ref"):
+                        ranges.append(element.get("ref"))
+                        if len(ranges) >= MERGED_RANGE_LIMIT:
+                            break
+                    element.clear()
+            merged[sheet_name] = ranges
+    return merged
+
+
+def parse_workbook_file(path) -> dict:
+    """Scan every sheet once and return the JSON-serializable parse stored on ``ParsedWorkbook.data``."""
+    workbook = open_workbook(path)
+    try:
+        sheet_names = list(workbook.sheetnames)
+        matrix_sheet_name = find_matrix_sheet_name(sheet_names)
+        matrix_assignments = {}
+        if matrix_sheet_name:
+            for key, bundle in parse_matrix_sheet(workbook[matrix_sheet_name]).items():
+                matrix_assignments[key] = {
+                    "title": bundle["title"],
+                    "assignments": [
+                        {
+                            field: decimal_to_json_number(value) if field.endswith("_target") else value
+                            for field, value in assignment.items()
+                        }
+                        for assignment in bundle["assignments"]
+                    ],
+                }
+
+        sheets = {}
+        for sheet_name in sheet_names:
+            ws = workbook[sheet_name]
+            sheet = {"max_row": ws.max_row or 1, "metadata_cells": _metadata_cells(ws)}
+            if sheet_name != matrix_sheet_name and not is_skipped_sheet(sheet_name):
+                sheet["sections"] = [
+                    {
+                        "index": section["index"],
+                        "title": section["title"],
+                        "rows": [_pack_row(row) for row in section["rows"]],
+                    }
+                    for section in parse_sections(ws)
+                ]
+            sheets[sheet_name] = sheet
+    finally:
+        workbook.close()
+
+    for sheet_name, merged_ranges in _merged_ranges(path).items():
+        if sheet_name in sheets:
+            sheets[sheet_name]["merged_ranges"] = merged_ranges
+    return {
+        "sheet_names": sheet_names,
+        "matrix_sheet": matrix_sheet_name,
+        "matrix_assignments": matrix_assignments,
+        "sheets": sheets,
+    }
+
+
+def get_parsed_workbook(upload: Upload) -> dict:
+    """Return the cached parse for ``upload``'s file, parsing and storing it if this checksum is new."""
+    checksum = upload_checksum(upload)
+    cached = (
+        ParsedWorkbook.objects.filter(checksum=checksum, parser_version=PARSER_VERSION)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if cached is not None:
+        return cached
+
+    data = parse_workbook_file(upload.file.path)
+    try:
+        with transaction.atomic():
+            ParsedWorkbook.objects.create(checksum=checksum, parser_version=PARSER_VERSION, data=data)
+    except IntegrityError:
+        # Another worker stored the same file first; both parses are identical.
+        pass
+    return data
+
+
+def parsed_matrix_assignments(parsed: dict) -> dict[str, dict]:
+    """Matrix assignments in the shape returned by ``parse_matrix_sheet``."""
+    return {
+        key: {
+            "title": bundle["title"],
+            "assignments": [
+                {
+                    field: (to_decimal(value) or Decimal("0")) if field.endswith("_target") else value
+                    for field, value in assignment.items()
+                }
+                for assignment in bundle["assignments"]
+            ],
+        }
+        for key, bundle in parsed["matrix_assignments"].items()
+    }
+
+
+def parsed_sheet_sections(parsed: dict, sheet_name: str) -> list[dict]:
+    """Sections of ``sheet_name`` in the shape returned by ``parse_sections``."""
+    return [
+        {
+            "index": section["index"],
+            "title": section["title"],
+            "rows": [_unpack_row(values) for values in section["rows"]],
+        }
+        for section in parsed["sheets"][sheet_name].get("sections", [])
+    ]
@@ -3,8 +3,8 @@ from decimal import Decimal
 from pathlib import Path
 
 from django.db import transaction
-from django.core.files.base import ContentFile
-from django.http import Http404, HttpResponse
+from django.core.files import File
+from django.http import FileResponse, Http404
 from django.utils import timezone
 from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action
@@ -12,11 +12,12 @@ from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from aggregates.changes import record_aggregate_changes
 from aggregates.models import Aggregate
+from core.exports import XLSX_CONTENT_TYPE, save_workbook_to_tempfile, write_only_workbook
 from indicators.models import Indicator
 from organizations.models import Organization
 from projects.models import Project, ProjectIndicator, ProjectIndicatorOrganizationTarget
-from openpyxl import Workbook
 from uploads.management.commands.import_reporting_workbook import (
     IndicatorResolver,
     OrganizationResolver,
@@ -24,16 +25,15 @@ from uploads.management.commands.import_reporting_workbook import (
     build_ordered_sub_labels,
     canonical_indicator_name,
     extract_section_value,
-    find_matrix_sheet_name,
     get_age_band_mapping,
     is_skipped_sheet,
     merge_disaggregation_configs,
     merge_json_values,
-    parse_matrix_sheet,
-    parse_sections,
     unique_indicator_code,
 )
 
+from .jobs import enqueue_import_job
+from .parsed_workbooks import get_parsed_workbook, parsed_matrix_assignments, parsed_sheet_sections
 from .models import ImportJob, Upload, WorkbookExportJob, WorkbookTemplate
 from .serializers import CreateMissingIndicatorsSerializer
 from .views import _resolve_assignment_organization, _sanitize_indicator_code, _to_decimal
@@ -119,13 +119,13 @@ def _parse_reporting_period(period_label: str | None) -> tuple[str, str, int]:
     return f"{year + 1}-01-01", f"{year + 1}-03-31", 4
 
 
-def _get_workbook(upload: Upload):
+def _get_parsed_workbook(upload: Upload) -> dict:
     if load_workbook is None:
         raise serializers.ValidationError({"detail": "Workbook support is not available."})
     path = Path(upload.file.path)
     if not path.exists():
         raise Http404("Uploaded workbook file could not be found.")
-    return load_workbook(path, data_only=True)
+    return get_parsed_workbook(upload)
 
 
 def _update_status(job: ImportJob, value: str) -> None:
@@ -134,6 +134,10 @@ def _update_status(job: ImportJob, value: str) -> None:
     _set_payload(job, SESSION_KEY, session)
 
 
+def _already_processing() -> Response:
+    return Response({"detail": "This workbook is already being processed."}, status=status.HTTP_409_CONFLICT)
+
+
 def _session_status(job: ImportJob) -> str:
     return _get_payload(job, SESSION_KEY).get("status") or "uploaded"
 
@@ -148,6 +152,9 @@ def _serialize_session(job: ImportJob) -> dict:
         "id": job.id,
         "file_name": job.upload.file.name.split("/")[-1] if job.upload.file else job.upload.name,
         "status": _session_status(job),
+        "job_status": job.status,
+        "processed_rows": job.processed_rows,
+        "total_rows": job.total_rows,
         "project": project.id if project else None,
         "project_name": project.name if project else None,
         "organization": organization.id if organization else None,
@@ -270,8 +277,8 @@ def _build_missing_indicator_candidate(
     }
 
 
-def _analyze_workbook(job: ImportJob) -> dict:
-    workbook = _get_workbook(job.upload)
+def _analyze_workbook(job: ImportJob, progress=None) -> dict:
+    parsed = _get_parsed_workbook(job.upload)
     session = _get_payload(job, SESSION_KEY)
     project = Project.objects.filter(id=session.get("project")).first() if session.get("project") else None
     indicator_resolver = IndicatorResolver(project=project) if project else IndicatorResolver()
@@ -280,8 +287,8 @@ def _analyze_workbook(job: ImportJob) -> dict:
     assignments = []
     missing = []
     sheets = []
-    names = list(workbook.sheetnames)
-    matrix_sheet_name = find_matrix_sheet_name(names)
+    names = parsed["sheet_names"]
+    matrix_sheet_name = parsed["matrix_sheet"]
     if not matrix_sheet_name:
         issues.append(
             {
@@ -302,19 +309,13 @@ def _analyze_workbook(job: ImportJob) -> dict:
             "financial_year_start_month": 4,
         }
 
-    matrix_assignments = parse_matrix_sheet(workbook[matrix_sheet_name])
+    matrix_assignments = parsed_matrix_assignments(parsed)
     row_count = 0
     skipped_count = 0
     for index, sheet_name in enumerate(names):
-        ws = workbook[sheet_name]
-        title_blocks = []
-        metadata_cells = {}
-        for row_number in range(1, min(ws.max_row, 8) + 1):
-            for column in ("A", "B", "C", "D", "E", "F"):
-                value = ws[f"{column}{row_number}"].value
-                if value not in (None, "") and len(metadata_cells) < 12:
-                    metadata_cells[f"{column}{row_number}"] = str(value).strip()
-                    title_blocks.append(str(value).strip())
+        parsed_sheet = parsed["sheets"][sheet_name]
+        metadata_cells = parsed_sheet["metadata_cells"]
+        title_blocks = list(metadata_cells.values())
 
         role = "unknown"
         detected_org = None
@@ -333,7 +334,7 @@ def _analyze_workbook(job: ImportJob) -> dict:
             if organization:
                 role = "organization_report"
                 detected_org = organization.name
-                sections = parse_sections(ws)
+                sections = parsed_sheet_sections(parsed, sheet_name)
                 row_count += len(sections)
                 age_band_by_column = get_age_band_mapping(
                     organization,
@@ -345,7 +346,7 @@ def _analyze_workbook(job: ImportJob) -> dict:
                     {
                         "title": sheet_name,
                         "start_cell": "A1",
-                        "end_cell": f"AA{ws.max_row}",
+                        "end_cell": f"AA{parsed_sheet['max_row']}",
                         "header_rows": [1, 2, 3],
                         "row_label_columns": ["B", "C", "E", "F"],
                         "column_headers": list(age_band_by_column.values()),
@@ -406,7 +407,7 @@ def _analyze_workbook(job: ImportJob) -> dict:
                 "detected_organization": detected_org,
                 "detected_project": project.name if project else None,
                 "detected_reporting_period": session.get("reporting_period"),
-                "merged_ranges": [str(cell_range) for cell_range in list(ws.merged_cells.ranges)[:20]],
+                "merged_ranges": parsed_sheet.get("merged_ranges", []),
                 "title_blocks": title_blocks[:10],
                 "metadata_cells": metadata_cells,
                 "table_previews": table_previews,
@@ -415,6 +416,8 @@ def _analyze_workbook(job: ImportJob) -> dict:
                 "issues": sheet_issues,
             }
         )
+        if progress:
+            progress(row_count)
 
     deduped_missing = []
     seen = set()
@@ -553,17 +556,191 @@ def _apply_missing_indicators(job: ImportJob, payload: dict, user) -> None:
                     project.organizations.add(*resolved_organizations.values())
 
 
-def _confirm_import(job: ImportJob, payload: dict, user) -> dict:
+def _parse_organization_payloads(parsed: dict, organization_resolver, coordinator, progress=None) -> list[dict]:
+    organization_payloads = []
+    for sheet_name in parsed["sheet_names"]:
+        if is_skipped_sheet(sheet_name):
+            continue
+        organization = organization_resolver.resolve(sheet_name)
+        if not organization:
+            continue
+        age_band_by_column = get_age_band_mapping(organization, coordinator)
+        sections = []
+        for section in parsed_sheet_sections(parsed, sheet_name):
+            value, disaggregations = extract_section_value(section, age_band_by_column=age_band_by_column)
+            sections.append(
+                {
+                    "title": section["title"],
+                    "index": section["index"],
+                    "value": value,
+                    "disaggregations": disaggregations,
+                }
+            )
+        organization_payloads.append({"organization": organization, "sections": sections})
+        if progress:
+            progress(sum(len(item["sections"]) for item in organization_payloads))
+    return organization_payloads
+
+
+TARGET_QUARTER_FIELDS = ("q1_target", "q2_target", "q3_target", "q4_target")
+BULK_BATCH_SIZE = 500
+
+
+def _link_project_organizations(project: Project, organization_ids: set[int]) -> None:
+    through = Project.organizations.through
+    through.objects.bulk_create(
+        [through(project_id=project.id, organization_id=organization_id) for organization_id in organization_ids],
+        ignore_conflicts=True,
+    )
+
+
+def _link_indicator_organizations(links: set[tuple[int, int]]) -> None:
+    through = Indicator.organizations.through
+    through.objects.bulk_create(
+        [through(indicator_id=indicator_id, organization_id=organization_id) for indicator_id, organization_id in links],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _ensure_project_indicators(project: Project, indicators: dict) -> dict[int, ProjectIndicator]:
+    """Return ``{indicator_id: ProjectIndicator}`` for ``indicators``, creating the missing links in one insert."""
+    existing = {item.indicator_id: item for item in ProjectIndicator.objects.filter(project=project, indicator_id__in=indicators)}
+    missing = [ProjectIndicator(project=project, indicator_id=indicator_id) for indicator_id in indicators if indicator_id not in existing]
+    if missing:
+        ProjectIndicator.objects.bulk_create(missing, batch_size=BULK_BATCH_SIZE)
+        existing = {
+            item.indicator_id: item for item in ProjectIndicator.objects.filter(project=project, indicator_id__in=indicators)
+        }
+    return existing
+
+
+def _upsert_organization_targets(project_indicators: dict, target_values: dict) -> None:
+    """Write imported quarterly targets and refresh each affected project indicator's rollups once."""
+    if not target_values:
+        return
+    affected_ids = {project_indicators[indicator_id].id for indicator_id, _ in target_values}
+    existing = {
+        (target.project_indicator_id, target.organization_id): target
+        for target in ProjectIndicatorOrganizationTarget.objects.filter(project_indicator_id__in=affected_ids)
+    }
+    to_create = []
+    to_update = []
+    for (indicator_id, organization_id), quarters in target_values.items():
+        key = (project_indicators[indicator_id].id, organization_id)
+        target = existing.get(key)
+        if target is None:
+            target = ProjectIndicatorOrganizationTarget(project_indicator_id=key[0], organization_id=organization_id)
+            to_create.append(target)
+        else:
+            to_update.append(target)
+        for field, value in zip(TARGET_QUARTER_FIELDS, quarters):
+            setattr(target, field, value)
+        target.target_value = sum((ProjectIndicator._to_decimal(value) for value in quarters), Decimal("0"))
+
+    ProjectIndicatorOrganizationTarget.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    ProjectIndicatorOrganizationTarget.objects.bulk_update(
+        to_update, [*TARGET_QUARTER_FIELDS, "target_value"], batch_size=BULK_BATCH_SIZE
+    )
+
+    rollups = list(ProjectIndicator.objects.filter(id__in=affected_ids).prefetch_related("organization_targets"))
+    for project_indicator in rollups:
+        project_indicator.refresh_rollups(save=False)
+    ProjectIndicator.objects.bulk_update(
+        rollups,
+        [*TARGET_QUARTER_FIELDS, "target_value", "current_value", "baseline_value"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def _upsert_imported_aggregates(
+    project: Project,
+    period_start,
+    period_end,
+    user,
+    section_rows: list[tuple[int, int, dict]],
+    coordinator: Organization | None,
+    coordinator_rollups: dict,
+    replace_existing: bool,
+) -> None:
+    """
+    Apply imported section values to the period's aggregates with one read and batched writes.
+
+    Rows for an existing aggregate replace its value when ``replace_existing`` is set and are
+    merged into it otherwise; coordinator rollups always replace.
+    """
+    organization_ids = {organization_id for _, organization_id, _ in section_rows}
+    if coordinator:
+        organization_ids.add(coordinator.id)
+    indicator_ids = {indicator_id for indicator_id, _, _ in section_rows}
+    aggregates = {
+        (aggregate.indicator_id, aggregate.organization_id): aggregate
+        for aggregate in Aggregate.objects.filter(
+            project=project,
+            period_start=period_start,
+            period_end=period_end,
+            organization_id__in=organization_ids,
+            indicator_id__in=indicator_ids,
+        )
+    }
+    to_create = {}
+    to_update = {}
+
+    def apply(indicator_id: int, organization_id: int, value, replace: bool, claim: bool = False) -> None:
+        key = (indicator_id, organization_id)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = Aggregate(
+                indicator_id=indicator_id,
+                project=project,
+                organization_id=organization_id,
+                period_start=period_start,
+                period_end=period_end,
+                value=value,
+                status=Aggregate.STATUS_PENDING,
+                created_by=user,
+            )
+            aggregates[key] = to_create[key] = aggregate
+            return
+        aggregate.value = value if replace else merge_json_values(aggregate.value, value)
+        aggregate.status = Aggregate.STATUS_PENDING
+        if claim or not aggregate.created_by_id:
+            aggregate.created_by = user
+        if key not in to_create:
+            to_update[key] = aggregate
+
+    for indicator_id, organization_id, value in section_rows:
+        apply(indicator_id, organization_id, value, replace_existing)
+    for indicator_id, value in coordinator_rollups.items():
+        apply(indicator_id, coordinator.id, value, replace=True, claim=True)
+
+    now = timezone.now()
+    for aggregate in [*to_create.values(), *to_update.values()]:
+        aggregate.refresh_value_totals()
+        aggregate.updated_at = now
+    Aggregate.objects.bulk_create(list(to_create.values()), batch_size=BULK_BATCH_SIZE)
+    Aggregate.objects.bulk_update(
+        list(to_update.values()),
+        ["value", *Aggregate.VALUE_TOTAL_FIELDS, "status", "created_by", "updated_at"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    record_aggregate_changes([*to_create.values(), *to_update.values()])
+
+
+def _confirm_import(job: ImportJob, payload: dict, user, progress=None) -> dict:
     session = _get_payload(job, SESSION_KEY)
     project = Project.objects.filter(id=session.get("project")).first() if session.get("project") else None
     if not project:
         raise serializers.ValidationError({"project": "A project must be selected before confirming import."})
 
     period_start, period_end, _ = _parse_reporting_period(session.get("reporting_period"))
-    workbook = _get_workbook(job.upload)
-    matrix_sheet_name = find_matrix_sheet_name(list(workbook.sheetnames))
-    if not matrix_sheet_name:
+    coordinator = Organization.objects.filter(id=session.get("organization")).first() if session.get("organization") else None
+    organization_resolver = OrganizationResolver()
+    parsed = _get_parsed_workbook(job.upload)
+    if not parsed["matrix_sheet"]:
         raise serializers.ValidationError({"detail": "Workbook is missing the Indicator matrix sheet."})
+    matrix_assignments = parsed_matrix_assignments(parsed)
+    organization_payloads = _parse_organization_payloads(parsed, organization_resolver, coordinator, progress)
 
     if payload.get("create_missing_indicators"):
         analysis = _get_payload(job, ANALYSIS_KEY)
@@ -599,37 +776,11 @@ def _confirm_import(job: ImportJob, payload: dict, user) -> dict:
         if missing_payload["indicators"]:
             _apply_missing_indicators(job, missing_payload, user)
 
-    coordinator = Organization.objects.filter(id=session.get("organization")).first() if session.get("organization") else None
-    matrix_assignments = parse_matrix_sheet(workbook[matrix_sheet_name])
-    organization_resolver = OrganizationResolver()
     indicator_resolver = IndicatorResolver(project=project)
     replace_period = payload.get("import_mode") == "replace_period"
     overwrite_existing = bool(payload.get("overwrite_existing"))
     apply_assignments = payload.get("apply_indicator_assignments", True)
 
-    organization_payloads = []
-    for sheet_name in workbook.sheetnames:
-        if is_skipped_sheet(sheet_name):
-            continue
-        organization = organization_resolver.resolve(sheet_name)
-        if not organization:
-            continue
-        age_band_by_column = get_age_band_mapping(organization, coordinator)
-        organization_payloads.append(
-            {
-                "organization": organization,
-                "sections": [
-                    {
-                        "title": section["title"],
-                        "index": section["index"],
-                        "value": extract_section_value(section, age_band_by_column=age_band_by_column)[0],
-                        "disaggregations": extract_section_value(section, age_band_by_column=age_band_by_column)[1],
-                    }
-                    for section in parse_sections(workbook[sheet_name])
-                ],
-            }
-        )
-
     scope_ids = [item["organization"].id for item in organization_payloads]
     if coordinator:
         scope_ids.append(coordinator.id)
@@ -644,100 +795,86 @@ def _confirm_import(job: ImportJob, payload: dict, user) -> dict:
     imported_rows = 0
     skipped_rows = 0
     issues = []
+    indicators = {}
+    changed_indicator_ids = set()
+    project_organization_ids = set()
+    indicator_organization_links = set()
+    target_values = {}
+    section_rows = []
     coordinator_rollups = {}
 
-    with transaction.atomic():
-        for payload_item in organization_payloads:
-            organization = payload_item["organization"]
-            project.organizations.add(organization)
-            for section in payload_item["sections"]:
-                indicator = indicator_resolver.resolve(section["title"], section["index"])
-                if not indicator:
-                    skipped_rows += 1
-                    issues.append(
-                        {
-                            "severity": "warning",
-                            "code": "indicator_missing",
-                            "message": f"Skipped '{section['title']}' for {organization.name} because no indicator could be resolved.",
-                            "sheet_name": organization.name,
-                            "cell_ref": None,
-                            "details": {"section_index": section["index"]},
-                        }
-                    )
-                    continue
-
-                sub_labels = build_ordered_sub_labels(section["disaggregations"], section["value"])
-                config = build_disaggregation_config(section["value"], sub_labels)
-                updated_fields = []
-                if sub_labels and not list(indicator.sub_labels or []):
-                    indicator.sub_labels = sub_labels
-                    updated_fields.append("sub_labels")
-                merged_config = merge_disaggregation_configs(indicator.aggregate_disaggregation_config, config)
-                if merged_config != dict(indicator.aggregate_disaggregation_config or {}):
-                    indicator.aggregate_disaggregation_config = merged_config
-                    updated_fields.append("aggregate_disaggregation_config")
-                if updated_fields:
-                    indicator.save(update_fields=updated_fields)
-
-                indicator.organizations.add(organization)
-                project_indicator, _ = ProjectIndicator.objects.get_or_create(project=project, indicator=indicator)
-                if apply_assignments:
-                    bundle = matrix_assignments.get(canonical_indicator_name(section["title"]))
-                    if bundle:
-                        for assignment in bundle["assignments"]:
-                            assigned_org = organization_resolver.resolve(assignment["organization_name"])
-                            if not assigned_org or assigned_org.id != organization.id:
-                                continue
-                            project.organizations.add(assigned_org)
-                            indicator.organizations.add(assigned_org)
-                            org_target, _ = ProjectIndicatorOrganizationTarget.objects.get_or_create(
-                                project_indicator=project_indicator,
-                                organization=assigned_org,
-                            )
-                            org_target.q1_target = assignment["q1_target"]
-                            org_target.q2_target = assignment["q2_target"]
-                            org_target.q3_target = assignment["q3_target"]
-                            org_target.q4_target = assignment["q4_target"]
-                            org_target.save()
-
-                aggregate, created = Aggregate.objects.get_or_create(
-                    indicator=indicator,
-                    project=project,
-                    organization=organization,
-                    period_start=period_start,
-                    period_end=period_end,
-                    defaults={"value": section["value"], "status": Aggregate.STATUS_PENDING, "created_by": user},
-                )
-                if not created:
-                    aggregate.value = section["value"] if overwrite_existing or replace_period else merge_json_values(aggregate.value, section["value"])
-                    aggregate.status = Aggregate.STATUS_PENDING
-                    if not aggregate.created_by:
-                        aggregate.created_by = user
-                    aggregate.save(update_fields=["value", "status", "created_by", "updated_at"])
-                imported_rows += 1
-
-                if coordinator:
-                    current = coordinator_rollups.get(indicator.id)
-                    coordinator_rollups[indicator.id] = {
-                        "indicator": indicator,
-                        "value": section["value"] if current is None else merge_json_values(current["value"], section["value"]),
+    for payload_item in organization_payloads:
+        organization = payload_item["organization"]
+        project_organization_ids.add(organization.id)
+        for section in payload_item["sections"]:
+            indicator = indicator_resolver.resolve(section["title"], section["index"])
+            if not indicator:
+                skipped_rows += 1
+                issues.append(
+                    {
+                        "severity": "warning",
+                        "code": "indicator_missing",
+                        "message": f"Skipped '{section['title']}' for {organization.name} because no indicator could be resolved.",
+                        "sheet_name": organization.name,
+                        "cell_ref": None,
+                        "details": {"section_index": section["index"]},
                     }
-
-        if coordinator:
-            for item in coordinator_rollups.values():
-                Aggregate.objects.update_or_create(
-                    indicator=item["indicator"],
-                    project=project,
-                    organization=coordinator,
-                    period_start=period_start,
-                    period_end=period_end,
-                    defaults={"value": item["value"], "status": Aggregate.STATUS_PENDING, "created_by": user},
                 )
+                continue
+
+            indicator = indicators.setdefault(indicator.id, indicator)
+            sub_labels = build_ordered_sub_labels(section["disaggregations"], section["value"])
+            config = build_disaggregation_config(section["value"], sub_labels)
+            if sub_labels and not list(indicator.sub_labels or []):
+                indicator.sub_labels = sub_labels
+                changed_indicator_ids.add(indicator.id)
+            merged_config = merge_disaggregation_configs(indicator.aggregate_disaggregation_config, config)
+            if merged_config != dict(indicator.aggregate_disaggregation_config or {}):
+                indicator.aggregate_disaggregation_config = merged_config
+                changed_indicator_ids.add(indicator.id)
+
+            indicator_organization_links.add((indicator.id, organization.id))
+            if apply_assignments:
+                bundle = matrix_assignments.get(canonical_indicator_name(section["title"]))
+                for assignment in bundle["assignments"] if bundle else []:
+                    assigned_org = organization_resolver.resolve(assignment["organization_name"])
+                    if not assigned_org or assigned_org.id != organization.id:
+                        continue
+                    target_values[(indicator.id, organization.id)] = [
+                        assignment[field] for field in TARGET_QUARTER_FIELDS
+                    ]
+
+            section_rows.append((indicator.id, organization.id, section["value"]))
+            imported_rows += 1
+            if coordinator:
+                current = coordinator_rollups.get(indicator.id)
+                coordinator_rollups[indicator.id] = section["value"] if current is None else merge_json_values(current, section["value"])
+
+    with transaction.atomic():
+        _link_project_organizations(project, project_organization_ids)
+        _link_indicator_organizations(indicator_organization_links)
+        if changed_indicator_ids:
+            Indicator.objects.bulk_update(
+                [indicators[indicator_id] for indicator_id in changed_indicator_ids],
+                ["sub_labels", "aggregate_disaggregation_config"],
+            )
+        project_indicators = _ensure_project_indicators(project, indicators)
+        _upsert_organization_targets(project_indicators, target_values)
+        _upsert_imported_aggregates(
+            project,
+            period_start,
+            period_end,
+            user,
+            section_rows,
+            coordinator,
+            coordinator_rollups,
+            replace_existing=overwrite_existing or replace_period,
+        )
 
     return {
         "summary": _build_summary(
             sheets_scanned=len(organization_payloads) + 1,
-            sheets_skipped=max(0, len(workbook.sheetnames) - (len(organization_payloads) + 1)),
+            sheets_skipped=max(0, len(parsed["sheet_names"]) - (len(organization_payloads) + 1)),
             rows_imported=imported_rows,
             rows_skipped=skipped_rows,
             assignments_detected=sum(len(bundle.get("assignments", [])) for bundle in matrix_assignments.values()),
@@ -749,6 +886,75 @@ def _confirm_import(job: ImportJob, payload: dict, user) -> dict:
     }
 
 
+def _finish_job(job: ImportJob, job_status: str, summary: dict) -> None:
+    job.status = job_status
+    job.total_rows = summary["rows_imported"] + summary["rows_skipped"]
+    job.processed_rows = job.total_rows
+    job.successful_rows = summary["rows_imported"]
+    job.failed_rows = summary["rows_skipped"]
+    job.completed_at = timezone.now()
+    job.save(update_fields=["errors", "status", "total_rows", "processed_rows", "successful_rows", "failed_rows", "completed_at"])
+
+
+def _run_analysis(job: ImportJob, progress=None) -> None:
+    analysis = _analyze_workbook(job, progress=progress)
+    template = _upsert_template_from_analysis(job, analysis)
+    session = _get_payload(job, SESSION_KEY)
+    session["template_id"] = template.id
+    _set_payload(job, SESSION_KEY, session)
+    _set_payload(job, ANALYSIS_KEY, analysis)
+    _update_status(job, "ready_for_review" if not analysis["summary"]["errors"] else "failed")
+    _finish_job(job, "completed" if not analysis["summary"]["errors"] else "failed", analysis["summary"])
+
+
+def _run_confirm(job: ImportJob, payload: dict, user, progress=None) -> None:
+    result = _confirm_import(job, payload, user, progress=progress)
+    analysis = _get_payload(job, ANALYSIS_KEY)
+    analysis["summary"] = result["summary"]
+    analysis["issues"] = result["issues"]
+    _set_payload(job, ANALYSIS_KEY, analysis)
+    _update_status(job, "imported")
+    _finish_job(job, "completed", result["summary"])
+
+
+def run_workbook_task(job: ImportJob, progress=None) -> None:
+    """Run the task a worker claimed for ``job`` (see uploads.jobs)."""
+    if job.task == "analyze":
+        _run_analysis(job, progress=progress)
+    elif job.task == "confirm":
+        _run_confirm(job, job.task_options or {}, job.requested_by, progress=progress)
+    else:
+        raise ValueError(f"Unknown import task: {job.task!r}")
+
+
+def _error_message(exc: Exception) -> str:
+    detail = getattr(exc, "detail", None)
+    if isinstance(detail, dict):
+        return "; ".join(str(value[0] if isinstance(value, list) else value) for value in detail.values())
+    if isinstance(detail, list):
+        return "; ".join(str(value) for value in detail)
+    return str(exc) or exc.__class__.__name__
+
+
+def fail_workbook_job(job: ImportJob, exc: Exception) -> None:
+    analysis = _get_payload(job, ANALYSIS_KEY)
+    analysis["issues"] = list(analysis.get("issues") or []) + [
+        {
+            "severity": "error",
+            "code": "job_failed",
+            "message": _error_message(exc),
+            "sheet_name": None,
+            "cell_ref": None,
+            "details": {"task": job.task},
+        }
+    ]
+    _set_payload(job, ANALYSIS_KEY, analysis)
+    _update_status(job, "failed")
+    job.status = "failed"
+    job.completed_at = timezone.now()
+    job.save(update_fields=["errors", "status", "completed_at"])
+
+
 def _serialize_template(template: WorkbookTemplate) -> dict:
     return {
         "id": template.id,
@@ -765,9 +971,7 @@ def _serialize_template(template: WorkbookTemplate) -> dict:
 
 def _build_export_workbook(job: WorkbookExportJob, include_validation_summary: bool = True) -> Upload:
     period_start, period_end, _ = _parse_reporting_period(job.reporting_period)
-    aggregates = Aggregate.objects.filter(project=job.project, period_start=period_start, period_end=period_end).select_related(
-        "indicator", "organization"
-    )
+    aggregates = Aggregate.objects.filter(project=job.project, period_start=period_start, period_end=period_end)
     if job.scope == "single_organization" and job.organization_id:
         aggregates = aggregates.filter(organization_id=job.organization_id)
     elif job.scope == "coordinator" and job.coordinator_id:
@@ -777,9 +981,8 @@ def _build_export_workbook(job: WorkbookExportJob, include_validation_summary: b
         if organization_ids:
             aggregates = aggregates.filter(organization_id__in=organization_ids)
 
-    workbook = Workbook()
-    summary_ws = workbook.active
-    summary_ws.title = "Summary"
+    workbook = write_only_workbook()
+    summary_ws = workbook.create_sheet(title="Summary")
     summary_ws.append(["Project", job.project.name])
     summary_ws.append(["Reporting period", job.reporting_period])
     summary_ws.append(["Scope", job.scope])
@@ -792,34 +995,22 @@ def _build_export_workbook(job: WorkbookExportJob, include_validation_summary: b
 
     organization_sheets = {}
     row_count = 0
-    for aggregate in aggregates.order_by("organization__name", "indicator__code"):
-        total = aggregate.value.get("total") if isinstance(aggregate.value, dict) else aggregate.value
-        summary_ws.append(
-            [
-                aggregate.indicator.code,
-                aggregate.indicator.name,
-                aggregate.organization.name,
-                total,
-                str(aggregate.value),
-            ]
-        )
+    rows = aggregates.order_by("organization__name", "indicator__code").values_list(
+        "indicator__code", "indicator__name", "organization_id", "organization__name", "period_start", "period_end", "value"
+    )
+    for indicator_code, indicator_name, organization_id, organization_name, agg_start, agg_end, value in rows.iterator(
+        chunk_size=2000
+    ):
+        total = value.get("total") if isinstance(value, dict) else value
+        summary_ws.append([indicator_code, indicator_name, organization_name, total, str(value)])
         row_count += 1
-        sheet_name = re.sub(r"[\[\]\*:/\\\?]", "-", aggregate.organization.name)[:31] or f"Org-{aggregate.organization_id}"
+        sheet_name = re.sub(r"[\[\]\*:/\\\?]", "-", organization_name)[:31] or f"Org-{organization_id}"
         ws = organization_sheets.get(sheet_name)
         if ws is None:
             ws = workbook.create_sheet(title=sheet_name)
             ws.append(["Indicator Code", "Indicator", "Period Start", "Period End", "Total", "Value JSON"])
             organization_sheets[sheet_name] = ws
-        ws.append(
-            [
-                aggregate.indicator.code,
-                aggregate.indicator.name,
-                str(aggregate.period_start),
-                str(aggregate.period_end),
-                total,
-                str(aggregate.value),
-            ]
-        )
+        ws.append([indicator_code, indicator_name, str(agg_start), str(agg_end), total, str(value)])
 
     if include_validation_summary:
         validation_ws = workbook.create_sheet(title="Validation")
@@ -828,11 +1019,6 @@ def _build_export_workbook(job: WorkbookExportJob, include_validation_summary: b
         validation_ws.append(["Generated at", timezone.now().isoformat()])
         validation_ws.append(["Template", job.template.name if job.template else "None"])
 
-    from io import BytesIO
-
-    buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
     file_name = f"{job.project.code or job.project.id}-{job.reporting_period.replace(' ', '_')}-{job.scope}.xlsx"
     upload = Upload(
         name=file_name,
@@ -842,7 +1028,8 @@ def _build_export_workbook(job: WorkbookExportJob, include_validation_summary: b
         content_type="report_workbook_export",
         object_id=job.id,
     )
-    upload.file.save(file_name, ContentFile(buffer.getvalue()), save=True)
+    with save_workbook_to_tempfile(workbook) as handle:
+        upload.file.save(file_name, File(handle), save=True)
     return upload
 
 
@@ -924,21 +1111,10 @@ class ReportWorkbookImportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin
     @action(detail=True, methods=["post"])
     def analyze(self, request, pk=None):
         job = self.get_object()
-        analysis = _analyze_workbook(job)
-        template = _upsert_template_from_analysis(job, analysis)
-        session = _get_payload(job, SESSION_KEY)
-        session["template_id"] = template.id
-        _set_payload(job, SESSION_KEY, session)
-        _set_payload(job, ANALYSIS_KEY, analysis)
-        _update_status(job, "ready_for_review" if not analysis["summary"]["errors"] else "failed")
-        job.status = "completed" if not analysis["summary"]["errors"] else "failed"
-        job.total_rows = analysis["summary"]["rows_imported"] + analysis["summary"]["rows_skipped"]
-        job.processed_rows = job.total_rows
-        job.successful_rows = analysis["summary"]["rows_imported"]
-        job.failed_rows = analysis["summary"]["rows_skipped"]
-        job.completed_at = timezone.now()
-        job.save(update_fields=["errors", "status", "total_rows", "processed_rows", "successful_rows", "failed_rows", "completed_at"])
-        return Response(_serialize_session(job))
+        _update_status(job, "analyzing")
+        if not enqueue_import_job(job, "analyze", request.user):
+            return _already_processing()
+        return Response(_serialize_session(job), status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=["post"], url_path="create-missing-indicators")
     def create_missing_indicators(self, request, pk=None):
@@ -959,20 +1135,14 @@ class ReportWorkbookImportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin
         job = self.get_object()
         serializer = ReportWorkbookConfirmSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        result = _confirm_import(job, serializer.validated_data, request.user)
-        analysis = _get_payload(job, ANALYSIS_KEY)
-        analysis["summary"] = result["summary"]
-        analysis["issues"] = result["issues"]
-        _set_payload(job, ANALYSIS_KEY, analysis)
-        _update_status(job, "imported")
-        job.status = "completed"
-        job.total_rows = result["summary"]["rows_imported"] + result["summary"]["rows_skipped"]
-        job.processed_rows = job.total_rows
-        job.successful_rows = result["summary"]["rows_imported"]
-        job.failed_rows = result["summary"]["rows_skipped"]
-        job.completed_at = timezone.now()
-        job.save(update_fields=["errors", "status", "total_rows", "processed_rows", "successful_rows", "failed_rows", "completed_at"])
-        return Response(_serialize_session(job))
+        session = _get_payload(job, SESSION_KEY)
+        if not session.get("project"):
+            raise serializers.ValidationError({"project": "A project must be selected before confirming import."})
+        _parse_reporting_period(session.get("reporting_period"))
+        _update_status(job, "importing")
+        if not enqueue_import_job(job, "confirm", request.user, options=dict(serializer.validated_data)):
+            return _already_processing()
+        return Response(_serialize_session(job), status=status.HTTP_202_ACCEPTED)
 
 
 class ReportWorkbookTemplateViewSet(viewsets.ViewSet):
@@ -1053,9 +1223,9 @@ class ReportWorkbookExportViewSet(viewsets.ViewSet):
         job = WorkbookExportJob.objects.filter(pk=pk).select_related("generated_upload").first()
         if not job or not job.generated_upload or not job.generated_upload.file:
             raise Http404("Workbook export file not found.")
-        response = HttpResponse(
+        return FileResponse(
             job.generated_upload.file.open("rb"),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            as_attachment=True,
+            filename=Path(job.generated_upload.file.name).name,
+            content_type=XLSX_CONTENT_TYPE,
         )
-        response["Content-Disposition"] = f'attachment; filename="{Path(job.generated_upload.file.name).name}"'
-        return response
@@ -0,0 +1,347 @@
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook, load_workbook
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from aggregates.models import Aggregate
+from indicators.models import Indicator
+from organizations.models import Organization
+from projects.models import Project, ProjectIndicator, ProjectIndicatorOrganizationTarget
+from uploads.management.commands.import_reporting_workbook import (
+    IndicatorResolver,
+    OrganizationResolver,
+    open_workbook,
+    parse_matrix_sheet,
+    parse_sections,
+)
+from uploads import parsed_workbooks
+from uploads.jobs import enqueue_import_job
+from uploads.models import ImportJob, ParsedWorkbook
+
+User = get_user_model()
+
+
+def build_reporting_workbook(organization_name: str, sections: list[tuple[str, str, int]], include_matrix=True) -> bytes:
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    if include_matrix:
+        matrix = workbook.create_sheet("Indicator Matrix")
+        for row_number, (_, title, _) in enumerate(sections, start=6):
+            matrix[f"A{row_number}"] = organization_name
+            matrix[f"N{row_number}"] = title
+            matrix[f"I{row_number}"] = 10
+    sheet = workbook.create_sheet(organization_name)
+    for row_number, (index, title, total) in enumerate(sections, start=4):
+        sheet[f"B{row_number}"] = index
+        sheet[f"C{row_number}"] = title
+        sheet[f"AA{row_number}"] = total
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class WorkbookParserTests(APITestCase):
+    def test_parsers_read_sheets_row_wise_in_read_only_mode(self):
+        content = build_reporting_workbook(
+            "Hope Clinic",
+            [("1", "People screened for hypertension", 12), ("2a", "People referred for treatment", 5)],
+        )
+        workbook = open_workbook(BytesIO(content))
+        try:
+            matrix = parse_matrix_sheet(workbook["Indicator Matrix"])
+            sections = parse_sections(workbook["Hope Clinic"])
+        finally:
+            workbook.close()
+
+        self.assertEqual(len(matrix), 2)
+        first_assignment = next(iter(matrix.values()))["assignments"][0]
+        self.assertEqual(first_assignment["organization_name"], "Hope Clinic")
+        self.assertEqual(first_assignment["q1_target"], 10)
+        self.assertEqual([(section["index"], section["title"]) for section in sections], [
+            ("1", "People screened for hypertension"),
+            ("2a", "People referred for treatment"),
+        ])
+        self.assertEqual(sections[0]["rows"][0]["AA"], 12)
+        self.assertIsNone(sections[0]["rows"][0]["E"])
+
+
+class IndicatorResolverTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(
+            name="Resolver Project", code="RES-PROJ", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31)
+        )
+        cls.global_screened = Indicator.objects.create(name="People screened for hypertension", code="GLOBAL_1")
+        cls.project_screened = Indicator.objects.create(name="Number of people screened for hypertension", code="NCD_4")
+        cls.auto_screened = Indicator.objects.create(name="People screened for hypertension", code="AUTO_4")
+        cls.referred = Indicator.objects.create(name="Clients referred to a clinic for diabetes care", code="NCD_9")
+        ProjectIndicator.objects.create(project=cls.project, indicator=cls.project_screened)
+        ProjectIndicator.objects.create(project=cls.project, indicator=cls.auto_screened)
+
+    def test_resolve_prefers_configured_project_indicators_then_token_overlap(self):
+        with self.assertNumQueries(2):
+            resolver = IndicatorResolver(project=self.project)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve("Total number of people screened for hypertension"), self.project_screened)
+            self.assertEqual(resolver.resolve("Screened for hypertension", "4"), self.project_screened)
+            self.assertEqual(resolver.resolve("Clients referred to clinic for diabetes"), self.referred)
+            self.assertIsNone(resolver.resolve("Condoms distributed"))
+
+        created = Indicator.objects.create(name="Condoms distributed", code="NCD_10")
+        resolver.remember(created)
+        resolver.remember(created)
+        self.assertEqual(resolver.resolve("Condoms distributed"), created)
+        self.assertEqual(len(resolver.candidates_by_key["condoms distributed"]), 1)
+
+
+class OrganizationResolverTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.masego = Organization.objects.create(name="Masego Mental Health", code="MASEGO", type="ngo")
+        cls.deaf = Organization.objects.create(name="Botswana Association for the Deaf", code="BAD", type="ngo")
+        cls.blind = Organization.objects.create(
+            name="Botswana Association for the Blind and Partially Sighted", code="BABPS", type="ngo"
+        )
+
+    def test_resolve_uses_keys_prefixes_and_tokens_and_memoizes(self):
+        with self.assertNumQueries(1):
+            resolver = OrganizationResolver()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve("Masego Mental Health Org"), self.masego)
+            self.assertEqual(resolver.resolve("BAD"), self.deaf)
+            self.assertEqual(resolver.resolve("Botswana Association of the Dea"), self.deaf)
+            self.assertEqual(resolver.resolve("Botswana Association for the Bl"), self.blind)
+            self.assertEqual(resolver.resolve("Masego Mental"), self.masego)
+            self.assertEqual(resolver.resolve("Partially Sighted Blind Association"), self.blind)
+            self.assertIsNone(resolver.resolve("Botswana"))
+            self.assertIsNone(resolver.resolve(""))
+
+        with mock.patch.object(resolver, "_resolve") as uncached_resolve:
+            self.assertEqual(resolver.resolve("Masego Mental Health Org"), self.masego)
+        uncached_resolve.assert_not_called()
+
+
+class ReportWorkbookImportQueueTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="workbook-admin",
+            email="workbook-admin@example.com",
+            password="StrongPassword123!",
+            role="admin",
+            is_staff=True,
+        )
+        cls.organization = Organization.objects.create(name="Hope Clinic", code="HOPE", type="ngo")
+        cls.project = Project.objects.create(
+            name="Workbook Project",
+            code="WB-PROJ",
+            status="active",
+            start_date=date(2025, 1, 1),
+            end_date=date(2026, 3, 31),
+            created_by=cls.admin,
+        )
+        cls.screened = Indicator.objects.create(name="People screened for hypertension", code="NCD_1")
+        cls.referred = Indicator.objects.create(name="People referred for treatment", code="NCD_2")
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_authenticate(user=self.admin)
+
+    def _upload(self, content: bytes) -> int:
+        response = self.client.post(
+            "/api/report-workbooks/imports/",
+            {
+                "file": SimpleUploadedFile("report.xlsx", content),
+                "project": self.project.id,
+                "reporting_period": "Q1 2025 (Apr-Jun)",
+            },
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.json()["id"]
+
+    def _run_worker(self):
+        call_command("run_import_worker", once=True, progress_interval=0, stdout=StringIO())
+
+    def test_analyze_and_confirm_run_in_the_worker(self):
+        job_id = self._upload(
+            build_reporting_workbook(
+                "Hope Clinic",
+                [("1", "People screened for hypertension", 12), ("2", "People referred for treatment", 5)],
+            )
+        )
+
+        response = self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()["status"], "analyzing")
+        self.assertEqual(response.json()["job_status"], "queued")
+        conflict = self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+
+        self._run_worker()
+        body = self.client.get(f"/api/report-workbooks/imports/{job_id}/").json()
+        self.assertEqual(body["status"], "ready_for_review")
+        self.assertEqual(body["job_status"], "completed")
+        self.assertEqual(body["processed_rows"], 2)
+        self.assertEqual(body["missing_indicators"], [])
+
+        response = self.client.post(
+            f"/api/report-workbooks/imports/{job_id}/confirm/", {"overwrite_existing": True}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Aggregate.objects.exists())
+
+        self._run_worker()
+        body = self.client.get(f"/api/report-workbooks/imports/{job_id}/").json()
+        self.assertEqual(body["status"], "imported")
+        self.assertEqual(body["summary"]["rows_imported"], 2)
+        totals = dict(Aggregate.objects.values_list("indicator__code", "value_total"))
+        self.assertEqual(totals, {"NCD_1": 12.0, "NCD_2": 5.0})
+        self.assertEqual(ImportJob.objects.get(pk=job_id).requested_by, self.admin)
+
+    def test_enqueue_is_conditional_on_the_stored_status(self):
+        job_id = self._upload(build_reporting_workbook("Hope Clinic", [("1", "People screened for hypertension", 3)]))
+        stale = ImportJob.objects.get(pk=job_id)
+        response = self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        # A request that read the job before another one queued it must not queue it again.
+        self.assertFalse(enqueue_import_job(stale, "confirm", self.admin))
+        self.assertEqual(stale.status, "pending")
+        stored = ImportJob.objects.get(pk=job_id)
+        self.assertEqual((stored.status, stored.task), ("queued", "analyze"))
+
+        with mock.patch("uploads.report_workbooks.enqueue_import_job", return_value=False):
+            conflict = self.client.post(f"/api/report-workbooks/imports/{job_id}/confirm/", {}, format="multipart")
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+
+    def test_generic_uploads_have_no_import_action(self):
+        job_id = self._upload(build_reporting_workbook("Hope Clinic", [("1", "People screened for hypertension", 3)]))
+        upload_id = ImportJob.objects.get(pk=job_id).upload_id
+
+        response = self.client.post(f"/api/uploads/{upload_id}/start_import/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(ImportJob.objects.filter(upload_id=upload_id).count(), 1)
+
+    def test_worker_records_failures_on_the_job(self):
+        job_id = self._upload(build_reporting_workbook("Hope Clinic", [("1", "People screened", 1)], include_matrix=False))
+        self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        ImportJob.objects.filter(pk=job_id).update(task="confirm")
+
+        with self.assertLogs("uploads.jobs", level="ERROR"):
+            self._run_worker()
+
+        body = self.client.get(f"/api/report-workbooks/imports/{job_id}/").json()
+        self.assertEqual(body["status"], "failed")
+        self.assertEqual(body["job_status"], "failed")
+        self.assertEqual(body["issues"][-1]["code"], "job_failed")
+        self.assertIn("Indicator matrix", body["issues"][-1]["message"])
+
+    def test_workbook_is_parsed_once_per_file_checksum(self):
+        content = build_reporting_workbook("Hope Clinic", [("1", "People screened for hypertension", 7)])
+        first_job_id = self._upload(content)
+        second_job_id = self._upload(content)
+
+        with mock.patch.object(
+            parsed_workbooks, "parse_workbook_file", wraps=parsed_workbooks.parse_workbook_file
+        ) as parse_workbook_file:
+            for job_id in (first_job_id, second_job_id):
+                self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+                self._run_worker()
+            self.client.post(f"/api/report-workbooks/imports/{second_job_id}/confirm/", {}, format="multipart")
+            self._run_worker()
+
+        self.assertEqual(parse_workbook_file.call_count, 1)
+        self.assertEqual(ParsedWorkbook.objects.count(), 1)
+        self.assertEqual(self.client.get(f"/api/report-workbooks/imports/{second_job_id}/").json()["status"], "imported")
+        self.assertEqual(
+            list(Aggregate.objects.values_list("indicator__code", "value_total")), [("NCD_1", 7.0)]
+        )
+        checksums = set(ImportJob.objects.values_list("upload__checksum", flat=True))
+        self.assertEqual(checksums, {ParsedWorkbook.objects.get().checksum})
+
+    def test_sheet_previews_list_merged_ranges(self):
+        workbook = load_workbook(BytesIO(build_reporting_workbook("Hope Clinic", [("1", "People screened", 4)])))
+        workbook["Hope Clinic"].merge_cells("B1:F1")
+        buffer = BytesIO()
+        workbook.save(buffer)
+        job_id = self._upload(buffer.getvalue())
+
+        self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        self._run_worker()
+
+        sheets = {sheet["sheet_name"]: sheet for sheet in self.client.get(f"/api/report-workbooks/imports/{job_id}/").json()["sheets"]}
+        self.assertEqual(sheets["Hope Clinic"]["merged_ranges"], ["B1:F1"])
+        self.assertEqual(sheets["Indicator Matrix"]["merged_ranges"], [])
+
+    def _confirm_and_count_queries(self, sections: list[tuple[str, str, int]], payload: dict) -> int:
+        job_id = self._upload(build_reporting_workbook("Hope Clinic", sections))
+        self.client.post(f"/api/report-workbooks/imports/{job_id}/analyze/")
+        self._run_worker()
+        self.client.post(f"/api/report-workbooks/imports/{job_id}/confirm/", payload, format="multipart")
+        with CaptureQueriesContext(connection) as queries:
+            self._run_worker()
+        self.assertEqual(ImportJob.objects.get(pk=job_id).status, "completed")
+        return len(queries)
+
+    def test_confirm_writes_rows_in_bulk(self):
+        extra_indicators = [
+            Indicator.objects.create(name=f"Clients counselled on topic {index}", code=f"NCD_{index}")
+            for index in range(3, 9)
+        ]
+        few_queries = self._confirm_and_count_queries(
+            [("1", "People screened for hypertension", 4), ("2", "People referred for treatment", 2)],
+            {"overwrite_existing": True},
+        )
+        Aggregate.objects.all().delete()
+        ProjectIndicatorOrganizationTarget.objects.all().delete()
+        many_queries = self._confirm_and_count_queries(
+            [("1", "People screened for hypertension", 4), ("2", "People referred for treatment", 2)]
+            + [(str(indicator.id), indicator.name, 1) for indicator in extra_indicators],
+            {"overwrite_existing": True},
+        )
+
+        self.assertEqual(Aggregate.objects.count(), 8)
+        self.assertEqual(few_queries, many_queries)
+        project_indicator = ProjectIndicator.objects.get(project=self.project, indicator=self.screened)
+        self.assertEqual(project_indicator.q1_target, 10)
+        self.assertEqual(project_indicator.target_value, 10)
+        self.assertEqual(
+            ProjectIndicatorOrganizationTarget.objects.get(project_indicator=project_indicator).organization,
+            self.organization,
+        )
+        self.assertTrue(self.screened.organizations.filter(pk=self.organization.pk).exists())
+
+    def test_confirm_merges_into_existing_aggregates(self):
+        existing = Aggregate.objects.create(
+            indicator=self.screened,
+            project=self.project,
+            organization=self.organization,
+            period_start=date(2025, 4, 1),
+            period_end=date(2025, 6, 30),
+            value={"total": 3},
+        )
+
+        self._confirm_and_count_queries([("1", "People screened for hypertension", 4)], {})
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.value["total"], 7)
+        self.assertEqual(existing.value_total, 7.0)
+        self.assertEqual(existing.created_by, self.admin)
@@ -136,21 +136,6 @@ class UploadViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
-    
-    @action(detail=True, methods=['post'])
-    def start_import(self, request, pk=None):
-        """Start an import job for the uploaded file."""
-        upload = self.get_object()
-        
-        # Create import job
-        job = ImportJob.objects.create(
-            upload=upload,
-            created_by=request.user
-        )
-        
-        # In production, this would trigger a background task
-        # For now, return the job status
-        return Response(ImportJobSerializer(job).data, status=status.HTTP_201_CREATED)
 
 
 class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):